@@ -8,15 +8,43 @@ bl_info = {
     "category": "Object",
 }
 
+import concurrent.futures
+import contextlib
+import csv
+import json
+import math
 import os
+import struct
+import sys
+import threading
+import time
+import zlib
 
 import bpy
-from mathutils import Vector
+import numpy as np
+from mathutils import Matrix, Vector
+
+# 同じフォルダの共有モジュール (yume_*.py) を読み込めるようにする
+_ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+if _ADDON_DIR not in sys.path:
+    sys.path.append(_ADDON_DIR)
+
+import yume_catalog  # noqa: E402
+import yume_geometry_cache  # noqa: E402
+import yume_state  # noqa: E402
+import yume_trace  # noqa: E402
 
 
 # =========================================================
 # Properties
 # =========================================================
+def _on_live_framing_updated(self, context):
+    if self.live_framing:
+        _enable_live_framing(context.scene)
+    else:
+        _disable_live_framing()
+
+
 class EmptyCameraProperties(bpy.types.PropertyGroup):
     empty_object: bpy.props.PointerProperty(
         name="Empty",
@@ -43,6 +71,11 @@ class EmptyCameraProperties(bpy.types.PropertyGroup):
         subtype='DIR_PATH',
         description="レンダリング画像の出力先フォルダ"
     )
+    catalog_path: bpy.props.StringProperty(
+        name="カタログCSV",
+        subtype='FILE_PATH',
+        description="指定すると3DModel列がオブジェクト名と一致する行の2DImage列を出力ファイル名に使う"
+    )
     scale_multiplier: bpy.props.FloatProperty(
         name="Multiplier",
         default=1.2,
@@ -50,6 +83,96 @@ class EmptyCameraProperties(bpy.types.PropertyGroup):
         max=10.0,
         description="Ortho Scaleの倍率調整"
     )
+    framing_mode: bpy.props.EnumProperty(
+        name="フレーミング",
+        items=[
+            ('WORLD', "ワールドAABB", "ワールド軸のバウンディングボックスの最大寸法からOrtho Scaleを決める"),
+            ('CAMERA', "カメラ空間", "頂点をカメラの向きに射影した範囲に合わせて中心とOrtho Scaleを決める"),
+        ],
+        default='WORLD',
+        description="Emptyの位置とOrtho Scaleの決め方"
+    )
+    framing_points: bpy.props.EnumProperty(
+        name="射影する点",
+        items=[
+            ('VERTICES', "頂点", "評価済みメッシュの全頂点を射影する（最もきつい枠）"),
+            ('BOUNDS', "バウンディングボックス", "各オブジェクトのbound_boxの8頂点だけを射影する（高速）"),
+        ],
+        default='VERTICES',
+    )
+    adapt_render_aspect: bpy.props.BoolProperty(
+        name="縦横比を合わせる",
+        default=False,
+        description="カメラ空間の範囲に合わせて解像度の短辺を縮める（長辺は元の解像度のまま）"
+    )
+    live_framing: bpy.props.BoolProperty(
+        name="ライブ追従",
+        default=False,
+        description="選択やメッシュの変更に合わせてEmpty位置とOrtho Scaleを自動更新",
+        update=_on_live_framing_updated,
+    )
+    live_interval: bpy.props.FloatProperty(
+        name="更新間隔(秒)",
+        default=0.25,
+        min=0.05,
+        max=5.0,
+        description="ライブ追従で再計算・反映する最短間隔"
+    )
+    write_timing_report: bpy.props.BoolProperty(
+        name="タイミングレポート",
+        default=False,
+        description="工程ごとの所要時間・出力サイズ・三角形数を出力フォルダにCSV/JSONで書き出す"
+    )
+    use_adaptive_budget: bpy.props.BoolProperty(
+        name="アダプティブ品質",
+        default=False,
+        description="アイテムの三角形数・マテリアル数・サイズに応じてサンプル数/解像度/デノイズを切り替える"
+    )
+    budget_table: bpy.props.StringProperty(
+        name="品質テーブル",
+        default="2000:2:0.5:16:50:1, 20000:4:2:32:75:1, *:*:*:64:100:1",
+        description=(
+            "三角形数:マテリアル数:最大寸法(m):サンプル数:解像度%:デノイズ(0/1) をカンマ区切りで指定。"
+            "条件(上限)をすべて満たす最初の行を適用し、* は上限なし"
+        )
+    )
+    use_camera_rig: bpy.props.BoolProperty(
+        name="カメラリグ（多視点）",
+        default=False,
+        description="Emptyを回転させ、1回の分離処理で複数の視点をレンダリング（カメラはEmptyの子である必要があります）"
+    )
+    rig_views: bpy.props.StringProperty(
+        name="視点",
+        default="front:0:0, quarter:30:45, top:90:0",
+        description="名前:仰角:方位角(度) をカンマ区切りで指定。名前は出力ファイルの接尾辞になります"
+    )
+    use_render_pipeline: bpy.props.BoolProperty(
+        name="パイプライン書き出し",
+        default=False,
+        description=(
+            "PNGの圧縮と書き込みを別スレッドで行い、その間に次のアイテムの準備とレンダリングを進める"
+            "（ビュー変換 Standard・PNG出力のみ）"
+        )
+    )
+    pipeline_workers: bpy.props.IntProperty(
+        name="書き出しスレッド数",
+        default=0,
+        min=0,
+        max=32,
+        description="PNGを書き出すスレッド数 (0 = CPUコア数に応じて自動)"
+    )
+    pipeline_queue: bpy.props.IntProperty(
+        name="待ち行列の上限",
+        default=4,
+        min=1,
+        max=64,
+        description="書き出し待ちで保持する画像の最大数。超えるとレンダリングは書き出しの完了を待つ"
+    )
+    optimize_png: bpy.props.BoolProperty(
+        name="PNG最適化",
+        default=False,
+        description="フィルタを複数試して最も小さくなるものを最大圧縮で書き出す（書き出しスレッドで実行）"
+    )
 
 
 # =========================================================
@@ -88,22 +211,9 @@ class EMPTY_CAMERA_OT_move_and_adjust(bpy.types.Operator):
             return {'CANCELLED'}
 
         # 選択オブジェクトとその階層に含まれるメッシュを収集
-        depsgraph = context.evaluated_depsgraph_get()
-        mesh_objects = []
-        seen_objects = set()
-
-        for root_obj in selected_objects:
-            if root_obj.type == 'EMPTY':
-                candidates = root_obj.children_recursive
-            else:
-                candidates = (root_obj, *root_obj.children_recursive)
-
-            for obj in candidates:
-                if obj in seen_objects:
-                    continue
-                seen_objects.add(obj)
-                if obj.type == 'MESH':
-                    mesh_objects.append(obj)
+        with yume_trace.span("depsgraph"):
+            depsgraph = context.evaluated_depsgraph_get()
+        mesh_objects = _collect_selected_meshes(selected_objects)
 
         if not mesh_objects:
             # Emptyのみを選択した場合に子メッシュがないケースもここで検出される。
@@ -113,41 +223,16 @@ class EMPTY_CAMERA_OT_move_and_adjust(bpy.types.Operator):
             self.report({'ERROR'}, "メッシュオブジェクトが見つかりません")
             return {'CANCELLED'}
 
-        # 階層内の全メッシュのバウンディングボックスを計算
-        min_coord = Vector((float('inf'), float('inf'), float('inf')))
-        max_coord = Vector((float('-inf'), float('-inf'), float('-inf')))
-
-        has_valid_bbox = False
-
-        for obj in mesh_objects:
-            evaluated_obj = obj.evaluated_get(depsgraph)
-            bound_box = getattr(evaluated_obj, "bound_box", None)
-            if not bound_box:
-                continue
-
-            bbox_corners = [
-                evaluated_obj.matrix_world @ Vector(corner)
-                for corner in bound_box
-            ]
-            for corner in bbox_corners:
-                for i in range(3):
-                    min_coord[i] = min(min_coord[i], corner[i])
-                    max_coord[i] = max(max_coord[i], corner[i])
-            has_valid_bbox = True
-
-        if not has_valid_bbox:
+        # 階層内の全メッシュのバウンディングボックスから中心と最大寸法を算出
+        center, max_dimension = _calculate_bounds(mesh_objects, depsgraph)
+        if center is None or max_dimension is None:
             self.report({'ERROR'}, "バウンディングボックスを計算できませんでした")
             return {'CANCELLED'}
 
-        # 中心座標と各軸方向の寸法を算出
-        center = (min_coord + max_coord) / 2
-        bounding_dimensions = max_coord - min_coord
-        max_dimension = max(bounding_dimensions.x, bounding_dimensions.y, bounding_dimensions.z)
-        props.empty_object.location = center
-
-        # カメラのOrtho Scaleを調整
-        new_ortho_scale = max_dimension * props.scale_multiplier
-        props.camera_object.data.ortho_scale = new_ortho_scale
+        # Emptyの位置とカメラのOrtho Scaleを調整
+        new_ortho_scale = _Framer(context, props).frame(
+            mesh_objects, depsgraph, center, max_dimension
+        )
 
         self.report(
             {'INFO'},
@@ -175,32 +260,78 @@ def _collect_mesh_objects(root_obj, include_children):
     return meshes
 
 
-def _calculate_bounds(mesh_objects, depsgraph):
-    """メッシュオブジェクト集合のワールドバウンディングボックスを算出"""
+def _collect_selected_meshes(selected_objects):
+    """選択オブジェクトの階層からメッシュを収集（Emptyは子孫のみを対象）"""
+
+    mesh_objects = []
+    seen_objects = set()
+
+    for root_obj in selected_objects:
+        if root_obj.type == 'EMPTY':
+            candidates = root_obj.children_recursive
+        else:
+            candidates = (root_obj, *root_obj.children_recursive)
+
+        for obj in candidates:
+            if obj in seen_objects:
+                continue
+            seen_objects.add(obj)
+            if obj.type == 'MESH':
+                mesh_objects.append(obj)
+    return mesh_objects
+
+
+def _object_world_bounds(evaluated_obj):
+    """評価済みオブジェクト1つのワールドAABB (min, max) を算出"""
+
+    bound_box = getattr(evaluated_obj, "bound_box", None)
+    if not bound_box:
+        return None
+
+    matrix_world = evaluated_obj.matrix_world
+    bbox_corners = [matrix_world @ Vector(corner) for corner in bound_box]
+    min_coord = Vector((
+        min(corner.x for corner in bbox_corners),
+        min(corner.y for corner in bbox_corners),
+        min(corner.z for corner in bbox_corners),
+    ))
+    max_coord = Vector((
+        max(corner.x for corner in bbox_corners),
+        max(corner.y for corner in bbox_corners),
+        max(corner.z for corner in bbox_corners),
+    ))
+    return min_coord, max_coord
+
+
+def _union_bounds(bounds_list):
+    """AABBのリストを結合した (min, max)。有効なものがなければ None"""
 
     min_coord = Vector((float('inf'), float('inf'), float('inf')))
     max_coord = Vector((float('-inf'), float('-inf'), float('-inf')))
     has_valid_bbox = False
 
-    for obj in mesh_objects:
-        evaluated_obj = obj.evaluated_get(depsgraph)
-        bound_box = getattr(evaluated_obj, "bound_box", None)
-        if not bound_box:
+    for bounds in bounds_list:
+        if bounds is None:
             continue
-
-        bbox_corners = [
-            evaluated_obj.matrix_world @ Vector(corner)
-            for corner in bound_box
-        ]
-        for corner in bbox_corners:
-            for i in range(3):
-                min_coord[i] = min(min_coord[i], corner[i])
-                max_coord[i] = max(max_coord[i], corner[i])
+        obj_min, obj_max = bounds
+        for i in range(3):
+            min_coord[i] = min(min_coord[i], obj_min[i])
+            max_coord[i] = max(max_coord[i], obj_max[i])
         has_valid_bbox = True
 
     if not has_valid_bbox:
+        return None
+    return min_coord, max_coord
+
+
+def _merge_bounds(bounds_list):
+    """AABBのリストを結合し、中心と最大寸法を返す"""
+
+    union = _union_bounds(bounds_list)
+    if union is None:
         return None, None
 
+    min_coord, max_coord = union
     center = (min_coord + max_coord) / 2
     bounding_dimensions = max_coord - min_coord
     max_dimension = max(
@@ -211,7 +342,779 @@ def _calculate_bounds(mesh_objects, depsgraph):
     return center, max_dimension
 
 
-def _normalize_render_name(name):
+@yume_trace.traced("bounds")
+def _calculate_bounds(mesh_objects, depsgraph):
+    """メッシュオブジェクト集合のワールドバウンディングボックスを算出 (変更のないものはキャッシュを使う)"""
+
+    return _merge_bounds(
+        yume_geometry_cache.world_bounds(obj, depsgraph) for obj in mesh_objects
+    )
+
+
+def _bounds_diagonal(mesh_objects, depsgraph):
+    """ワールドAABBの対角線の長さ (どの向きから見ても射影がこの幅に収まる)"""
+
+    union = _union_bounds(
+        yume_geometry_cache.world_bounds(obj, depsgraph) for obj in mesh_objects
+    )
+    if union is None:
+        return None
+    return (union[1] - union[0]).length
+
+
+def _camera_plane_points(mesh_objects, depsgraph, axes, use_vertices):
+    """頂点 (または bound_box の8頂点) をカメラの右/上方向 axes (2, 3) に射影した (N, 2) 配列"""
+
+    projected = []
+    for obj in mesh_objects:
+        if use_vertices:
+            local = yume_geometry_cache.vertex_positions(obj, depsgraph)
+        else:
+            local = yume_geometry_cache.bound_box(obj, depsgraph)
+        if local is None or not len(local):
+            continue
+        matrix = np.array(obj.evaluated_get(depsgraph).matrix_world, dtype=np.float64)
+        projected.append(local @ (axes @ matrix[:3, :3]).T + axes @ matrix[:3, 3])
+    if not projected:
+        return None
+    return np.concatenate(projected)
+
+
+def _ortho_scale_for(scene, camera_data, extent):
+    """射影範囲 (幅, 高さ) が収まる Ortho Scale (センサーフィットと解像度の縦横比を考慮)"""
+
+    render = scene.render
+    aspect = (render.resolution_x * render.pixel_aspect_x) / (render.resolution_y * render.pixel_aspect_y)
+    sensor_fit = camera_data.sensor_fit
+    if sensor_fit == 'AUTO':
+        sensor_fit = 'HORIZONTAL' if aspect >= 1.0 else 'VERTICAL'
+    if sensor_fit == 'HORIZONTAL':
+        return max(extent[0], extent[1] * aspect)
+    return max(extent[1], extent[0] / aspect)
+
+
+class _Framer:
+    """アイテムごとにEmptyの位置とOrtho Scaleを設定する
+
+    WORLD はワールドAABBの中心と最大寸法を使う (従来の動作)。カメラリグで複数の視点を
+    撮る場合 (rig=True) は、斜めの視点でも切れないよう最大寸法の代わりにAABBの対角線を使う。
+    CAMERA は頂点をカメラの右/上方向に射影した範囲の中心にEmptyを平行移動し、その範囲が収まる
+    Ortho Scaleにする。奥行きはワールドAABBの中心のまま。縦横比を合わせる場合は解像度の長辺を
+    開始時の値に保って短辺を縮め、元の解像度は snapshot に記録する。
+    """
+
+    def __init__(self, context, props, snapshot=None, rig=False):
+        self.context = context
+        self.scene = context.scene
+        self.props = props
+        self.snapshot = snapshot
+        self.tight = props.framing_mode == 'CAMERA'
+        self.rig = rig
+        render = self.scene.render
+        self.base_resolution = (render.resolution_x, render.resolution_y)
+        self._item = None
+
+    def _set(self, owner, attr, value):
+        if self.snapshot is not None:
+            self.snapshot.set(owner, attr, value)
+        else:
+            setattr(owner, attr, value)
+
+    def frame(self, mesh_objects, depsgraph, center, max_dimension):
+        """アイテムを枠に収めて Ortho Scale を返す"""
+
+        props = self.props
+        props.empty_object.location = center
+        if self.rig and not self.tight:
+            max_dimension = _bounds_diagonal(mesh_objects, depsgraph) or max_dimension
+        ortho_scale = max_dimension * props.scale_multiplier
+        props.camera_object.data.ortho_scale = ortho_scale
+        if not self.tight:
+            return ortho_scale
+        self._item = (mesh_objects, depsgraph, center)
+        return self.reframe(update=False) or ortho_scale
+
+    def reframe(self, update=True):
+        """現在のカメラの向きで射影範囲に合わせ直す (カメラリグの視点ごとに呼ぶ)
+
+        射影できる点がなければ None を返し、ワールドAABBでの設定を残す。
+        """
+
+        if not self.tight or self._item is None:
+            return None
+        mesh_objects, depsgraph, center = self._item
+        props = self.props
+        camera = props.camera_object
+        if update:
+            # Emptyの回転をカメラのワールド行列に反映
+            self.context.view_layer.update()
+
+        with yume_trace.span("framing", objects=len(mesh_objects)):
+            # カメラや親Emptyのスケールを含めないよう回転だけを取り出す (軸は単位ベクトル)
+            rotation = np.array(camera.matrix_world.to_quaternion().to_matrix(), dtype=np.float64)
+            axes = rotation[:, :2].T
+            points = _camera_plane_points(
+                mesh_objects, depsgraph, axes, props.framing_points == 'VERTICES'
+            )
+            if points is None:
+                return None
+            low = points.min(axis=0)
+            high = points.max(axis=0)
+        extent = np.maximum(high - low, 1e-6)
+
+        # カメラ平面内だけ平行移動して射影範囲の中心に合わせる
+        world_center = np.array(center, dtype=np.float64)
+        offset = (low + high) / 2.0 - axes @ world_center
+        props.empty_object.location = Vector((world_center + axes.T @ offset).tolist())
+
+        if props.adapt_render_aspect:
+            self._adapt_resolution(extent)
+        ortho_scale = _ortho_scale_for(self.scene, camera.data, extent) * props.scale_multiplier
+        camera.data.ortho_scale = ortho_scale
+        return ortho_scale
+
+    def _adapt_resolution(self, extent):
+        render = self.scene.render
+        long_side = max(self.base_resolution)
+        # 表示上の縦横比 (ピクセル縦横比込み) を射影範囲に合わせる
+        ratio = (extent[0] / extent[1]) * render.pixel_aspect_y / render.pixel_aspect_x
+        if ratio >= 1.0:
+            resolution = (long_side, max(1, math.ceil(long_side / ratio)))
+        else:
+            resolution = (max(1, math.ceil(long_side * ratio)), long_side)
+        if render.resolution_x != resolution[0]:
+            self._set(render, "resolution_x", resolution[0])
+        if render.resolution_y != resolution[1]:
+            self._set(render, "resolution_y", resolution[1])
+
+
+def _parse_rig_views(spec):
+    """"名前:仰角:方位角" のカンマ区切り指定を (名前, 仰角rad, 方位角rad) のリストに変換"""
+
+    views = []
+    seen_names = set()
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        parts = [part.strip() for part in entry.split(":")]
+        if len(parts) != 3 or not parts[0]:
+            raise ValueError(f"視点指定が不正です: {entry}")
+        name = parts[0]
+        if name in seen_names:
+            raise ValueError(f"視点名が重複しています: {name}")
+        seen_names.add(name)
+        try:
+            elevation = math.radians(float(parts[1]))
+            azimuth = math.radians(float(parts[2]))
+        except ValueError:
+            raise ValueError(f"角度が数値ではありません: {entry}") from None
+        views.append((name, elevation, azimuth))
+    if not views:
+        raise ValueError("視点が指定されていません")
+    return views
+
+
+def _build_rig_rotations(base_rotation, views):
+    """Emptyの元の回転を基準に、各視点の回転 (接尾辞, Euler) を算出
+
+    方位角はワールドZ軸まわり、仰角はEmptyのローカルX軸まわりに回転させる。
+    """
+
+    base_matrix = base_rotation.to_matrix()
+    rotations = []
+    for name, elevation, azimuth in views:
+        view_matrix = (
+            Matrix.Rotation(azimuth, 3, 'Z')
+            @ base_matrix
+            @ Matrix.Rotation(elevation, 3, 'X')
+        )
+        rotations.append(
+            (f"_{name}", view_matrix.to_euler(base_rotation.order, base_rotation))
+        )
+    return rotations
+
+
+def _prepare_render_views(props):
+    """レンダリングする視点 (接尾辞, Euler または None) のリストを返す
+
+    カメラリグ無効時は現在の向きのみ (接尾辞なし)。
+    """
+
+    if not props.use_camera_rig:
+        return [("", None)]
+
+    empty = props.empty_object
+    if props.camera_object not in empty.children_recursive:
+        raise ValueError("カメラリグを使うにはカメラをEmptyの子にしてください")
+    if empty.rotation_mode in {'QUATERNION', 'AXIS_ANGLE'}:
+        raise ValueError("カメラリグはEuler回転のEmptyのみ対応しています")
+
+    views = _parse_rig_views(props.rig_views)
+    return _build_rig_rotations(empty.rotation_euler.copy(), views)
+
+
+def _render_views(
+    operator, scene, props, obj_name, render_path, views, profiler, pipeline=None, framer=None
+):
+    """分離済みの対象を各視点でレンダリング。成功時True
+
+    pipeline を渡すとファイルは書き出しスレッドが書き込む (完了は pipeline.finish で待つ)。
+    framer を渡すと視点を回すたびにカメラ空間のフレーミングをやり直す。
+    """
+
+    for suffix, rotation in views:
+        if rotation is not None:
+            props.empty_object.rotation_euler = rotation
+            if framer is not None:
+                framer.reframe()
+        scene.render.filepath = render_path + suffix
+        try:
+            profiler.render(scene, write_still=pipeline is None)
+            if pipeline is not None:
+                with profiler.phase("write"):
+                    pipeline.submit(_still_output_path(scene), obj_name, profiler.current_record())
+        except (RuntimeError, OSError) as exc:
+            operator.report({'ERROR'}, f"{obj_name}{suffix}: レンダリングに失敗しました - {exc}")
+            return False
+    return True
+
+
+def _count_triangles(mesh_objects, depsgraph):
+    """評価済みメッシュの三角形数を合計"""
+
+    return sum(yume_geometry_cache.triangle_count(obj, depsgraph) for obj in mesh_objects)
+
+
+def _count_materials(mesh_objects):
+    """メッシュオブジェクト集合で使われているマテリアルの種類数"""
+
+    materials = set()
+    for obj in mesh_objects:
+        for slot in obj.material_slots:
+            if slot.material:
+                materials.add(slot.material)
+    return len(materials)
+
+
+def _parse_budget_table(spec):
+    """品質テーブルを (上限条件, 設定) のリストに変換"""
+
+    def parse_limit(text):
+        return float('inf') if text == "*" else float(text)
+
+    tiers = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        parts = [part.strip() for part in entry.split(":")]
+        if len(parts) != 6:
+            raise ValueError(f"品質テーブルの行が不正です: {entry}")
+        try:
+            limits = tuple(parse_limit(part) for part in parts[:3])
+            settings = {
+                "samples": int(parts[3]),
+                "resolution_percentage": int(parts[4]),
+                "denoise": parts[5] not in {"0", "off", "false"},
+            }
+        except ValueError:
+            raise ValueError(f"品質テーブルの値が数値ではありません: {entry}") from None
+        if settings["samples"] < 1 or not 1 <= settings["resolution_percentage"] <= 100:
+            raise ValueError(f"品質テーブルの値が範囲外です: {entry}")
+        tiers.append((limits, settings))
+    if not tiers:
+        raise ValueError("品質テーブルが空です")
+    return tiers
+
+
+class _RenderBudget:
+    """アイテムごとにレンダー設定を切り替え、終了時に元の設定へ戻す"""
+
+    EEVEE_ENGINES = {'BLENDER_EEVEE', 'BLENDER_EEVEE_NEXT'}
+
+    def __init__(self, scene, tiers):
+        self.scene = scene
+        self.tiers = tiers
+        self.original = self._capture()
+
+    def _capture(self):
+        scene = self.scene
+        settings = {"resolution_percentage": scene.render.resolution_percentage}
+        if scene.render.engine == 'CYCLES':
+            settings["samples"] = scene.cycles.samples
+            settings["denoise"] = scene.cycles.use_denoising
+        elif scene.render.engine in self.EEVEE_ENGINES:
+            settings["samples"] = scene.eevee.taa_render_samples
+        return settings
+
+    def _apply(self, settings):
+        scene = self.scene
+        scene.render.resolution_percentage = settings["resolution_percentage"]
+        if scene.render.engine == 'CYCLES':
+            scene.cycles.samples = settings["samples"]
+            scene.cycles.use_denoising = settings["denoise"]
+        elif scene.render.engine in self.EEVEE_ENGINES:
+            scene.eevee.taa_render_samples = settings["samples"]
+
+    def select(self, triangles, materials, size):
+        """条件を満たす最初の行の設定。該当なしなら元の設定"""
+
+        for (max_triangles, max_materials, max_size), settings in self.tiers:
+            if triangles <= max_triangles and materials <= max_materials and size <= max_size:
+                return settings
+        return self.original
+
+    def apply_for(self, triangles, mesh_objects, size):
+        self._apply(self.select(triangles, _count_materials(mesh_objects), size))
+
+    def restore(self):
+        self._apply(self.original)
+
+
+def _report_timing(operator, profiler, output_dir):
+    try:
+        slowest = profiler.write_report(output_dir)
+    except OSError as exc:
+        operator.report({'WARNING'}, f"タイミングレポートを書き出せません: {exc}")
+        return
+    if slowest:
+        summary = ", ".join(f"{record['name']} {record['total']:.2f}s" for record in slowest)
+        operator.report({'INFO'}, f"処理時間の長いアイテム: {summary}")
+
+
+class _BatchProfiler:
+    """バッチレンダリングの工程ごとの所要時間を計測し、レポートを書き出す
+
+    setup/render はレンダーハンドラの発火時刻で区切る。
+    render にはレンダーエンジン内のシーン同期とサンプリングが含まれる。
+    write は write_still を使わずに Render Result を保存した時間 (エンコードとディスク書き込み)。
+    """
+
+    PHASES = ("bounds", "isolation", "setup", "render", "write")
+    REPORT_NAME = "render_timing"
+
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.records = []
+        self._item = None
+        self._item_start = 0.0
+        self._marks = {}
+
+    # --- レンダーハンドラ ---
+    def _on_render_pre(self, scene, *args):
+        self._marks["pre"] = time.perf_counter()
+
+    def _on_render_post(self, scene, *args):
+        self._marks["post"] = time.perf_counter()
+
+    def _handler_pairs(self):
+        handlers = bpy.app.handlers
+        return (
+            (handlers.render_pre, self._on_render_pre),
+            (handlers.render_post, self._on_render_post),
+        )
+
+    def start(self):
+        if not self.enabled:
+            return
+        for handler_list, callback in self._handler_pairs():
+            handler_list.append(callback)
+
+    def stop(self):
+        if not self.enabled:
+            return
+        for handler_list, callback in self._handler_pairs():
+            if callback in handler_list:
+                handler_list.remove(callback)
+        self._close_item()
+
+    # --- 計測 ---
+    def begin_item(self, name):
+        self._close_item()
+        self._item = {
+            "name": name,
+            "status": "ok",
+            "total": 0.0,
+            "phases": dict.fromkeys(self.PHASES, 0.0),
+            "triangles": 0,
+            "outputs": [],
+            "output_bytes": 0,
+        }
+        self._item_start = time.perf_counter()
+        self.records.append(self._item)
+
+    def _close_item(self):
+        if self._item is not None:
+            self._item["total"] = time.perf_counter() - self._item_start
+            self._item = None
+
+    def set_status(self, status):
+        if self._item is not None:
+            self._item["status"] = status
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self._item is not None:
+                self._item["phases"][name] += time.perf_counter() - start
+
+    def set_triangles(self, triangles):
+        if self._item is not None:
+            self._item["triangles"] = triangles
+
+    def render(self, scene, write_still=True):
+        """レンダリングを実行し、setup/render/write に分割して記録
+
+        render_post は write_still の保存後に発火するので、レンダリング自体は保存なしで行い、
+        write_still=True では Render Result を write の区間で保存する。
+        write_still=False (パイプラインモード) の出力サイズは add_output_bytes で後から加算する。
+        """
+
+        self._marks.clear()
+        start = time.perf_counter()
+        with yume_trace.span("render", item=self._item["name"] if self._item else ""):
+            bpy.ops.render.render(write_still=False)
+        end = time.perf_counter()
+        if self._item is not None:
+            phases = self._item["phases"]
+            pre = self._marks.get("pre", start)
+            post = self._marks.get("post", end)
+            phases["setup"] += pre - start
+            phases["render"] += post - pre
+
+        output_path = _still_output_path(scene)
+        if write_still:
+            with self.phase("write"), yume_trace.span("render.write"):
+                os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+                bpy.data.images["Render Result"].save_render(filepath=output_path, scene=scene)
+
+        if self.enabled and self._item is not None:
+            self._item["outputs"].append(os.path.basename(output_path))
+            if write_still and os.path.exists(output_path):
+                self._item["output_bytes"] += os.path.getsize(output_path)
+
+    def current_record(self):
+        return self._item
+
+    @staticmethod
+    def add_output_bytes(record, size):
+        if record is not None:
+            record["output_bytes"] += size
+
+    # --- レポート ---
+    def write_report(self, output_dir, slowest_count=5):
+        """CSV/JSONレポートを書き出し、所要時間の長い順のアイテムを返す"""
+
+        self._close_item()
+        slowest = sorted(self.records, key=lambda record: record["total"], reverse=True)
+        slowest = slowest[:slowest_count]
+
+        csv_path = os.path.join(output_dir, f"{self.REPORT_NAME}.csv")
+        with open(csv_path, "w", newline="", encoding="utf-8") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(
+                ["name", "status", "total", *self.PHASES, "triangles", "output_bytes", "outputs"]
+            )
+            for record in self.records:
+                writer.writerow([
+                    record["name"],
+                    record["status"],
+                    f"{record['total']:.4f}",
+                    *(f"{record['phases'][phase]:.4f}" for phase in self.PHASES),
+                    record["triangles"],
+                    record["output_bytes"],
+                    ";".join(record["outputs"]),
+                ])
+
+        summary = {
+            "items": len(self.records),
+            "total": sum(record["total"] for record in self.records),
+            "phase_totals": {
+                phase: sum(record["phases"][phase] for record in self.records)
+                for phase in self.PHASES
+            },
+            "slowest": [
+                {"name": record["name"], "total": record["total"]}
+                for record in slowest
+            ],
+        }
+        json_path = os.path.join(output_dir, f"{self.REPORT_NAME}.json")
+        with open(json_path, "w", encoding="utf-8") as json_file:
+            json.dump({"summary": summary, "items": self.records}, json_file, indent=2)
+
+        return slowest
+
+
+# =========================================================
+# Pipelined PNG output
+# =========================================================
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# チャンネル数 -> PNGのカラータイプ
+_PNG_COLOR_TYPES = {1: 0, 3: 2, 4: 6}
+
+_COLOR_MODE_CHANNELS = {'BW': 1, 'RGB': 3, 'RGBA': 4}
+
+
+def _png_chunk(tag, data):
+    crc = zlib.crc32(tag + data) & 0xFFFFFFFF
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", crc)
+
+
+def _filter_png_rows(data, bytes_per_pixel, filter_type):
+    """(高さ, 行バイト数) の uint8 配列に PNG フィルタ (0=None, 1=Sub, 2=Up) を適用して行頭に番号を付ける"""
+    filtered = data.copy() if filter_type else data
+    if filter_type == 1:
+        filtered[:, bytes_per_pixel:] -= data[:, :-bytes_per_pixel]
+    elif filter_type == 2:
+        filtered[1:] -= data[:-1]
+    rows = np.empty((data.shape[0], data.shape[1] + 1), dtype=np.uint8)
+    rows[:, 0] = filter_type
+    rows[:, 1:] = filtered
+    return rows.tobytes()
+
+
+def _encode_png(samples, level, optimize):
+    """(高さ, 幅, チャンネル) の uint8/uint16 配列をPNGのバイト列にする
+
+    optimize=True ではフィルタを3種類試し、最大圧縮で最も小さいものを使う。
+    """
+    height, width, channels = samples.shape
+    bit_depth = samples.dtype.itemsize * 8
+    big_endian = samples.astype(">u2" if bit_depth == 16 else np.uint8)
+    data = np.ascontiguousarray(big_endian).view(np.uint8).reshape(height, -1)
+    bytes_per_pixel = channels * bit_depth // 8
+
+    filter_types = (0, 1, 2) if optimize else (2,)
+    level = 9 if optimize else level
+    idat = min(
+        (zlib.compress(_filter_png_rows(data, bytes_per_pixel, f), level) for f in filter_types),
+        key=len,
+    )
+    header = struct.pack(">IIBBBBB", width, height, bit_depth, _PNG_COLOR_TYPES[channels], 0, 0, 0)
+    return b"".join((
+        _PNG_SIGNATURE,
+        _png_chunk(b"IHDR", header),
+        _png_chunk(b"IDAT", idat),
+        _png_chunk(b"IEND", b""),
+    ))
+
+
+def _display_samples(pixels, width, height, channels, bit_depth, exposure, gamma):
+    """Viewer画像のピクセル (下の行から・乗算済みアルファ・リニア) を Standard ビュー変換で表示値にする"""
+    rgba = pixels.reshape(height, width, 4)[::-1]
+    alpha = rgba[..., 3:4]
+    rgb = rgba[..., :3].copy()
+    if channels == 4:
+        # PNG はストレートアルファなので乗算を戻す (アルファ0の画素はそのまま)
+        np.divide(rgba[..., :3], alpha, out=rgb, where=alpha > 0.0)
+    if exposure:
+        rgb *= 2.0 ** exposure
+    if channels == 1:
+        rgb = rgb @ np.array([[0.2126], [0.7152], [0.0722]], dtype=np.float32)
+    rgb = np.clip(rgb, 0.0, 1.0)
+    display = np.where(rgb <= 0.0031308, rgb * 12.92, 1.055 * np.power(rgb, 1.0 / 2.4) - 0.055)
+    if gamma != 1.0:
+        display = np.power(display, 1.0 / gamma)
+    if channels == 4:
+        display = np.concatenate((display, np.clip(alpha, 0.0, 1.0)), axis=2)
+
+    maximum = 65535 if bit_depth == 16 else 255
+    return np.rint(display * maximum).astype(np.uint16 if bit_depth == 16 else np.uint8)
+
+
+def _write_render_png(filepath, pixels, width, height, options):
+    """書き出しスレッドで実行: 変換・圧縮してファイルに書き込み、バイト数を返す"""
+    with yume_trace.span("png.encode", file=os.path.basename(filepath)):
+        samples = _display_samples(
+            pixels, width, height,
+            options["channels"], options["bit_depth"], options["exposure"], options["gamma"],
+        )
+        data = _encode_png(samples, options["level"], options["optimize"])
+    with yume_trace.span("png.write", file=os.path.basename(filepath)):
+        temp_path = f"{filepath}.tmp"
+        with open(temp_path, "wb") as png_file:
+            png_file.write(data)
+        os.replace(temp_path, filepath)
+    return len(data)
+
+
+def _still_output_path(scene):
+    """write_still で書き出される静止画のパス (フレーム番号は付かず、拡張子は必要なら補う)"""
+    path = bpy.path.abspath(scene.render.filepath)
+    extension = scene.render.file_extension
+    if scene.render.use_file_extension and not path.lower().endswith(extension.lower()):
+        path += extension
+    return path
+
+
+class _RenderPipeline:
+    """レンダリングとPNG書き出しを重ねて実行する
+
+    write_still を使わず、一時的に追加した Viewer ノードの画像からピクセルを foreach_get で
+    コピーし、変換・圧縮・書き込みはスレッドプールで行う (numpy と zlib は GIL を解放する)。
+    書き出し待ちが max_pending 件に達するとメインスレッドは空きを待つので、
+    保持するピクセルバッファはその件数を超えない。ビュー変換は Standard のみ対応。
+    """
+
+    VIEWER_IMAGE = "Viewer Node"
+
+    @staticmethod
+    def unsupported_reason(scene):
+        """パイプラインで書き出せない設定なら理由を返す"""
+        if scene.render.image_settings.file_format != 'PNG':
+            return "出力形式がPNGではありません"
+        if scene.display_settings.display_device != 'sRGB':
+            return "ディスプレイデバイスがsRGBではありません"
+        view = scene.view_settings
+        if view.view_transform != 'Standard' or view.look != 'None' or view.use_curve_mapping:
+            return "ビュー変換がStandardではありません"
+        return None
+
+    def __init__(self, scene, snapshot, workers, max_pending, optimize):
+        self.scene = scene
+        self.snapshot = snapshot
+        self.optimize = optimize
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._pending = []
+        self._tree = None
+        self._added_nodes = []
+        self._previous_active_node = None
+
+    def _add_node(self, node_type):
+        node = self._tree.nodes.new(node_type)
+        self._added_nodes.append(node)
+        return node
+
+    def start(self):
+        """Viewer ノードを追加して書き出しスレッドを起動する"""
+        scene = self.scene
+        # コンポジットが無効だった場合、残っているノードツリーの効果は write_still でも
+        # 適用されないので、Viewer には新しい Render Layers の出力をそのまま渡す
+        use_existing_tree = scene.use_nodes and scene.render.use_compositing
+        self.snapshot.set(scene, "use_nodes", True)
+        self.snapshot.set(scene.render, "use_compositing", True)
+        self._tree = scene.node_tree
+        nodes = self._tree.nodes
+
+        composite = next((node for node in nodes if node.type == 'COMPOSITE'), None)
+        source = None
+        if use_existing_tree and composite is not None and composite.inputs[0].is_linked:
+            source = composite.inputs[0].links[0].from_socket
+        if source is None:
+            source = self._add_node("CompositorNodeRLayers").outputs["Image"]
+            if composite is None:
+                composite = self._add_node("CompositorNodeComposite")
+            if not composite.inputs[0].is_linked:
+                self._tree.links.new(source, composite.inputs[0])
+        viewer = self._add_node("CompositorNodeViewer")
+        self._tree.links.new(source, viewer.inputs[0])
+        self._previous_active_node = nodes.active
+        nodes.active = viewer
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="yume_png"
+        )
+
+    def submit(self, filepath, name, record):
+        """直前のレンダー結果をコピーして書き出しを予約する (待ちが上限なら空きを待つ)"""
+        image = bpy.data.images.get(self.VIEWER_IMAGE)
+        if image is None:
+            raise RuntimeError("Viewer Node の画像が見つかりません")
+        settings = self.scene.render.image_settings
+        view = self.scene.view_settings
+        options = {
+            "channels": _COLOR_MODE_CHANNELS.get(settings.color_mode, 4),
+            "bit_depth": 16 if settings.color_depth == '16' else 8,
+            "exposure": view.exposure,
+            "gamma": view.gamma,
+            "level": round(settings.compression * 9 / 100),
+            "optimize": self.optimize,
+        }
+
+        self._slots.acquire()
+        try:
+            width, height = image.size
+            pixels = np.empty(width * height * 4, dtype=np.float32)
+            image.pixels.foreach_get(pixels)
+            future = self._executor.submit(_write_render_png, filepath, pixels, width, height, options)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _future: self._slots.release())
+        self._pending.append((future, filepath, name, record))
+
+    def finish(self, operator):
+        """予約したすべての書き出しを待ち、失敗したアイテム名の集合を返す"""
+        failed = set()
+        for future, filepath, name, record in self._pending:
+            try:
+                size = future.result()
+            except Exception as exc:  # 書き出しスレッド内のエラー
+                operator.report({'ERROR'}, f"{os.path.basename(filepath)}: 書き出しに失敗しました - {exc}")
+                # レンダリング自体に失敗したアイテムは集計済み
+                if record is None or record["status"] != "failed":
+                    failed.add(name)
+                if record is not None:
+                    record["status"] = "failed"
+                continue
+            _BatchProfiler.add_output_bytes(record, size)
+        self._pending.clear()
+        return failed
+
+    def close(self):
+        """書き出しスレッドを止めて追加したノードを削除する (何度呼んでもよい)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._tree is not None:
+            nodes = self._tree.nodes
+            for node in self._added_nodes:
+                nodes.remove(node)
+            try:
+                nodes.active = self._previous_active_node
+            except (ReferenceError, TypeError):
+                pass
+            self._added_nodes = []
+            self._tree = None
+
+
+def _make_render_pipeline(operator, scene, props, snapshot):
+    """設定が有効で対応している場合にパイプラインを作る。対応していなければ警告して None"""
+    if not props.use_render_pipeline:
+        return None
+    reason = _RenderPipeline.unsupported_reason(scene)
+    if reason:
+        operator.report({'WARNING'}, f"パイプライン書き出しを使えません ({reason})。通常の書き出しで続行します")
+        return None
+    return _RenderPipeline(
+        scene, snapshot, props.pipeline_workers, props.pipeline_queue, props.optimize_png
+    )
+
+
+def _isolate_for_render(snapshot, collection_objects, visible_objects, shown_objects):
+    """コレクション内で visible_objects 以外をレンダリングから外し、表示中の集合を返す
+
+    2件目以降は前のアイテムで表示したものとの差分だけを切り替える。変更は snapshot に記録する。
+    """
+    if shown_objects is None:
+        targets = collection_objects
+    else:
+        targets = (shown_objects | visible_objects) & collection_objects
+    for col_obj in targets:
+        hidden = col_obj not in visible_objects
+        if col_obj.hide_render != hidden:
+            snapshot.set(col_obj, "hide_render", hidden)
+    return visible_objects
+
+
+def _render_base_name(name):
     base_name = name
     if "." in base_name:
         name_head, name_tail = base_name.rsplit(".", 1)
@@ -221,7 +1124,146 @@ def _normalize_render_name(name):
         name_head, name_tail = base_name.rsplit("-", 1)
         if name_tail.isdigit():
             base_name = name_head
-    return base_name.replace("_model", "_image")
+    return base_name
+
+
+def _normalize_render_name(name):
+    return _render_base_name(name).replace("_model", "_image")
+
+
+def _load_render_catalog(props):
+    if not props.catalog_path:
+        return None
+    return yume_catalog.load_catalog(bpy.path.abspath(props.catalog_path))
+
+
+def _catalog_render_name(catalog, base_name, fallback):
+    """カタログの3DModel列から2DImage名を引く。見つからなければ fallback"""
+
+    if catalog is None:
+        return fallback
+    return catalog.lookup("3DModel", base_name, "2DImage") or fallback
+
+
+# =========================================================
+# Live framing
+# =========================================================
+_live_framing_state = {
+    "scene": "",       # 追従対象のシーン名
+    "bounds": {},      # オブジェクト名 -> ワールドAABB (min, max) または None
+    "dirty": set(),    # 次回の反映時にAABBを再計算するオブジェクト名
+}
+
+
+def _schedule_live_framing(scene):
+    if bpy.app.timers.is_registered(_live_framing_tick):
+        return
+    _live_framing_state["scene"] = scene.name
+    bpy.app.timers.register(
+        _live_framing_tick,
+        first_interval=scene.empty_camera_props.live_interval,
+    )
+
+
+@bpy.app.handlers.persistent
+def _live_framing_depsgraph_handler(scene, depsgraph):
+    """更新されたオブジェクトだけを記録し、反映はタイマーへ間引いて委ねる"""
+
+    props = getattr(scene, "empty_camera_props", None)
+    if props is None or not props.live_framing:
+        return
+
+    # 追従結果の書き込み自体による更新は無視する
+    ignored_names = {
+        obj.name for obj in (props.empty_object, props.camera_object) if obj
+    }
+    needs_update = False
+    for update in depsgraph.updates:
+        id_data = update.id
+        if isinstance(id_data, bpy.types.Object):
+            if id_data.name in ignored_names:
+                continue
+            if update.is_updated_geometry or update.is_updated_transform:
+                _live_framing_state["dirty"].add(id_data.name)
+                needs_update = True
+        elif isinstance(id_data, bpy.types.Scene):
+            # 選択変更はシーンの更新として通知される
+            needs_update = True
+
+    if needs_update:
+        _schedule_live_framing(scene)
+
+
+def _live_framing_tick():
+    """キャッシュ済みAABBを使ってEmpty位置とOrtho Scaleを反映"""
+
+    state = _live_framing_state
+    scene = bpy.data.scenes.get(state["scene"])
+    view_layer = bpy.context.view_layer
+    if scene is None or view_layer is None:
+        return None
+
+    props = scene.empty_camera_props
+    camera = props.camera_object
+    if (
+        not props.live_framing
+        or not props.empty_object
+        or not camera
+        or camera.type != 'CAMERA'
+        or camera.data.type != 'ORTHO'
+    ):
+        return None
+
+    selected_objects = [
+        obj for obj in view_layer.objects.selected
+        if obj.type in {'MESH', 'EMPTY'} and obj != props.empty_object
+    ]
+    mesh_objects = _collect_selected_meshes(selected_objects)
+
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    cache = state["bounds"]
+    dirty = state["dirty"]
+    live_bounds = {}
+    for obj in mesh_objects:
+        name = obj.name
+        if name in cache and name not in dirty:
+            live_bounds[name] = cache[name]
+        else:
+            live_bounds[name] = _object_world_bounds(obj.evaluated_get(depsgraph))
+    # 選択から外れたオブジェクトのキャッシュは破棄
+    state["bounds"] = live_bounds
+    dirty.clear()
+
+    center, max_dimension = _merge_bounds(live_bounds.values())
+    if center is None:
+        return None
+
+    # 値が変わらない場合は書き込まず、不要な再評価を避ける
+    if (props.empty_object.location - center).length > 1e-6:
+        props.empty_object.location = center
+    new_ortho_scale = max_dimension * props.scale_multiplier
+    if abs(camera.data.ortho_scale - new_ortho_scale) > 1e-6:
+        camera.data.ortho_scale = new_ortho_scale
+    return None
+
+
+def _enable_live_framing(scene):
+    _live_framing_state["bounds"] = {}
+    _live_framing_state["dirty"].clear()
+    handlers = bpy.app.handlers.depsgraph_update_post
+    if _live_framing_depsgraph_handler not in handlers:
+        handlers.append(_live_framing_depsgraph_handler)
+    _schedule_live_framing(scene)
+
+
+def _disable_live_framing():
+    handlers = bpy.app.handlers.depsgraph_update_post
+    if _live_framing_depsgraph_handler in handlers:
+        handlers.remove(_live_framing_depsgraph_handler)
+    if bpy.app.timers.is_registered(_live_framing_tick):
+        bpy.app.timers.unregister(_live_framing_tick)
+    _live_framing_state["bounds"] = {}
+    _live_framing_state["dirty"].clear()
 
 
 class EMPTY_CAMERA_OT_select_empty(bpy.types.Operator):
@@ -289,7 +1331,18 @@ class EMPTY_CAMERA_OT_batch_render(bpy.types.Operator):
             self.report({'ERROR'}, f"出力フォルダを作成できません: {exc}")
             return {'CANCELLED'}
 
-        depsgraph = context.evaluated_depsgraph_get()
+        try:
+            views = _prepare_render_views(props)
+            budget_tiers = (
+                _parse_budget_table(props.budget_table) if props.use_adaptive_budget else None
+            )
+        except ValueError as exc:
+            self.report({'ERROR'}, str(exc))
+            return {'CANCELLED'}
+
+        catalog = _load_render_catalog(props)
+        with yume_trace.span("depsgraph"):
+            depsgraph = context.evaluated_depsgraph_get()
         if props.include_children:
             collection_objects = set(props.target_collection.all_objects)
         else:
@@ -306,71 +1359,97 @@ class EMPTY_CAMERA_OT_batch_render(bpy.types.Operator):
             self.report({'ERROR'}, "コレクション内にオブジェクトがありません")
             return {'CANCELLED'}
 
-        original_hide_render = {obj: obj.hide_render for obj in collection_objects}
-
-        original_filepath = scene.render.filepath
-        original_selected_names = {obj.name for obj in context.selected_objects}
-        original_active = context.view_layer.objects.active
+        # 変更した項目だけを記録し、終了時 (例外時も含む) に戻す
+        snapshot = yume_state.Snapshot(context)
+        snapshot.save(scene.render, "filepath")
+        snapshot.save(props.empty_object, "rotation_euler")
+        if props.use_camera_rig:
+            # 視点間でジオメトリを再構築しないようレンダーデータを保持
+            snapshot.set(scene.render, "use_persistent_data", True)
+        shown_objects = None
+        framer = _Framer(context, props, snapshot, rig=props.use_camera_rig)
 
         processed = 0
         skipped = 0
+        profiler = _BatchProfiler(props.write_timing_report)
+        budget = _RenderBudget(scene, budget_tiers) if budget_tiers else None
+        pipeline = _make_render_pipeline(self, scene, props, snapshot)
 
         try:
+            profiler.start()
+            if pipeline is not None:
+                pipeline.start()
             for index, obj in enumerate(target_objects, start=1):
-                mesh_objects = _collect_mesh_objects(obj, props.include_children)
+                profiler.begin_item(obj.name)
+                with profiler.phase("bounds"):
+                    mesh_objects = _collect_mesh_objects(obj, props.include_children)
+                    if mesh_objects:
+                        center, max_dimension = _calculate_bounds(mesh_objects, depsgraph)
                 if not mesh_objects:
                     skipped += 1
+                    profiler.set_status("skipped")
                     self.report({'WARNING'}, f"{obj.name}: メッシュオブジェクトがありません")
                     continue
 
-                center, max_dimension = _calculate_bounds(mesh_objects, depsgraph)
                 if center is None or max_dimension is None:
                     skipped += 1
+                    profiler.set_status("skipped")
                     self.report({'WARNING'}, f"{obj.name}: バウンディングボックスを計算できませんでした")
                     continue
-
-                visible_objects = set(mesh_objects)
-                visible_objects.add(obj)
-                if props.include_children:
-                    visible_objects.update(obj.children_recursive)
-
-                for col_obj in collection_objects:
-                    col_obj.hide_render = col_obj not in visible_objects
-
-                props.empty_object.location = center
-                new_ortho_scale = max_dimension * props.scale_multiplier
-                props.camera_object.data.ortho_scale = new_ortho_scale
-
-                filename = _normalize_render_name(obj.name)
+                triangles = 0
+                if profiler.enabled or budget:
+                    triangles = _count_triangles(mesh_objects, depsgraph)
+                profiler.set_triangles(triangles)
+                if budget:
+                    budget.apply_for(triangles, mesh_objects, max_dimension)
+
+                with profiler.phase("isolation"):
+                    visible_objects = set(mesh_objects)
+                    visible_objects.add(obj)
+                    if props.include_children:
+                        visible_objects.update(obj.children_recursive)
+
+                    with yume_trace.span("visibility", item=obj.name):
+                        shown_objects = _isolate_for_render(
+                            snapshot, collection_objects, visible_objects, shown_objects
+                        )
+
+                    framer.frame(mesh_objects, depsgraph, center, max_dimension)
+
+                filename = _catalog_render_name(
+                    catalog, _render_base_name(obj.name), _normalize_render_name(obj.name)
+                )
                 render_path = os.path.join(output_dir, filename)
-                scene.render.filepath = render_path
 
                 self.report({'INFO'}, f"({index}/{len(target_objects)}) {obj.name}: レンダリング開始")
-                try:
-                    bpy.ops.render.render(write_still=True)
-                except RuntimeError as exc:
+                if not _render_views(
+                    self, scene, props, obj.name, render_path, views, profiler, pipeline, framer
+                ):
                     skipped += 1
-                    self.report({'ERROR'}, f"{obj.name}: レンダリングに失敗しました - {exc}")
+                    profiler.set_status("failed")
                     continue
 
                 processed += 1
+
+            if pipeline is not None:
+                write_failed = len(pipeline.finish(self))
+                processed -= write_failed
+                skipped += write_failed
         except Exception as exc:  # 想定外のエラー
             self.report({'ERROR'}, f"処理中にエラーが発生しました: {exc}")
             return {'CANCELLED'}
         finally:
-            scene.render.filepath = original_filepath
-            for obj in context.view_layer.objects:
-                obj.select_set(obj.name in original_selected_names)
-            if original_active and original_active.name in context.view_layer.objects:
-                restored_object = context.view_layer.objects[original_active.name]
-                context.view_layer.objects.active = restored_object
-            else:
-                context.view_layer.objects.active = None
-
-            for obj, hide_state in original_hide_render.items():
-                obj.hide_render = hide_state
+            if pipeline is not None:
+                pipeline.close()
+            profiler.stop()
+            if budget:
+                budget.restore()
+            snapshot.restore()
 
         self.report({'INFO'}, f"レンダリング完了: {processed}件処理, {skipped}件スキップ")
+        if profiler.enabled:
+            _report_timing(self, profiler, output_dir)
+        yume_trace.flush_and_report(self)
         return {'FINISHED'}
 
 
@@ -416,81 +1495,119 @@ class EMPTY_CAMERA_OT_render_selected(bpy.types.Operator):
             self.report({'ERROR'}, f"出力フォルダを作成できません: {exc}")
             return {'CANCELLED'}
 
-        depsgraph = context.evaluated_depsgraph_get()
+        try:
+            views = _prepare_render_views(props)
+            budget_tiers = (
+                _parse_budget_table(props.budget_table) if props.use_adaptive_budget else None
+            )
+        except ValueError as exc:
+            self.report({'ERROR'}, str(exc))
+            return {'CANCELLED'}
+
+        catalog = _load_render_catalog(props)
+        with yume_trace.span("depsgraph"):
+            depsgraph = context.evaluated_depsgraph_get()
         if props.include_children:
             collection_objects = set(props.target_collection.all_objects)
         else:
             collection_objects = set(props.target_collection.objects)
-        original_hide_render = {obj: obj.hide_render for obj in collection_objects}
-        original_filepath = scene.render.filepath
-        original_selected_names = {obj.name for obj in context.selected_objects}
-        original_active = context.view_layer.objects.active
+        # 変更した項目だけを記録し、終了時 (例外時も含む) に戻す
+        snapshot = yume_state.Snapshot(context)
+        snapshot.save(scene.render, "filepath")
+        snapshot.save(props.empty_object, "rotation_euler")
+        if props.use_camera_rig:
+            # 視点間でジオメトリを再構築しないようレンダーデータを保持
+            snapshot.set(scene.render, "use_persistent_data", True)
+        shown_objects = None
+        framer = _Framer(context, props, snapshot, rig=props.use_camera_rig)
 
         processed = 0
         skipped = 0
+        profiler = _BatchProfiler(props.write_timing_report)
+        budget = _RenderBudget(scene, budget_tiers) if budget_tiers else None
+        pipeline = _make_render_pipeline(self, scene, props, snapshot)
 
         try:
+            profiler.start()
+            if pipeline is not None:
+                pipeline.start()
             for index, obj in enumerate(selected_objects, start=1):
+                profiler.begin_item(obj.name)
                 include_children = props.include_children or obj.type == 'EMPTY'
-                mesh_objects = _collect_mesh_objects(obj, include_children)
+                with profiler.phase("bounds"):
+                    mesh_objects = _collect_mesh_objects(obj, include_children)
+                    if mesh_objects:
+                        center, max_dimension = _calculate_bounds(mesh_objects, depsgraph)
                 if not mesh_objects:
                     skipped += 1
+                    profiler.set_status("skipped")
                     self.report({'WARNING'}, f"{obj.name}: メッシュオブジェクトがありません")
                     continue
 
-                center, max_dimension = _calculate_bounds(mesh_objects, depsgraph)
                 if center is None or max_dimension is None:
                     skipped += 1
+                    profiler.set_status("skipped")
                     self.report({'WARNING'}, f"{obj.name}: バウンディングボックスを計算できませんでした")
                     continue
-
-                visible_objects = set(mesh_objects)
-                visible_objects.add(obj)
-                if include_children:
-                    visible_objects.update(obj.children_recursive)
-
-                for col_obj in collection_objects:
-                    col_obj.hide_render = col_obj not in visible_objects
-
-                props.empty_object.location = center
-                new_ortho_scale = max_dimension * props.scale_multiplier
-                props.camera_object.data.ortho_scale = new_ortho_scale
+                triangles = 0
+                if profiler.enabled or budget:
+                    triangles = _count_triangles(mesh_objects, depsgraph)
+                profiler.set_triangles(triangles)
+                if budget:
+                    budget.apply_for(triangles, mesh_objects, max_dimension)
+
+                with profiler.phase("isolation"):
+                    visible_objects = set(mesh_objects)
+                    visible_objects.add(obj)
+                    if include_children:
+                        visible_objects.update(obj.children_recursive)
+
+                    with yume_trace.span("visibility", item=obj.name):
+                        shown_objects = _isolate_for_render(
+                            snapshot, collection_objects, visible_objects, shown_objects
+                        )
+
+                    framer.frame(mesh_objects, depsgraph, center, max_dimension)
 
                 base_name = obj.name
                 if "." in base_name:
                     name_head, name_tail = base_name.rsplit(".", 1)
                     if name_tail.isdigit() and len(name_tail) == 3:
                         base_name = name_head
-                filename = base_name.replace("_model", "_image")
+                filename = _catalog_render_name(
+                    catalog, base_name, base_name.replace("_model", "_image")
+                )
                 render_path = os.path.join(output_dir, filename)
-                scene.render.filepath = render_path
 
                 self.report({'INFO'}, f"({index}/{len(selected_objects)}) {obj.name}: レンダリング開始")
-                try:
-                    bpy.ops.render.render(write_still=True)
-                except RuntimeError as exc:
+                if not _render_views(
+                    self, scene, props, obj.name, render_path, views, profiler, pipeline, framer
+                ):
                     skipped += 1
-                    self.report({'ERROR'}, f"{obj.name}: レンダリングに失敗しました - {exc}")
+                    profiler.set_status("failed")
                     continue
 
                 processed += 1
+
+            if pipeline is not None:
+                write_failed = len(pipeline.finish(self))
+                processed -= write_failed
+                skipped += write_failed
         except Exception as exc:
             self.report({'ERROR'}, f"処理中にエラーが発生しました: {exc}")
             return {'CANCELLED'}
         finally:
-            scene.render.filepath = original_filepath
-            for view_obj in context.view_layer.objects:
-                view_obj.select_set(view_obj.name in original_selected_names)
-            if original_active and original_active.name in context.view_layer.objects:
-                restored_object = context.view_layer.objects[original_active.name]
-                context.view_layer.objects.active = restored_object
-            else:
-                context.view_layer.objects.active = None
-
-            for col_obj, hide_state in original_hide_render.items():
-                col_obj.hide_render = hide_state
+            if pipeline is not None:
+                pipeline.close()
+            profiler.stop()
+            if budget:
+                budget.restore()
+            snapshot.restore()
 
         self.report({'INFO'}, f"レンダリング完了: {processed}件処理, {skipped}件スキップ")
+        if profiler.enabled:
+            _report_timing(self, profiler, output_dir)
+        yume_trace.flush_and_report(self)
         return {'FINISHED'}
 
 
@@ -524,12 +1641,30 @@ class EMPTY_CAMERA_PT_main(bpy.types.Panel):
 
         # Multiplier
         box.prop(props, "scale_multiplier", text="Multiplier")
+        box.prop(props, "framing_mode")
+        if props.framing_mode == 'CAMERA':
+            box.prop(props, "framing_points")
+            box.prop(props, "adapt_render_aspect")
 
         batch_box = layout.box()
         batch_box.label(text="Batch Render", icon='RENDER_STILL')
         batch_box.prop(props, "target_collection")
         batch_box.prop(props, "include_children")
         batch_box.prop(props, "output_directory")
+        batch_box.prop(props, "catalog_path")
+        batch_box.prop(props, "write_timing_report")
+        batch_box.prop(props, "use_adaptive_budget")
+        if props.use_adaptive_budget:
+            batch_box.prop(props, "budget_table")
+        batch_box.prop(props, "use_camera_rig")
+        if props.use_camera_rig:
+            batch_box.prop(props, "rig_views")
+        batch_box.prop(props, "use_render_pipeline")
+        if props.use_render_pipeline:
+            row = batch_box.row(align=True)
+            row.prop(props, "pipeline_workers", text="スレッド")
+            row.prop(props, "pipeline_queue", text="上限")
+            batch_box.prop(props, "optimize_png")
         batch_box.label(text="※レンダリング時は対象外オブジェクトを非表示にします")
         batch_box.operator("empty_camera.batch_render", icon='RENDER_STILL')
         batch_box.operator("empty_camera.render_selected", text="Render Selected", icon='RENDER_STILL')
@@ -537,6 +1672,9 @@ class EMPTY_CAMERA_PT_main(bpy.types.Panel):
         # 実行ボタン
         move_box = layout.box()
         move_box.operator("empty_camera.move_and_adjust", icon='EMPTY_ARROWS')
+        row = move_box.row(align=True)
+        row.prop(props, "live_framing", toggle=True, icon='REC')
+        row.prop(props, "live_interval", text="間隔")
 
         # 使い方の説明
         box = layout.box()
@@ -565,9 +1703,12 @@ def register():
     for cls in classes:
         bpy.utils.register_class(cls)
     bpy.types.Scene.empty_camera_props = bpy.props.PointerProperty(type=EmptyCameraProperties)
+    yume_geometry_cache.install()
 
 
 def unregister():
+    yume_geometry_cache.uninstall()
+    _disable_live_framing()
     del bpy.types.Scene.empty_camera_props
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
@@ -575,3 +1716,7 @@ def unregister():
 
 if __name__ == "__main__":
     register()
+    # blender -b file.blend --python <このファイル> -- --job job.json でヘッドレス実行
+    if "--" in sys.argv:
+        import yume_cli
+        sys.exit(yume_cli.main())
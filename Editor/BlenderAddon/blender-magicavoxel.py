@@ -10,11 +10,25 @@ bl_info = {
 
 import bpy
 import bmesh
+import numpy as np
 import struct
 import os
+import sys
 from mathutils import Vector
 from collections import defaultdict
 
+# 同じフォルダの共有モジュール (yume_*.py) を読み込めるようにする
+_ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+if _ADDON_DIR not in sys.path:
+    sys.path.append(_ADDON_DIR)
+import yume_budget  # noqa: E402
+import yume_catalog  # noqa: E402
+import yume_geometry_cache  # noqa: E402
+import yume_palette  # noqa: E402
+import yume_trace  # noqa: E402
+import yume_vox_parallel  # noqa: E402
+import yume_voxel_mesh  # noqa: E402
+
 def write_chunk(f, chunk_id, content):
     """VOXファイルのチャンクを書き込む"""
     f.write(chunk_id.encode('ascii'))
@@ -107,89 +121,116 @@ def rgb_to_palette_index(r, g, b, palette):
             closest_idx = idx
     return closest_idx
 
+def _material_colors(obj):
+    """ボクセルの色に使うマテリアルの基本色 (キャッシュのキー用)"""
+    colors = []
+    for mat in obj.data.materials:
+        bsdf = mat.node_tree.nodes.get("Principled BSDF") if mat and mat.use_nodes else None
+        colors.append(tuple(bsdf.inputs['Base Color'].default_value) if bsdf else None)
+    return tuple(colors)
+
 def analyze_voxel_mesh(obj, voxel_size):
-    """メッシュからボクセル情報を抽出"""
+    """メッシュからボクセル情報を抽出
+
+    形状・位置・マテリアル色が前回と同じなら、キャッシュ済みの結果を返す (変更しないこと)。
+    """
     if voxel_size <= 0:
         return {}
+    with yume_trace.span("depsgraph"):
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+    key = ("vox.voxels", voxel_size, _material_colors(obj))
+    return yume_geometry_cache.get(
+        obj, depsgraph, key,
+        lambda obj, depsgraph: _voxelize(obj, depsgraph, voxel_size),
+        world=True,
+    )
+
+def _voxelize(obj, depsgraph, voxel_size):
+    """評価済みメッシュの面の中心をボクセル座標に丸めて {座標: 色} を作る"""
     # メッシュデータを取得
-    depsgraph = bpy.context.evaluated_depsgraph_get()
     eval_obj = obj.evaluated_get(depsgraph)
-    mesh = eval_obj.to_mesh()
+    with yume_trace.span("to_mesh", object=obj.name):
+        mesh = eval_obj.to_mesh()
 
     # ワールド座標に変換
     mesh.transform(obj.matrix_world)
 
     # 立方体の中心位置を特定
     bm = bmesh.new()
-    bm.from_mesh(mesh)
-    bm.verts.ensure_lookup_table()
+    with yume_trace.span("bmesh.build", object=obj.name):
+        bm.from_mesh(mesh)
+        bm.verts.ensure_lookup_table()
 
     voxels = {}
     palette = {}
 
     # 面ごとに処理
-    for face in bm.faces:
-        # 面の中心を計算
-        center = face.calc_center_median()
-
-        # 色情報を取得
-        if len(mesh.vertex_colors) > 0:
-            color_layer = mesh.vertex_colors[0]
-            # 面の最初のループから色を取得
-            loop_idx = face.loops[0].index
-            color = color_layer.data[loop_idx].color
-            r = int(color[0] * 255)
-            g = int(color[1] * 255)
-            b = int(color[2] * 255)
-        elif len(mesh.materials) > 0 and face.material_index < len(mesh.materials):
-            mat = mesh.materials[face.material_index]
-            if mat and mat.use_nodes:
-                # プリンシプルBSDFノードから色を取得
-                bsdf = mat.node_tree.nodes.get("Principled BSDF")
-                if bsdf:
-                    base_color = bsdf.inputs['Base Color'].default_value
-                    r = int(base_color[0] * 255)
-                    g = int(base_color[1] * 255)
-                    b = int(base_color[2] * 255)
+    with yume_trace.span("vox.voxelize", faces=len(bm.faces)):
+        for face in bm.faces:
+            # 面の中心を計算
+            center = face.calc_center_median()
+
+            # 色情報を取得
+            if len(mesh.vertex_colors) > 0:
+                color_layer = mesh.vertex_colors[0]
+                # 面の最初のループから色を取得
+                loop_idx = face.loops[0].index
+                color = color_layer.data[loop_idx].color
+                r = int(color[0] * 255)
+                g = int(color[1] * 255)
+                b = int(color[2] * 255)
+            elif len(mesh.materials) > 0 and face.material_index < len(mesh.materials):
+                mat = mesh.materials[face.material_index]
+                if mat and mat.use_nodes:
+                    # プリンシプルBSDFノードから色を取得
+                    bsdf = mat.node_tree.nodes.get("Principled BSDF")
+                    if bsdf:
+                        base_color = bsdf.inputs['Base Color'].default_value
+                        r = int(base_color[0] * 255)
+                        g = int(base_color[1] * 255)
+                        b = int(base_color[2] * 255)
+                    else:
+                        r, g, b = 255, 255, 255
                 else:
                     r, g, b = 255, 255, 255
             else:
                 r, g, b = 255, 255, 255
-        else:
-            r, g, b = 255, 255, 255
-
-        # ボクセル位置を整数座標に丸める
-        inv_size = 1.0 / voxel_size
-        vox_pos = (
-            round(center.x * inv_size),
-            round(center.y * inv_size),
-            round(center.z * inv_size),
-        )
-        voxels[vox_pos] = (r, g, b)
+
+            # ボクセル位置を整数座標に丸める
+            inv_size = 1.0 / voxel_size
+            vox_pos = (
+                round(center.x * inv_size),
+                round(center.y * inv_size),
+                round(center.z * inv_size),
+            )
+            voxels[vox_pos] = (r, g, b)
 
     bm.free()
     eval_obj.to_mesh_clear()
 
     return voxels
 
-def export_vox(filepath, obj, voxel_size):
-    """VOX形式でエクスポート"""
-    # ボクセル情報を抽出
-    voxels = analyze_voxel_mesh(obj, voxel_size)
-
-    if not voxels:
-        if voxel_size <= 0:
-            return {'CANCELLED'}, "Voxel size must be greater than 0"
-        return {'CANCELLED'}, "No voxels found in mesh"
-
+def _serialize_models(chunk_data):
+    """タイルごとの (SIZEの内容, XYZIの内容) を作る"""
+    models = []
+    for chunk in chunk_data:
+        size_chunk_x, size_chunk_y, size_chunk_z = chunk["size"]
+        size_content = struct.pack('<III', size_chunk_x, size_chunk_y, size_chunk_z)
+
+        voxel_data = chunk["voxels"]
+        xyzi_content = struct.pack('<I', len(voxel_data))
+        for x, y, z, color_idx in voxel_data:
+            xyzi_content += struct.pack('BBBB', x, y, z, color_idx)
+        models.append((size_content, xyzi_content))
+    return models
+
+def _build_models(voxels):
+    """ボクセルを256ごとのタイルに分割し、(palette, モデルの内容, オフセット) を返す"""
     # 座標の範囲を計算
     positions = list(voxels.keys())
     min_x = min(p[0] for p in positions)
     min_y = min(p[1] for p in positions)
     min_z = min(p[2] for p in positions)
-    max_x = max(p[0] for p in positions)
-    max_y = max(p[1] for p in positions)
-    max_z = max(p[2] for p in positions)
 
     # ボクセルを256ごとに分割
     chunk_voxels = defaultdict(list)
@@ -210,87 +251,262 @@ def export_vox(filepath, obj, voxel_size):
     chunk_data = []
     model_offsets = []
     chunk_keys = sorted(chunk_voxels.keys())
-    for chunk_key in chunk_keys:
-        vox_list = chunk_voxels[chunk_key]
-        max_local_x = max(v[0] for v in vox_list)
-        max_local_y = max(v[1] for v in vox_list)
-        max_local_z = max(v[2] for v in vox_list)
-        size_chunk_x = max_local_x + 1
-        size_chunk_y = max_local_y + 1
-        size_chunk_z = max_local_z + 1
-
-        voxel_data = []
-        for local_x, local_y, local_z, color in vox_list:
-            color_idx = rgb_to_palette_index(color[0], color[1], color[2], palette)
-            voxel_data.append((local_x, local_y, local_z, color_idx))
-
-        chunk_data.append({
-            "size": (size_chunk_x, size_chunk_y, size_chunk_z),
-            "voxels": voxel_data,
-        })
-
-        origin_x = min_x + chunk_key[0] * 256
-        origin_y = min_y + chunk_key[1] * 256
-        origin_z = min_z + chunk_key[2] * 256
-        model_offsets.append((origin_x - min_x, origin_y - min_y, origin_z - min_z))
-
-    # ファイルに書き込み
-    with open(filepath, 'wb') as f:
-        # ヘッダー
-        f.write(b'VOX ')
-        f.write(struct.pack('<I', 150))  # version
-
-        # MAINチャンク(空)
-        f.write(b'MAIN')
-
-        # チャンク一覧を構築
-        chunks = []
-        if len(chunk_data) > 1:
-            pack_content = struct.pack('<I', len(chunk_data))
-            chunks.append(('PACK', pack_content))
-
-        for chunk in chunk_data:
-            size_chunk_x, size_chunk_y, size_chunk_z = chunk["size"]
-            size_content = struct.pack('<III', size_chunk_x, size_chunk_y, size_chunk_z)
-            chunks.append(('SIZE', size_content))
-
-            voxel_data = chunk["voxels"]
-            xyzi_content = struct.pack('<I', len(voxel_data))
-            for x, y, z, color_idx in voxel_data:
-                xyzi_content += struct.pack('BBBB', x, y, z, color_idx)
-            chunks.append(('XYZI', xyzi_content))
-
-        # RGBAチャンク(パレット)
-        rgba_content = b''
-
-        # パレットを256色分用意
-        palette_list = [None] * 256
-        for color, idx in palette.items():
-            palette_list[idx - 1] = color
-
-        for i in range(256):
-            if palette_list[i] is not None:
-                r, g, b = palette_list[i]
-                rgba_content += struct.pack('BBBB', r, g, b, 255)
-            else:
-                # 未使用色はグレー
-                rgba_content += struct.pack('BBBB', 128, 128, 128, 255)
-
-        chunks.append(('RGBA', rgba_content))
+    with yume_trace.span("vox.palette", chunks=len(chunk_keys)):
+        for chunk_key in chunk_keys:
+            vox_list = chunk_voxels[chunk_key]
+            max_local_x = max(v[0] for v in vox_list)
+            max_local_y = max(v[1] for v in vox_list)
+            max_local_z = max(v[2] for v in vox_list)
+            size_chunk_x = max_local_x + 1
+            size_chunk_y = max_local_y + 1
+            size_chunk_z = max_local_z + 1
+
+            voxel_data = []
+            for local_x, local_y, local_z, color in vox_list:
+                color_idx = rgb_to_palette_index(color[0], color[1], color[2], palette)
+                voxel_data.append((local_x, local_y, local_z, color_idx))
+
+            chunk_data.append({
+                "size": (size_chunk_x, size_chunk_y, size_chunk_z),
+                "voxels": voxel_data,
+            })
+
+            origin_x = min_x + chunk_key[0] * 256
+            origin_y = min_y + chunk_key[1] * 256
+            origin_z = min_z + chunk_key[2] * 256
+            model_offsets.append((origin_x - min_x, origin_y - min_y, origin_z - min_z))
+
+    return palette, _serialize_models(chunk_data), model_offsets
+
+def export_vox(filepath, obj, voxel_size, budget_report=None, parallel_workers=0, project_palette=None):
+    """VOX形式でエクスポート
+
+    parallel_workers を指定すると、タイルの処理を numpy でまとめて行い、2以上なら
+    その数のプロセスで並列に行う (出力は同じ)。
+    project_palette (yume_palette.ProjectPalette) を指定すると、出現順にパレットを
+    作らずに共通パレットの番号へ対応付け、RGBAチャンクにも共通パレットを書く。
+    """
+    # ボクセル情報を抽出
+    voxels = analyze_voxel_mesh(obj, voxel_size)
 
-        # シーングラフチャンク
-        scene_chunks = build_scene_graph_chunks(len(chunk_data), model_offsets)
-        chunks.extend(scene_chunks)
+    if not voxels:
+        if voxel_size <= 0:
+            return {'CANCELLED'}, "Voxel size must be greater than 0"
+        return {'CANCELLED'}, "No voxels found in mesh"
 
-        children_size = sum(12 + len(content) for _, content in chunks)
+    # 予算チェック (ファイル名をItem.csvの3DModelとして照合)
+    if budget_report is not None:
+        stats = yume_budget.collect_mesh_stats([obj], bpy.context.evaluated_depsgraph_get())
+        stats["voxels"] = len(voxels)
+        name = os.path.splitext(os.path.basename(filepath))[0]
+        if not budget_report.evaluate(name, stats):
+            return {'CANCELLED'}, f"Over budget: {budget_report.rows[-1]['violations']}"
+
+    parallel_used = False
+    if project_palette is not None:
+        # 色の種類ごとに表を引くだけなので、numpy のタイル処理を使う
+        palette, models, model_offsets, parallel_used = yume_vox_parallel.build_models(
+            voxels, project_palette.palette_index, max(1, parallel_workers)
+        )
+    elif parallel_workers > 0:
+        palette, models, model_offsets, parallel_used = yume_vox_parallel.build_models(
+            voxels, rgb_to_palette_index, parallel_workers
+        )
+    else:
+        palette, models, model_offsets = _build_models(voxels)
 
-        f.write(struct.pack('<I', 0))  # content size
-        f.write(struct.pack('<I', children_size))
+    # ファイルに書き込み
+    with yume_trace.span("vox.write", file=os.path.basename(filepath)):
+        with open(filepath, 'wb') as f:
+            # ヘッダー
+            f.write(b'VOX ')
+            f.write(struct.pack('<I', 150))  # version
+
+            # MAINチャンク(空)
+            f.write(b'MAIN')
+
+            # チャンク一覧を構築
+            chunks = []
+            if len(models) > 1:
+                pack_content = struct.pack('<I', len(models))
+                chunks.append(('PACK', pack_content))
+
+            for size_content, xyzi_content in models:
+                chunks.append(('SIZE', size_content))
+                chunks.append(('XYZI', xyzi_content))
+
+            # RGBAチャンク(パレット)
+            rgba_content = b''
+
+            # パレットを256色分用意
+            if project_palette is not None:
+                palette_list = project_palette.rgba_colors()
+            else:
+                palette_list = [None] * 256
+                for color, idx in palette.items():
+                    palette_list[idx - 1] = color
+
+            for i in range(256):
+                if palette_list[i] is not None:
+                    r, g, b = palette_list[i]
+                    rgba_content += struct.pack('BBBB', r, g, b, 255)
+                else:
+                    # 未使用色はグレー
+                    rgba_content += struct.pack('BBBB', 128, 128, 128, 255)
+
+            chunks.append(('RGBA', rgba_content))
+
+            # シーングラフチャンク
+            scene_chunks = build_scene_graph_chunks(len(models), model_offsets)
+            chunks.extend(scene_chunks)
+
+            children_size = sum(12 + len(content) for _, content in chunks)
+
+            f.write(struct.pack('<I', 0))  # content size
+            f.write(struct.pack('<I', children_size))
+
+            for chunk_id, content in chunks:
+                write_chunk(f, chunk_id, content)
+
+    message = f"Exported {len(voxels)} voxels in {len(models)} model(s)"
+    if parallel_used:
+        message += f" using {parallel_workers} processes"
+    return {'FINISHED'}, message
+
+def _read_vox_dict(data, offset):
+    """VOXの辞書データを読み込み、(辞書, 次の位置) を返す"""
+    count, = struct.unpack_from('<I', data, offset)
+    offset += 4
+    result = {}
+    for _ in range(count):
+        values = []
+        for _ in range(2):
+            length, = struct.unpack_from('<I', data, offset)
+            offset += 4
+            values.append(data[offset:offset + length].decode('utf-8'))
+            offset += length
+        result[values[0]] = values[1]
+    return result, offset
+
+def _read_scene_node(chunk_id, content):
+    """nTRN/nGRP/nSHP の内容を (ノードID, 種類, 子ID一覧, 平行移動) にする"""
+    node_id, = struct.unpack_from('<I', content, 0)
+    _, offset = _read_vox_dict(content, 4)
+    if chunk_id == b'nTRN':
+        child_id, _, _, frame_count = struct.unpack_from('<iiiI', content, offset)
+        offset += 16
+        translation = (0, 0, 0)
+        if frame_count:
+            frame, offset = _read_vox_dict(content, offset)
+            if "_t" in frame:
+                translation = tuple(int(value) for value in frame["_t"].split())
+        return node_id, 'TRN', [child_id], translation
+    count, = struct.unpack_from('<I', content, offset)
+    offset += 4
+    if chunk_id == b'nGRP':
+        return node_id, 'GRP', list(struct.unpack_from(f'<{count}I', content, offset)), None
+    model_ids = []
+    for _ in range(count):
+        model_id, = struct.unpack_from('<I', content, offset)
+        _, offset = _read_vox_dict(content, offset + 4)
+        model_ids.append(model_id)
+    return node_id, 'SHP', model_ids, None
+
+def _model_offsets(nodes, model_count):
+    """シーングラフをたどってモデルごとのオフセットを求める (シーングラフがなければ原点)"""
+    offsets = [(0, 0, 0)] * model_count
+    if 0 not in nodes:
+        return offsets
+    stack = [(0, (0, 0, 0))]
+    while stack:
+        node_id, offset = stack.pop()
+        node = nodes.get(node_id)
+        if node is None:
+            continue
+        kind, children, translation = node
+        if kind == 'TRN':
+            offset = tuple(a + b for a, b in zip(offset, translation))
+        if kind == 'SHP':
+            for model_id in children:
+                if model_id < model_count:
+                    offsets[model_id] = offset
+        else:
+            stack.extend((child_id, offset) for child_id in children)
+    return offsets
+
+def read_vox(filepath):
+    """VOXファイルを読み込み {座標: (r, g, b)} を返す
+
+    シーングラフの平行移動 (_t) は export_vox と同じくモデルの原点のオフセットとして扱う。
+    """
+    with open(filepath, 'rb') as f:
+        data = f.read()
+    if data[:4] != b'VOX ' or data[8:12] != b'MAIN':
+        raise ValueError("Not a MagicaVoxel file")
+
+    models = []
+    palette = None
+    nodes = {}
+    offset = 20
+    while offset + 12 <= len(data):
+        chunk_id = data[offset:offset + 4]
+        content_size, = struct.unpack_from('<I', data, offset + 4)
+        content = data[offset + 12:offset + 12 + content_size]
+        # 子チャンクは内容の直後に続くので、同じ階層として順に読む
+        offset += 12 + content_size
+        if chunk_id == b'XYZI':
+            count, = struct.unpack_from('<I', content, 0)
+            models.append(content[4:4 + count * 4])
+        elif chunk_id == b'RGBA':
+            palette = [tuple(content[i * 4:i * 4 + 3]) for i in range(256)]
+        elif chunk_id in (b'nTRN', b'nGRP', b'nSHP'):
+            node_id, kind, children, translation = _read_scene_node(chunk_id, content)
+            nodes[node_id] = (kind, children, translation)
+
+    if palette is None:
+        # 既定パレットは持っていないのでグレーで読む
+        palette = [(128, 128, 128)] * 256
 
-        for chunk_id, content in chunks:
-            write_chunk(f, chunk_id, content)
+    voxels = {}
+    for model, (ox, oy, oz) in zip(models, _model_offsets(nodes, len(models))):
+        for index in range(0, len(model), 4):
+            x, y, z, color_idx = model[index:index + 4]
+            voxels[(x + ox, y + oy, z + oz)] = palette[(color_idx - 1) % 256]
+    return voxels
 
-    return {'FINISHED'}, f"Exported {len(voxels)} voxels in {len(chunk_data)} model(s)"
+def build_greedy_mesh(name, voxels, voxel_size):
+    """ボクセルを貪欲法で統合したメッシュを作り、(メッシュ, 統合前の面の数) を返す
+
+    パレットの色は頂点カラー (Col) に入れる。
+    """
+    with yume_trace.span("vox.greedy", voxels=len(voxels)):
+        positions, quads, colors, face_count = yume_voxel_mesh.greedy_mesh(voxels)
+
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(positions))
+    mesh.vertices.foreach_set("co", (positions * voxel_size).astype('f4').ravel())
+    mesh.loops.add(quads.size)
+    mesh.loops.foreach_set("vertex_index", quads.astype('i4').ravel())
+    mesh.polygons.add(len(quads))
+    mesh.polygons.foreach_set("loop_start", np.arange(0, quads.size, 4, dtype='i4'))
+    if bpy.app.version < (4, 0, 0):
+        mesh.polygons.foreach_set("loop_total", np.full(len(quads), 4, dtype='i4'))
+
+    # 四角形の色を4つのループに展開 (0-1, アルファ1)
+    loop_colors = np.ones((len(quads), 4, 4), dtype='f4')
+    loop_colors[:, :, :3] = (colors / 255.0)[:, None, :]
+    if hasattr(mesh, "color_attributes"):
+        layer = mesh.color_attributes.new("Col", 'BYTE_COLOR', 'CORNER')
+        # 読み込み側 (_voxelize) と同じくバイト値をそのまま入れる
+        attribute = "color_srgb" if "color_srgb" in layer.data[0].bl_rna.properties else "color"
+    else:
+        layer = mesh.vertex_colors.new(name="Col")
+        attribute = "color"
+    layer.data.foreach_set(attribute, loop_colors.ravel())
+
+    mesh.update()
+    mesh.validate()
+    return mesh, face_count
 
 class EXPORT_OT_vox(bpy.types.Operator):
     """Export voxelized mesh to MagicaVoxel .vox format"""
@@ -308,6 +524,52 @@ class EXPORT_OT_vox(bpy.types.Operator):
         soft_max=10.0,
     )
 
+    use_budget_check: bpy.props.BoolProperty(
+        name="Check Budget",
+        description="出力前にボクセル数・三角形数などを見積もり、カテゴリ別の予算と照合します",
+        default=False,
+    )
+    budget_csv_path: bpy.props.StringProperty(
+        name="Category CSV",
+        description="Category列を引くCSV (Item.csv)",
+        subtype='FILE_PATH',
+    )
+    budget_table: bpy.props.StringProperty(
+        name="Budget Table",
+        description=(
+            "カテゴリ:三角形:頂点:マテリアル:テクスチャMB:ボクセル をカンマ区切りで指定します "
+            "(* は上限なし、カテゴリ * は既定値)"
+        ),
+        default="*:*:*:*:*:65536",
+    )
+    block_over_budget: bpy.props.BoolProperty(
+        name="Block Over Budget",
+        description="予算を超えた場合は出力を中止します (オフの場合は警告のみ)",
+        default=False,
+    )
+
+    use_parallel_tiles: bpy.props.BoolProperty(
+        name="Parallel Tiles",
+        description="256ボクセルごとのタイルのパレット適用と書き出しを複数プロセスで並列に行います (大きなモデル向け)",
+        default=False,
+    )
+    worker_count: bpy.props.IntProperty(
+        name="Workers",
+        description="並列処理のプロセス数 (0 = CPUコア数に応じて自動)",
+        default=0,
+        min=0,
+        max=64,
+    )
+
+    palette_path: bpy.props.StringProperty(
+        name="Project Palette",
+        description=(
+            "全アセットで共通のパレット (.vox または1行1色の16進数)。"
+            "色→番号の表はパレットの隣にキャッシュされます (空の場合はアセットごとに出現順で作成)"
+        ),
+        subtype='FILE_PATH',
+    )
+
     filter_glob: bpy.props.StringProperty(
         default="*.vox",
         options={'HIDDEN'},
@@ -321,13 +583,49 @@ class EXPORT_OT_vox(bpy.types.Operator):
             self.report({'ERROR'}, "No active mesh object selected")
             return {'CANCELLED'}
 
-        result, message = export_vox(self.filepath, obj, self.voxel_size)
+        budget_report = None
+        if self.use_budget_check:
+            try:
+                budgets = yume_budget.parse_budget_table(self.budget_table)
+            except ValueError as exc:
+                self.report({'ERROR'}, str(exc))
+                return {'CANCELLED'}
+            catalog = None
+            if self.budget_csv_path:
+                catalog = yume_catalog.load_catalog(bpy.path.abspath(self.budget_csv_path))
+            budget_report = yume_budget.BudgetReport(budgets, catalog, self.block_over_budget)
+
+        project_palette = None
+        if self.palette_path:
+            try:
+                project_palette = yume_palette.load_palette(bpy.path.abspath(self.palette_path))
+            except (OSError, ValueError) as exc:
+                self.report({'ERROR'}, f"Could not load palette: {exc}")
+                return {'CANCELLED'}
+
+        parallel_workers = 0
+        if self.use_parallel_tiles:
+            parallel_workers = self.worker_count or yume_vox_parallel.default_worker_count()
+        result, message = export_vox(
+            self.filepath, obj, self.voxel_size, budget_report, parallel_workers, project_palette
+        )
+
+        if budget_report is not None and budget_report.rows:
+            for row in budget_report.over_budget():
+                self.report({'WARNING'}, f"Over budget ({row['category']}): {row['violations']}")
+            try:
+                budget_report.write(os.path.dirname(os.path.abspath(self.filepath)), "vox_budget_report")
+            except OSError as exc:
+                self.report({'WARNING'}, f"Could not write budget report: {exc}")
 
         if result == {'FINISHED'}:
             self.report({'INFO'}, message)
         else:
             self.report({'ERROR'}, message)
 
+        # 計測が有効ならトレースを書き出す (YUME_TRACE 環境変数で有効化)
+        yume_trace.flush_and_report(self, "Trace written", "Could not write trace")
+
         return result
 
     def invoke(self, context, event):
@@ -337,16 +635,105 @@ class EXPORT_OT_vox(bpy.types.Operator):
         context.window_manager.fileselect_add(self)
         return {'RUNNING_MODAL'}
 
+class OBJECT_OT_vox_greedy_mesh(bpy.types.Operator):
+    """Build a greedy-meshed mesh with vertex colors from voxels"""
+    bl_idname = "object.vox_greedy_mesh"
+    bl_label = "Voxel Greedy Mesh"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    source: bpy.props.EnumProperty(
+        name="Source",
+        items=[
+            ('OBJECT', "Active Object", "アクティブなメッシュを Export VOX と同じ方法でボクセル化します"),
+            ('FILE', "VOX File", ".vox ファイルのボクセルを読み込みます"),
+        ],
+        default='OBJECT',
+    )
+    filepath: bpy.props.StringProperty(subtype="FILE_PATH")
+    voxel_size: bpy.props.FloatProperty(
+        name="Voxel Size (m)",
+        description="1 voxelあたりのサイズ(メートル)",
+        default=1.0,
+        min=0.0001,
+        soft_min=0.01,
+        soft_max=10.0,
+    )
+
+    filter_glob: bpy.props.StringProperty(
+        default="*.vox",
+        options={'HIDDEN'},
+    )
+
+    def execute(self, context):
+        if self.source == 'FILE':
+            try:
+                voxels = read_vox(bpy.path.abspath(self.filepath))
+            except (OSError, ValueError, struct.error) as exc:
+                self.report({'ERROR'}, f"Could not read VOX file: {exc}")
+                return {'CANCELLED'}
+            name = os.path.splitext(os.path.basename(self.filepath))[0]
+        else:
+            source_obj = context.active_object
+            if not source_obj or source_obj.type != 'MESH':
+                self.report({'ERROR'}, "No active mesh object selected")
+                return {'CANCELLED'}
+            voxels = analyze_voxel_mesh(source_obj, self.voxel_size)
+            name = f"{source_obj.name}_greedy"
+
+        if not voxels:
+            self.report({'ERROR'}, "No voxels found")
+            return {'CANCELLED'}
+
+        mesh, face_count = build_greedy_mesh(name, voxels, self.voxel_size)
+        obj = bpy.data.objects.new(name, mesh)
+        context.collection.objects.link(obj)
+        for selected in context.selected_objects:
+            selected.select_set(False)
+        obj.select_set(True)
+        context.view_layer.objects.active = obj
+
+        self.report(
+            {'INFO'},
+            f"Greedy mesh: {len(mesh.polygons)} quads from {face_count} voxel faces ({len(voxels)} voxels)",
+        )
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        if self.source == 'FILE':
+            context.window_manager.fileselect_add(self)
+            return {'RUNNING_MODAL'}
+        return self.execute(context)
+
 def menu_func_export(self, context):
     self.layout.operator(EXPORT_OT_vox.bl_idname, text="MagicaVoxel (.vox)")
 
+def menu_func_import(self, context):
+    op = self.layout.operator(OBJECT_OT_vox_greedy_mesh.bl_idname, text="MagicaVoxel (.vox) as Greedy Mesh")
+    op.source = 'FILE'
+
+def menu_func_object(self, context):
+    op = self.layout.operator(OBJECT_OT_vox_greedy_mesh.bl_idname, text="Voxel Greedy Mesh")
+    op.source = 'OBJECT'
+
 def register():
     bpy.utils.register_class(EXPORT_OT_vox)
+    bpy.utils.register_class(OBJECT_OT_vox_greedy_mesh)
     bpy.types.TOPBAR_MT_file_export.append(menu_func_export)
+    bpy.types.TOPBAR_MT_file_import.append(menu_func_import)
+    bpy.types.VIEW3D_MT_object.append(menu_func_object)
+    yume_geometry_cache.install()
 
 def unregister():
+    yume_geometry_cache.uninstall()
+    bpy.types.VIEW3D_MT_object.remove(menu_func_object)
+    bpy.types.TOPBAR_MT_file_import.remove(menu_func_import)
+    bpy.utils.unregister_class(OBJECT_OT_vox_greedy_mesh)
     bpy.utils.unregister_class(EXPORT_OT_vox)
     bpy.types.TOPBAR_MT_file_export.remove(menu_func_export)
 
 if __name__ == "__main__":
     register()
+    # blender -b file.blend --python <このファイル> -- --job job.json でヘッドレス実行
+    if "--" in sys.argv:
+        import yume_cli
+        sys.exit(yume_cli.main())
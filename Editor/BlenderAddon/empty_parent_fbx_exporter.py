@@ -8,13 +8,56 @@ bl_info = {
     "category": "Import-Export",
 }
 
+import contextlib
 import csv
+import hashlib
+import json
 import math
 import os
+import shutil
+import sys
+import tempfile
+import bmesh
 import bpy
+import numpy as np
+from mathutils import Matrix
 from bpy.props import StringProperty, PointerProperty
 from bpy.types import Operator, Panel, PropertyGroup
 
+# 同じフォルダの共有モジュール (yume_*.py) を読み込めるようにする
+_ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+if _ADDON_DIR not in sys.path:
+    sys.path.append(_ADDON_DIR)
+
+import yume_budget  # noqa: E402
+import yume_catalog  # noqa: E402
+import yume_geometry_cache  # noqa: E402
+import yume_glb  # noqa: E402
+import yume_jobs  # noqa: E402
+import yume_state  # noqa: E402
+import yume_trace  # noqa: E402
+import yume_watch  # noqa: E402
+
+# ヘッダーに列名がないCSVではF列をファイル名として扱う
+_CSV_FALLBACK_COLUMN = 5
+
+# export_scene.fbx に渡すオプション (差分出力のハッシュにも含める)
+_FBX_EXPORT_OPTIONS = {
+    "use_selection": True,
+    "apply_unit_scale": True,
+    "apply_scale_options": 'FBX_SCALE_ALL',
+    "object_types": {'EMPTY', 'MESH', 'ARMATURE', 'OTHER'},
+}
+
+# 出力形式ごとの拡張子と表示名
+_EXPORT_FORMATS = {
+    'FBX': (".fbx", "FBX"),
+    'GLB': (".glb", "GLB"),
+}
+
+# 差分出力で出力フォルダに保存するマニフェスト
+_MANIFEST_NAME = ".fbx_export_manifest.json"
+
 
 def _ensure_selection(context):
     selected = [obj for obj in context.selected_objects if obj.type != 'CAMERA']
@@ -23,27 +66,18 @@ def _ensure_selection(context):
     return selected, None
 
 
-def _load_csv_names(csv_path):
-    if not csv_path:
-        return []
-    filepath = bpy.path.abspath(csv_path)
-    if not os.path.exists(filepath):
-        return []
-    names = []
-    try:
-        with open(filepath, newline="", encoding="utf-8") as csv_file:
-            reader = csv.reader(csv_file)
-            rows = list(reader)
-    except (OSError, UnicodeDecodeError):
-        return []
-    for row in rows[1:]:
-        if len(row) > 5 and row[5].strip():
-            names.append(row[5].strip())
-    return names
+def _load_csv_names(settings):
+    """CSVのファイル名列を取得 (カタログはファイルが変わるまでキャッシュされる)"""
+    if not settings.csv_path:
+        return None
+    catalog = yume_catalog.load_catalog(bpy.path.abspath(settings.csv_path))
+    if catalog is None:
+        return None
+    return catalog.column(settings.csv_column.strip(), _CSV_FALLBACK_COLUMN)
 
 
 def _sync_file_name_from_csv(settings):
-    names = _load_csv_names(settings.csv_path)
+    names = _load_csv_names(settings)
     if not names:
         return False
     if settings.csv_index < 0 or settings.csv_index >= len(names):
@@ -56,10 +90,10 @@ def _sync_index_from_file_name(settings, names):
     current_name = settings.file_name.strip()
     if not current_name:
         return False
-    try:
-        settings.csv_index = names.index(current_name)
-    except ValueError:
+    position = names.position(current_name)
+    if position is None:
         return False
+    settings.csv_index = position
     return True
 
 
@@ -71,14 +105,1261 @@ def _on_csv_path_updated(self, context):
 
 def _get_all_children(obj):
     """再帰的にすべての子オブジェクトを取得"""
-    children = []
-    for child in obj.children:
-        children.append(child)
-        children.extend(_get_all_children(child))
-    return children
+    return list(obj.children_recursive)
+
+
+def _advance_csv_index(settings):
+    names = _load_csv_names(settings)
+    if names and _sync_index_from_file_name(settings, names):
+        settings.csv_index = min(len(names) - 1, settings.csv_index + 1)
+        settings.file_name = names[settings.csv_index]
+
+
+def _object_base_name(name):
+    """Blenderの重複接尾辞 (.001) を除いた名前"""
+    if "." in name:
+        name_head, name_tail = name.rsplit(".", 1)
+        if name_tail.isdigit() and len(name_tail) == 3:
+            return name_head
+    return name
+
+
+def _select_for_export(context, snapshot, active, objects):
+    """出力対象だけを選択する (変更した選択状態は snapshot に記録)"""
+    snapshot.deselect_all(context.selected_objects)
+    snapshot.select(active, True)
+    for obj in objects:
+        snapshot.select(obj, True)
+    snapshot.set_active(active)
+
+
+def _zero_locations(objects, snapshot):
+    """元の位置を snapshot に記録して0,0,0に設定（記録済みのものは上書きしない）"""
+    for obj in objects:
+        snapshot.set(obj, "location", (0.0, 0.0, 0.0))
+
+
+def _update_with_array(hasher, collection, attribute, dtype, width):
+    values = np.empty(len(collection) * width, dtype=dtype)
+    collection.foreach_get(attribute, values)
+    hasher.update(values.tobytes())
+
+
+def _update_with_text(hasher, *values):
+    for value in values:
+        hasher.update(repr(value).encode("utf-8"))
+        hasher.update(b"\0")
+
+
+def _hash_material(hasher, material):
+    _update_with_text(hasher, material.name, material.use_nodes)
+    if not material.use_nodes or not material.node_tree:
+        _update_with_text(hasher, tuple(material.diffuse_color))
+        return
+    for node in sorted(material.node_tree.nodes, key=lambda node: node.name):
+        _update_with_text(hasher, node.name, node.bl_idname)
+        image = getattr(node, "image", None)
+        if image:
+            _update_with_text(hasher, image.name, image.filepath)
+        for socket in node.inputs:
+            value = getattr(socket, "default_value", None)
+            if value is None:
+                continue
+            try:
+                value = tuple(value)
+            except TypeError:
+                pass
+            _update_with_text(hasher, socket.identifier, value)
+    for link in material.node_tree.links:
+        _update_with_text(
+            hasher,
+            link.from_node.name, link.from_socket.identifier,
+            link.to_node.name, link.to_socket.identifier,
+        )
+
+
+def _hash_object(hasher, obj, depsgraph):
+    # 再出力で付く重複接尾辞 (.001) ではハッシュを変えない
+    parent_name = _object_base_name(obj.parent.name) if obj.parent else None
+    _update_with_text(hasher, _object_base_name(obj.name), obj.type, parent_name)
+    hasher.update(np.array(obj.matrix_basis, dtype=np.float64).tobytes())
+    hasher.update(np.array(obj.matrix_parent_inverse, dtype=np.float64).tobytes())
+    for modifier in obj.modifiers:
+        _update_with_text(
+            hasher, modifier.name, modifier.type, modifier.show_viewport, modifier.show_render
+        )
+    for slot in obj.material_slots:
+        if slot.material:
+            _hash_material(hasher, slot.material)
+        else:
+            _update_with_text(hasher, None)
+
+    if obj.type != 'MESH':
+        return
+    hasher.update(yume_geometry_cache.get(obj, depsgraph, "fbx.geometry_digest", _geometry_digest))
+
+
+def _geometry_digest(obj, depsgraph):
+    """モディファイア適用後のメッシュ配列を一括取得して作るハッシュ (ジオメトリの変更まで再利用)"""
+    hasher = hashlib.sha256()
+    mesh = obj.evaluated_get(depsgraph).data
+    _update_with_array(hasher, mesh.vertices, "co", np.float32, 3)
+    _update_with_array(hasher, mesh.loops, "vertex_index", np.int32, 1)
+    _update_with_array(hasher, mesh.polygons, "loop_total", np.int32, 1)
+    _update_with_array(hasher, mesh.polygons, "material_index", np.int32, 1)
+    _update_with_array(hasher, mesh.polygons, "use_smooth", np.bool_, 1)
+    for uv_layer in mesh.uv_layers:
+        _update_with_text(hasher, uv_layer.name)
+        _update_with_array(hasher, uv_layer.data, "uv", np.float32, 2)
+    for color_layer in mesh.vertex_colors:
+        _update_with_text(hasher, color_layer.name)
+        _update_with_array(hasher, color_layer.data, "color", np.float32, 4)
+    return hasher.digest()
+
+
+def _hash_export_subtree(context, export_objects, options):
+    """出力対象のメッシュ・マテリアル・モディファイア・トランスフォームと出力オプションのハッシュ"""
+    hasher = hashlib.sha256()
+    _update_with_text(hasher, bpy.app.version_string, sorted(
+        (key, sorted(value) if isinstance(value, set) else value)
+        for key, value in options.items()
+    ))
+    depsgraph = context.evaluated_depsgraph_get()
+    for obj in sorted(export_objects, key=lambda obj: _object_base_name(obj.name)):
+        _hash_object(hasher, obj, depsgraph)
+    return hasher.hexdigest()
+
+
+def _load_manifest(export_dir):
+    manifest_path = os.path.join(export_dir, _MANIFEST_NAME)
+    try:
+        with open(manifest_path, encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def _save_manifest(export_dir, manifest):
+    manifest_path = os.path.join(export_dir, _MANIFEST_NAME)
+    with open(manifest_path, "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+
+
+def _is_up_to_date(manifest, filepath, digest):
+    """マニフェストのハッシュが一致し、ファイルも記録時から変更されていなければTrue"""
+    entry = manifest.get(os.path.basename(filepath))
+    if not entry or entry.get("hash") != digest:
+        return False
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return False
+    return entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns
+
+
+def _record_export(manifest, filepath, digest):
+    stat = os.stat(filepath)
+    manifest[os.path.basename(filepath)] = {
+        "hash": digest,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def _tipsify(triangles, vertex_count, cache_size=16):
+    """Tipsify (Sander et al. 2007) で頂点キャッシュ効率の良い三角形の順序を求める
+
+    triangles は頂点インデックス3つ組のリスト。並べ替え後の三角形番号のリストを返す。
+    """
+    adjacency = [[] for _ in range(vertex_count)]
+    for triangle_index, triangle in enumerate(triangles):
+        for vertex in triangle:
+            adjacency[vertex].append(triangle_index)
+
+    live_counts = [len(triangle_ids) for triangle_ids in adjacency]
+    timestamps = [0] * vertex_count
+    emitted = [False] * len(triangles)
+    order = []
+    dead_end = []
+    time_stamp = cache_size + 1
+    cursor = 0
+    fanning = 0 if vertex_count else -1
+
+    while fanning >= 0:
+        candidates = []
+        for triangle_index in adjacency[fanning]:
+            if emitted[triangle_index]:
+                continue
+            emitted[triangle_index] = True
+            order.append(triangle_index)
+            for vertex in triangles[triangle_index]:
+                live_counts[vertex] -= 1
+                dead_end.append(vertex)
+                candidates.append(vertex)
+                if time_stamp - timestamps[vertex] > cache_size:
+                    timestamps[vertex] = time_stamp
+                    time_stamp += 1
+
+        # キャッシュに残っていて、扇を出し切れる頂点を優先する
+        fanning = -1
+        best_priority = -1
+        for vertex in candidates:
+            if live_counts[vertex] <= 0:
+                continue
+            priority = 0
+            age = time_stamp - timestamps[vertex]
+            if age + 2 * live_counts[vertex] <= cache_size:
+                priority = age
+            if priority > best_priority:
+                fanning = vertex
+                best_priority = priority
+
+        if fanning == -1:
+            while dead_end:
+                vertex = dead_end.pop()
+                if live_counts[vertex] > 0:
+                    fanning = vertex
+                    break
+        if fanning == -1:
+            while cursor < vertex_count:
+                if live_counts[cursor] > 0:
+                    fanning = cursor
+                    break
+                cursor += 1
+
+    return order
+
+
+def _referenced_uv_names(materials):
+    """マテリアルのノードが明示的に参照しているUVマップ名"""
+    names = set()
+    for material in materials:
+        if not material or not material.use_nodes or not material.node_tree:
+            continue
+        for node in material.node_tree.nodes:
+            uv_map = getattr(node, "uv_map", "")
+            if uv_map:
+                names.add(uv_map)
+    return names
+
+
+class _MeshOptimizer:
+    """出力直前に評価済みメッシュの一時コピーを最適化し、出力中だけ差し替える
+
+    頂点の結合・三角化・不要なUVマップとマテリアルスロットの削除・
+    頂点キャッシュ向けの三角形並べ替え (Tipsify) を行う。元のメッシュは変更しない。
+    """
+
+    VERSION = 1
+
+    def __init__(self, weld_distance, reorder_triangles):
+        self.weld_distance = weld_distance
+        self.reorder_triangles = reorder_triangles
+        self.last_stats = None
+
+    def signature(self):
+        return ("mesh_optimizer", self.VERSION, self.weld_distance, self.reorder_triangles)
+
+    @staticmethod
+    def _can_optimize(obj):
+        # アーマチュア変形やシェイプキーは評価済みコピーに焼き込むと失われる
+        if obj.data.shape_keys:
+            return False
+        return not any(modifier.type == 'ARMATURE' for modifier in obj.modifiers)
+
+    def _optimize_mesh(self, mesh, materials, strip_slots):
+        """一時メッシュを最適化し、(前後の頂点数, 前後の三角形数) を返す"""
+        bm = bmesh.new()
+        with yume_trace.span("bmesh.build", mesh=mesh.name):
+            bm.from_mesh(mesh)
+        vertices_before = len(bm.verts)
+        triangles_before = sum(len(face.verts) - 2 for face in bm.faces)
+
+        if self.weld_distance > 0.0:
+            bmesh.ops.remove_doubles(bm, verts=bm.verts[:], dist=self.weld_distance)
+        bmesh.ops.triangulate(bm, faces=bm.faces[:])
+
+        kept_materials = materials
+        if strip_slots:
+            used_indices = sorted({face.material_index for face in bm.faces})
+            remap = {old_index: new_index for new_index, old_index in enumerate(used_indices)}
+            for face in bm.faces:
+                face.material_index = remap[face.material_index]
+            kept_materials = [
+                materials[index] for index in used_indices if index < len(materials)
+            ]
+
+        if self.reorder_triangles and bm.faces:
+            bm.verts.index_update()
+            bm.faces.ensure_lookup_table()
+            triangles = [tuple(vertex.index for vertex in face.verts) for face in bm.faces]
+            order = _tipsify(triangles, len(bm.verts))
+            face_rank = {bm.faces[triangle_index]: rank for rank, triangle_index in enumerate(order)}
+            bm.faces.sort(key=face_rank.__getitem__)
+            # 頂点も三角形から最初に参照される順に並べる
+            vertex_rank = {}
+            for face in bm.faces:
+                for vertex in face.verts:
+                    vertex_rank.setdefault(vertex, len(vertex_rank))
+            bm.verts.sort(key=lambda vertex: vertex_rank.get(vertex, len(vertex_rank)))
+
+        vertices_after = len(bm.verts)
+        triangles_after = len(bm.faces)
+        bm.to_mesh(mesh)
+        bm.free()
+
+        mesh.materials.clear()
+        for material in kept_materials:
+            mesh.materials.append(material)
+
+        # マテリアルから参照されないUVマップを削除 (レンダー用のアクティブUVは残す)
+        keep_uv_names = _referenced_uv_names(kept_materials)
+        for uv_layer in list(mesh.uv_layers):
+            if not uv_layer.active_render and uv_layer.name not in keep_uv_names:
+                mesh.uv_layers.remove(uv_layer)
+
+        return (vertices_before, vertices_after), (triangles_before, triangles_after)
+
+    @contextlib.contextmanager
+    def applied(self, context, export_objects):
+        """出力対象のメッシュを最適化済みの一時コピーに差し替え、終了時に元へ戻す"""
+        with yume_trace.span("depsgraph"):
+            depsgraph = context.evaluated_depsgraph_get()
+        swaps = []
+        stats = {"vertices": [0, 0], "triangles": [0, 0]}
+        try:
+            for obj in export_objects:
+                if obj.type != 'MESH' or not self._can_optimize(obj):
+                    continue
+                materials = [slot.material for slot in obj.material_slots]
+                # オブジェクトにリンクされたスロットがある場合、スロット数を変えると元に戻せない
+                strip_slots = all(slot.link == 'DATA' for slot in obj.material_slots)
+
+                with yume_trace.span("to_mesh", object=obj.name):
+                    if obj.modifiers:
+                        temp_mesh = bpy.data.meshes.new_from_object(obj.evaluated_get(depsgraph))
+                    else:
+                        # モディファイアがなければ評価結果は元データと同じなので複製で済む
+                        temp_mesh = obj.data.copy()
+                vertices, triangles = self._optimize_mesh(temp_mesh, materials, strip_slots)
+                for index in range(2):
+                    stats["vertices"][index] += vertices[index]
+                    stats["triangles"][index] += triangles[index]
+
+                # 評価済みコピーにはモディファイアが適用済みなので、出力中は無効にする
+                disabled = [modifier for modifier in obj.modifiers if modifier.show_viewport]
+                swaps.append((obj, obj.data, temp_mesh, disabled))
+                for modifier in disabled:
+                    modifier.show_viewport = False
+                obj.data = temp_mesh
+            self.last_stats = stats
+            yield stats
+        finally:
+            for obj, original_mesh, temp_mesh, disabled in swaps:
+                obj.data = original_mesh
+                for modifier in disabled:
+                    modifier.show_viewport = True
+                bpy.data.meshes.remove(temp_mesh)
+
+    def describe(self):
+        if not self.last_stats:
+            return ""
+        vertices = self.last_stats["vertices"]
+        triangles = self.last_stats["triangles"]
+        return (
+            f"頂点 {vertices[0]}→{vertices[1]}, "
+            f"三角形 {triangles[0]}→{triangles[1]}"
+        )
+
+
+def _mesh_fingerprint(obj, depsgraph):
+    """評価済みメッシュの形状・UV・マテリアル割り当てから作る識別子"""
+    hasher = hashlib.sha1()
+    hasher.update(yume_geometry_cache.get(obj, depsgraph, "fbx.geometry_digest", _geometry_digest))
+    _update_with_text(hasher, [material.name if material else None for material in obj.data.materials])
+    return hasher.hexdigest()
+
+
+def _parse_lod_ratios(text):
+    """"1.0, 0.5, 0.25" 形式のLOD比率を解析"""
+    try:
+        ratios = tuple(float(part) for part in text.split(",") if part.strip())
+    except ValueError:
+        raise ValueError(f"LOD比率が数値ではありません: {text}") from None
+    if not ratios:
+        raise ValueError("LOD比率が指定されていません。")
+    if any(not 0.0 < ratio <= 1.0 for ratio in ratios):
+        raise ValueError("LOD比率は0より大きく1以下で指定してください。")
+    return ratios
+
+
+# (メッシュ識別子, 比率) -> 間引き済みメッシュ名。セッション中の出力間で再利用する
+_lod_mesh_cache = {}
+
+
+def _decimate_mesh(context, source_mesh, ratio):
+    """Decimateモディファイアを一時オブジェクトで評価して新しいメッシュを作る"""
+    temp_obj = bpy.data.objects.new("_lod_decimate", source_mesh)
+    context.scene.collection.objects.link(temp_obj)
+    try:
+        modifier = temp_obj.modifiers.new("Decimate", 'DECIMATE')
+        modifier.ratio = ratio
+        depsgraph = context.evaluated_depsgraph_get()
+        return bpy.data.meshes.new_from_object(temp_obj.evaluated_get(depsgraph))
+    finally:
+        bpy.data.objects.remove(temp_obj)
+
+
+def _get_lod_mesh(context, obj, fingerprint, ratio):
+    """間引き済みメッシュをキャッシュから取得し、なければ作成する"""
+    key = (fingerprint, ratio)
+    mesh = bpy.data.meshes.get(_lod_mesh_cache.get(key, ""))
+    if mesh is not None:
+        return mesh
+
+    depsgraph = context.evaluated_depsgraph_get()
+    mesh = bpy.data.meshes.new_from_object(obj.evaluated_get(depsgraph))
+    if ratio < 1.0:
+        full_mesh = mesh
+        mesh = _decimate_mesh(context, full_mesh, ratio)
+        bpy.data.meshes.remove(full_mesh)
+    mesh.materials.clear()
+    for material in obj.data.materials:
+        mesh.materials.append(material)
+    mesh.name = f"_lod_{fingerprint[:12]}_{ratio:g}"
+    _lod_mesh_cache[key] = mesh.name
+    return mesh
+
+
+class _LodBuilder:
+    """出力中だけメッシュを _LOD0, _LOD1... の兄弟オブジェクトに置き換える
+
+    同じ親の下に並ぶため、Unityのインポート時にLODGroupが自動で作られる。
+    間引きはメッシュ識別子ごとに1回だけ行い、結果は出力をまたいでキャッシュする。
+    """
+
+    VERSION = 1
+
+    def __init__(self, ratios):
+        self.ratios = ratios
+
+    def signature(self):
+        return ("lod_builder", self.VERSION, self.ratios)
+
+    @staticmethod
+    def _can_build(obj):
+        if obj.type != 'MESH' or obj.children or obj.data.shape_keys:
+            return False
+        return not any(modifier.type == 'ARMATURE' for modifier in obj.modifiers)
+
+    @contextlib.contextmanager
+    def applied(self, context, export_objects):
+        """LOD対象を置き換えた出力オブジェクトのリストを返す (一時オブジェクトは未リンク)"""
+        expanded = []
+        created = []
+        try:
+            for obj in export_objects:
+                if not self._can_build(obj):
+                    expanded.append(obj)
+                    continue
+                fingerprint = _mesh_fingerprint(obj, context.evaluated_depsgraph_get())
+                base_name = _object_base_name(obj.name)
+                for level, ratio in enumerate(self.ratios):
+                    mesh = _get_lod_mesh(context, obj, fingerprint, ratio)
+                    lod_obj = bpy.data.objects.new(f"{base_name}_LOD{level}", mesh)
+                    created.append(lod_obj)
+                    lod_obj.parent = obj.parent
+                    lod_obj.matrix_parent_inverse = obj.matrix_parent_inverse.copy()
+                    lod_obj.matrix_basis = obj.matrix_basis.copy()
+                    for slot, lod_slot in zip(obj.material_slots, lod_obj.material_slots):
+                        if slot.link == 'OBJECT':
+                            lod_slot.link = 'OBJECT'
+                            lod_slot.material = slot.material
+                    expanded.append(lod_obj)
+            yield expanded
+        finally:
+            for lod_obj in created:
+                bpy.data.objects.remove(lod_obj)
+
+
+def _matrix_relative_to(obj, root):
+    """obj のローカル座標から root のローカル座標への変換行列"""
+    matrix = Matrix.Identity(4)
+    current = obj
+    while current is not None and current != root:
+        matrix = current.matrix_parent_inverse @ current.matrix_basis @ matrix
+        current = current.parent
+    return matrix
+
+
+def _linear_to_srgb(values):
+    values = np.clip(values, 0.0, 1.0)
+    return np.where(
+        values <= 0.0031308,
+        values * 12.92,
+        1.055 * np.power(values, 1.0 / 2.4) - 0.055,
+    )
+
+
+def _atlas_source(material):
+    """アトラスにまとめられるマテリアルなら ('COLOR', rgba) か ('IMAGE', image) を返す"""
+    if material is None:
+        return None
+    if not material.use_nodes or not material.node_tree:
+        return ('COLOR', tuple(material.diffuse_color))
+    bsdf = next(
+        (node for node in material.node_tree.nodes if node.type == 'BSDF_PRINCIPLED'),
+        None,
+    )
+    if bsdf is None:
+        return None
+    base_color = bsdf.inputs['Base Color']
+    if not base_color.is_linked:
+        return ('COLOR', tuple(base_color.default_value))
+    from_node = base_color.links[0].from_node
+    image = getattr(from_node, "image", None)
+    if from_node.type == 'TEX_IMAGE' and image and image.size[0] > 0 and image.size[1] > 0:
+        return ('IMAGE', image)
+    return None
+
+
+class _ChildMerger:
+    """出力中だけ静的な子メッシュをマテリアルごとに1つのメッシュへ結合する
+
+    アトラスを有効にすると、単色・単一テクスチャのマテリアルを1枚のアトラス画像に
+    詰めてUVを付け替え、1つのマテリアルにまとめる。元のオブジェクトは変更しない。
+    """
+
+    VERSION = 1
+    UV_NAME = "UVMap"
+
+    def __init__(self, use_atlas, cell_size):
+        self.use_atlas = use_atlas
+        self.cell_size = cell_size
+
+    def signature(self):
+        return ("child_merger", self.VERSION, self.use_atlas, self.cell_size)
+
+    @staticmethod
+    def _is_static_mesh(obj):
+        if obj.type != 'MESH' or obj.data.shape_keys:
+            return False
+        if obj.animation_data and obj.animation_data.action:
+            return False
+        return not any(modifier.type == 'ARMATURE' for modifier in obj.modifiers)
+
+    def _mergeable(self, children):
+        """子孫もすべて結合できる静的メッシュだけを対象にする (階層を壊さないため)"""
+        return [
+            obj for obj in children
+            if self._is_static_mesh(obj)
+            and all(self._is_static_mesh(child) for child in obj.children_recursive)
+        ]
+
+    def _join(self, context, root, objects, materials):
+        """root 空間に変換した子メッシュを1つのbmeshに結合 (マテリアル番号は materials に対応)"""
+        depsgraph = context.evaluated_depsgraph_get()
+        bm = bmesh.new()
+        for obj in objects:
+            if obj.modifiers:
+                mesh = bpy.data.meshes.new_from_object(obj.evaluated_get(depsgraph))
+            else:
+                mesh = obj.data.copy()
+            try:
+                matrix = _matrix_relative_to(obj, root)
+                mesh.transform(matrix)
+                if matrix.determinant() < 0.0:
+                    mesh.flip_normals()
+
+                # レンダー用UVだけを共通の名前で残す
+                for uv_layer in list(mesh.uv_layers):
+                    if not uv_layer.active_render:
+                        mesh.uv_layers.remove(uv_layer)
+                if mesh.uv_layers:
+                    mesh.uv_layers[0].name = self.UV_NAME
+                else:
+                    mesh.uv_layers.new(name=self.UV_NAME)
+
+                # スロット番号を結合後のマテリアル番号に付け替え
+                remap = []
+                for slot in obj.material_slots:
+                    if slot.material not in materials:
+                        materials.append(slot.material)
+                    remap.append(materials.index(slot.material))
+                if not remap:
+                    if None not in materials:
+                        materials.append(None)
+                    remap.append(materials.index(None))
+                indices = np.empty(len(mesh.polygons), dtype=np.int32)
+                mesh.polygons.foreach_get("material_index", indices)
+                indices = np.asarray(remap, dtype=np.int32)[np.clip(indices, 0, len(remap) - 1)]
+                mesh.polygons.foreach_set("material_index", indices)
+
+                bm.from_mesh(mesh)
+            finally:
+                bpy.data.meshes.remove(mesh)
+        return bm
+
+    def _build_atlas(self, bm, materials, atlas_name, image_path, created):
+        """アトラス化できるマテリアルを1枚の画像に詰め、UVとマテリアル番号を付け替える"""
+        uv_layer = bm.loops.layers.uv.get(self.UV_NAME)
+        used_indices = sorted({face.material_index for face in bm.faces})
+        faces_by_index = {index: [] for index in used_indices}
+        for face in bm.faces:
+            faces_by_index[face.material_index].append(face)
+
+        sources = {}
+        for index in used_indices:
+            source = _atlas_source(materials[index])
+            if source is None:
+                continue
+            if source[0] == 'IMAGE':
+                # タイリングしているUVはセルに収まらないので対象外
+                uvs = [loop[uv_layer].uv for face in faces_by_index[index] for loop in face.loops]
+                if any(not (-1e-4 <= uv.x <= 1.0001 and -1e-4 <= uv.y <= 1.0001) for uv in uvs):
+                    continue
+            sources[index] = source
+        if len(sources) < 2:
+            return
+
+        cell = self.cell_size
+        side = math.ceil(math.sqrt(len(sources)))
+        size = side * cell
+        pixels = np.zeros((size, size, 4), dtype=np.float32)
+        padding = 1.0
+        atlas_material = bpy.data.materials.new(atlas_name)
+        created["materials"].append(atlas_material)
+        materials.append(atlas_material)
+        atlas_index = len(materials) - 1
+
+        for cell_index, (index, (kind, value)) in enumerate(sorted(sources.items())):
+            cell_x = (cell_index % side) * cell
+            cell_y = (cell_index // side) * cell
+            if kind == 'COLOR':
+                rgba = np.array(value, dtype=np.float32)
+                rgba[:3] = _linear_to_srgb(rgba[:3])
+                pixels[cell_y:cell_y + cell, cell_x:cell_x + cell] = rgba
+            else:
+                scaled = value.copy()
+                try:
+                    scaled.scale(cell, cell)
+                    cell_pixels = np.empty(cell * cell * 4, dtype=np.float32)
+                    scaled.pixels.foreach_get(cell_pixels)
+                finally:
+                    bpy.data.images.remove(scaled)
+                pixels[cell_y:cell_y + cell, cell_x:cell_x + cell] = cell_pixels.reshape(cell, cell, 4)
+
+            for face in faces_by_index[index]:
+                face.material_index = atlas_index
+                for loop in face.loops:
+                    uv = loop[uv_layer].uv
+                    u, v = (0.5, 0.5) if kind == 'COLOR' else (uv.x, uv.y)
+                    uv.x = (cell_x + padding + u * (cell - 2.0 * padding)) / size
+                    uv.y = (cell_y + padding + v * (cell - 2.0 * padding)) / size
+
+        image = bpy.data.images.new(atlas_name, size, size, alpha=True)
+        created["images"].append(image)
+        image.pixels.foreach_set(pixels.ravel())
+        image.filepath_raw = image_path
+        image.file_format = 'PNG'
+        image.save()
+
+        atlas_material.use_nodes = True
+        nodes = atlas_material.node_tree.nodes
+        bsdf = next(node for node in nodes if node.type == 'BSDF_PRINCIPLED')
+        texture = nodes.new('ShaderNodeTexImage')
+        texture.image = image
+        atlas_material.node_tree.links.new(texture.outputs['Color'], bsdf.inputs['Base Color'])
+
+    @contextlib.contextmanager
+    def applied(self, context, export_objects, filepath):
+        """結合した子を置き換えた出力オブジェクトのリストを返す (一時オブジェクトは未リンク)"""
+        root, children = export_objects[0], export_objects[1:]
+        mergeable = self._mergeable(children)
+        created = {"objects": [], "meshes": [], "materials": [], "images": []}
+        try:
+            if not mergeable:
+                yield export_objects
+                return
+
+            materials = []
+            bm = self._join(context, root, mergeable, materials)
+            try:
+                base_name = os.path.splitext(os.path.basename(filepath))[0]
+                if self.use_atlas:
+                    image_path = os.path.join(os.path.dirname(filepath), f"{base_name}_atlas.png")
+                    self._build_atlas(bm, materials, f"{base_name}_atlas", image_path, created)
+
+                merged_objects = []
+                for index in sorted({face.material_index for face in bm.faces}):
+                    part = bm.copy()
+                    bmesh.ops.delete(
+                        part,
+                        geom=[face for face in part.faces if face.material_index != index],
+                        context='FACES',
+                    )
+                    for face in part.faces:
+                        face.material_index = 0
+                    material = materials[index]
+                    suffix = material.name if material else "NoMaterial"
+                    mesh = bpy.data.meshes.new(f"{base_name}_{suffix}")
+                    created["meshes"].append(mesh)
+                    part.to_mesh(mesh)
+                    part.free()
+                    mesh.materials.append(material)
+
+                    merged = bpy.data.objects.new(mesh.name, mesh)
+                    created["objects"].append(merged)
+                    merged.parent = root
+                    merged_objects.append(merged)
+            finally:
+                bm.free()
+
+            merged_set = set(mergeable)
+            kept = [obj for obj in children if obj not in merged_set]
+            yield [root, *kept, *merged_objects]
+        finally:
+            for obj in created["objects"]:
+                bpy.data.objects.remove(obj)
+            for mesh in created["meshes"]:
+                bpy.data.meshes.remove(mesh)
+            for material in created["materials"]:
+                bpy.data.materials.remove(material)
+            for image in created["images"]:
+                bpy.data.images.remove(image)
+
+
+def _empty_parent_rotation():
+    return (math.radians(90.0), 0.0, 0.0)
+
+
+class _ExportBase:
+    """差分判定・LOD・メッシュ最適化をまとめて行う出力処理の共通部分
+
+    出力対象の準備と後始末 (_stage_objects / _unstage_objects) は派生クラスで定義する。
+    """
+
+    OPTIONS = _FBX_EXPORT_OPTIONS
+    PUSH_UNDO = True
+
+    def __init__(
+        self, context, manifest=None, optimizer=None, lod_builder=None, merger=None, file_format='FBX',
+    ):
+        self.context = context
+        self.manifest = manifest
+        self.optimizer = optimizer
+        self.lod_builder = lod_builder
+        self.merger = merger
+        self.file_format = file_format
+
+    @property
+    def extension(self):
+        return _EXPORT_FORMATS[self.file_format][0]
+
+    def _hash_options(self, merge):
+        hash_options = dict(self.OPTIONS)
+        if self.file_format != 'FBX':
+            hash_options["format"] = self.file_format
+        if merge and self.merger is not None:
+            hash_options["merger"] = self.merger.signature()
+        if self.optimizer is not None:
+            hash_options["optimizer"] = self.optimizer.signature()
+        if self.lod_builder is not None:
+            hash_options["lod_builder"] = self.lod_builder.signature()
+        return hash_options
+
+    def _write(self, export_objects, filepath, merge=False):
+        """FBX (または GLB) を出力してTrueを返す
+
+        差分出力で内容ハッシュが前回と一致する場合は、結合・LOD生成・最適化も行わず
+        既存ファイルに触れず (更新時刻も維持して) Falseを返す。
+        merge=True では先頭を親として子メッシュの結合を行う。
+        """
+        context = self.context
+        merge = merge and self.merger is not None
+        digest = None
+        if self.manifest is not None:
+            with yume_trace.span("fbx.hash", file=os.path.basename(filepath)):
+                digest = _hash_export_subtree(context, export_objects, self._hash_options(merge))
+            if _is_up_to_date(self.manifest, filepath, digest):
+                return False
+
+        with contextlib.ExitStack() as stack:
+            if merge:
+                export_objects = stack.enter_context(
+                    self.merger.applied(context, export_objects, filepath)
+                )
+            if self.lod_builder is not None:
+                export_objects = stack.enter_context(
+                    self.lod_builder.applied(context, export_objects)
+                )
+            self._stage_objects(export_objects)
+            stack.callback(self._unstage_objects, export_objects)
+            if self.optimizer is not None:
+                stack.enter_context(self.optimizer.applied(context, export_objects))
+
+            if self.file_format == 'GLB':
+                self._write_glb(export_objects, filepath)
+            else:
+                # PUSH_UNDO=False ではエクスポーター自身のUNDOステップを積まない
+                call_args = () if self.PUSH_UNDO else ('EXEC_DEFAULT', False)
+                with yume_trace.span("fbx.export", file=os.path.basename(filepath)):
+                    bpy.ops.export_scene.fbx(*call_args, filepath=filepath, **self.OPTIONS)
+
+        if self.manifest is not None:
+            _record_export(self.manifest, filepath, digest)
+        return True
+
+    def _write_glb(self, export_objects, filepath):
+        """静的メッシュをGLBで書き出す (FBXと同じく単位スケールを適用する)"""
+        context = self.context
+        with yume_trace.span("depsgraph"):
+            depsgraph = context.evaluated_depsgraph_get()
+        with yume_trace.span("glb.export", file=os.path.basename(filepath)):
+            yume_glb.write_glb(
+                filepath, export_objects, depsgraph, context.scene.unit_settings.scale_length,
+            )
+
+
+class _SelectionExport(_ExportBase):
+    """従来の出力: 選択状態を切り替えて出力し、終了時に位置と選択を復元する
+
+    作成したEmptyと親子付けはシーンに残る。
+    """
+
+    def __init__(
+        self, context, manifest=None, optimizer=None, lod_builder=None, merger=None, file_format='FBX',
+    ):
+        super().__init__(context, manifest, optimizer, lod_builder, merger, file_format)
+        self.snapshot = yume_state.Snapshot(context)
+        self._linked_temporaries = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.snapshot.restore()
+        return False
+
+    def _stage_objects(self, export_objects):
+        # LODなどの一時オブジェクトは選択できるようにシーンへリンクする
+        self._linked_temporaries = [obj for obj in export_objects if not obj.users_collection]
+        for obj in self._linked_temporaries:
+            self.context.collection.objects.link(obj)
+        _select_for_export(self.context, self.snapshot, export_objects[0], export_objects[1:])
+
+    def _unstage_objects(self, export_objects):
+        for obj in self._linked_temporaries:
+            self.context.collection.objects.unlink(obj)
+        self._linked_temporaries = []
+
+    def export_with_empty_parent(self, objects, name, filepath):
+        """objects を新しいEmptyの子にし、位置をゼロにしてFBX出力
+
+        書き込みを行った場合はTrue (差分出力で変更なしの場合はFalse) を返す。
+        """
+        context = self.context
+        empty = bpy.data.objects.new(
+            name=name,
+            object_data=None,
+        )
+        # 1. Empty生成直後に回転を設定
+        empty.rotation_euler = _empty_parent_rotation()
+        # 2. Emptyをシーンに追加
+        context.collection.objects.link(empty)
+
+        # 3. 必要ならビューを更新して依存関係を反映
+        context.view_layer.update()
+
+        # 4. 親子付けとトランスフォーム維持
+        for obj in objects:
+            obj.parent = empty
+            obj.matrix_parent_inverse = empty.matrix_world.inverted()
+
+        # 5. 元の位置を保存して0,0,0に設定
+        _zero_locations(objects, self.snapshot)
+
+        # 6. Empty+子を選択して出力
+        return self._write([empty, *objects], filepath)
+
+    def export_parent_with_children(self, parent_obj, children, filepath):
+        """子オブジェクトの位置をゼロにして親+子をFBX出力"""
+        _zero_locations(children, self.snapshot)
+        return self._write([parent_obj, *children], filepath, merge=True)
+
+
+class _StagedExport(_ExportBase):
+    """選択を変更しない出力: 一時コレクションに対象をリンクし、アクティブコレクションとして出力する
+
+    Emptyの回転と位置のゼロ化は一時的な親子付け・トランスフォームとして適用し、
+    終了時 (例外時も含む) に変更した項目だけを元に戻す。
+    エクスポーターのUNDOステップは積まない。
+    """
+
+    COLLECTION_NAME = "_fbx_export_stage"
+    OPTIONS = dict(_FBX_EXPORT_OPTIONS, use_selection=False, use_active_collection=True)
+    PUSH_UNDO = False
+
+    def __init__(
+        self, context, manifest=None, optimizer=None, lod_builder=None, merger=None, file_format='FBX',
+    ):
+        super().__init__(context, manifest, optimizer, lod_builder, merger, file_format)
+        self.collection = None
+        self.snapshot = yume_state.Snapshot(context)
+        self.temporary_empties = []
+
+    def __enter__(self):
+        context = self.context
+        view_layer = context.view_layer
+        self.collection = bpy.data.collections.new(self.COLLECTION_NAME)
+        context.scene.collection.children.link(self.collection)
+        self.snapshot.set(
+            view_layer, "active_layer_collection",
+            view_layer.layer_collection.children[self.collection.name],
+        )
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # 親・位置・アクティブコレクションを戻してから一時データを削除する
+        self.snapshot.restore()
+        for empty in self.temporary_empties:
+            bpy.data.objects.remove(empty)
+        bpy.data.collections.remove(self.collection)
+        return False
+
+    def _stage_objects(self, export_objects):
+        for obj in export_objects:
+            if obj.name not in self.collection.objects:
+                self.collection.objects.link(obj)
+
+    def _unstage_objects(self, export_objects):
+        # 次のアイテムに混ざらないよう出力後すぐにステージから外す
+        for obj in export_objects:
+            if obj.name in self.collection.objects:
+                self.collection.objects.unlink(obj)
+
+    def export_with_empty_parent(self, objects, name, filepath):
+        empty = bpy.data.objects.new(name=name, object_data=None)
+        empty.rotation_euler = _empty_parent_rotation()
+        self.temporary_empties.append(empty)
+
+        # 親のワールド行列は回転のみなので、ビュー更新なしで逆行列を求められる
+        parent_inverse = empty.matrix_basis.inverted()
+        for obj in objects:
+            self.snapshot.set(obj, "parent", empty)
+            self.snapshot.set(obj, "matrix_parent_inverse", parent_inverse)
+        _zero_locations(objects, self.snapshot)
+
+        return self._write([empty, *objects], filepath)
+
+    def export_parent_with_children(self, parent_obj, children, filepath):
+        _zero_locations(children, self.snapshot)
+        return self._write([parent_obj, *children], filepath, merge=True)
+
+
+def _make_exporter(context, settings, manifest=None):
+    """設定に応じた出力処理を作成。LOD比率が不正な場合は ValueError"""
+    optimizer = None
+    if settings.use_mesh_optimization:
+        optimizer = _MeshOptimizer(settings.weld_distance, settings.reorder_triangles)
+    lod_builder = None
+    if settings.use_lods:
+        lod_builder = _LodBuilder(_parse_lod_ratios(settings.lod_ratios))
+    merger = None
+    if settings.use_child_merge:
+        merger = _ChildMerger(settings.use_material_atlas, settings.atlas_cell_size)
+    exporter_class = _StagedExport if settings.use_staged_export else _SelectionExport
+    return exporter_class(context, manifest, optimizer, lod_builder, merger, settings.export_format)
+
+
+def _describe_optimization(exporter):
+    if exporter.optimizer is None:
+        return ""
+    return exporter.optimizer.describe()
+
+
+def _make_budget_report(settings):
+    """予算チェックが有効ならレポートを作成。予算テーブルが不正な場合は ValueError"""
+    if not settings.use_budget_check:
+        return None
+    budgets = yume_budget.parse_budget_table(settings.budget_table)
+    catalog_path = settings.budget_csv_path or settings.csv_path
+    catalog = yume_catalog.load_catalog(bpy.path.abspath(catalog_path)) if catalog_path else None
+    return yume_budget.BudgetReport(budgets, catalog, settings.block_over_budget)
+
+
+def _preflight(context, budget_report, name, export_objects):
+    """出力対象を見積もって予算と照合し、出力してよければ True を返す"""
+    if budget_report is None:
+        return True
+    stats = yume_budget.collect_mesh_stats(export_objects, context.evaluated_depsgraph_get())
+    return budget_report.evaluate(name, stats)
+
+
+def _write_budget_report(operator, budget_report, export_dir):
+    """予算レポートを書き出し、超過した項目を警告する"""
+    if budget_report is None:
+        return
+    for row in budget_report.over_budget():
+        operator.report({'WARNING'}, f"予算超過 ({row['category']}) {row['name']}: {row['violations']}")
+    try:
+        budget_report.write(export_dir, "fbx_budget_report")
+    except OSError as exc:
+        operator.report({'WARNING'}, f"予算レポートを書き出せません: {exc}")
+
+
+def _build_object_name_index(objects):
+    """基本名 -> オブジェクトのリスト の索引を作成"""
+    index = {}
+    for obj in objects:
+        index.setdefault(_object_base_name(obj.name), []).append(obj)
+    return index
+
+
+def _export_batch(exporter, names, name_index, export_dir, batch_mode, results, budget_report=None):
+    """名前ごとに対応するオブジェクトを出力し、(名前, 状態, 詳細) を results に追加"""
+    for name in names:
+        objects = name_index.get(name)
+        if not objects:
+            results.append((name, "missing", "対応するオブジェクトがありません"))
+            continue
+
+        filepath = bpy.path.ensure_ext(os.path.join(export_dir, name), exporter.extension)
+        try:
+            if batch_mode == 'EMPTY_PARENT':
+                if not _preflight(exporter.context, budget_report, name, objects):
+                    results.append((name, "blocked", budget_report.rows[-1]["violations"]))
+                    continue
+                written = exporter.export_with_empty_parent(objects, name, filepath)
+            else:
+                if len(objects) != 1:
+                    results.append((name, "failed", "同名の親オブジェクトが複数あります"))
+                    continue
+                children = _get_all_children(objects[0])
+                if not children:
+                    results.append((name, "failed", "子オブジェクトがありません"))
+                    continue
+                if not _preflight(exporter.context, budget_report, name, [objects[0], *children]):
+                    results.append((name, "blocked", budget_report.rows[-1]["violations"]))
+                    continue
+                written = exporter.export_parent_with_children(objects[0], children, filepath)
+        except (RuntimeError, OSError) as exc:
+            results.append((name, "failed", str(exc)))
+            continue
+        if not written:
+            results.append((name, "unchanged", filepath))
+            continue
+        optimization = _describe_optimization(exporter)
+        results.append((name, "ok", f"{filepath} ({optimization})" if optimization else filepath))
+
+
+def _write_batch_report(report_path, results):
+    with open(report_path, "w", newline="", encoding="utf-8") as report_file:
+        writer = csv.writer(report_file)
+        writer.writerow(["name", "status", "detail"])
+        writer.writerows(results)
+
+
+def _build_batch_name_index(collection):
+    """コレクション直下のルートオブジェクトを基本名で索引化"""
+    collection_objects = set(collection.objects)
+    roots = [
+        obj for obj in collection.objects
+        if obj.type != 'CAMERA' and obj.parent not in collection_objects
+    ]
+    return _build_object_name_index(roots)
+
+
+def _batch_names(settings, name_index):
+    """CSVがあればその順序、なければコレクション内の全名前を出力対象にする"""
+    if settings.csv_path:
+        return _load_csv_names(settings)
+    return sorted(name_index)
+
+
+def _finish_batch(operator, results, export_dir, label):
+    """一括出力のレポートを書き出して結果を報告"""
+    report_path = os.path.join(export_dir, "fbx_batch_report.csv")
+    try:
+        _write_batch_report(report_path, results)
+    except OSError as exc:
+        operator.report({'WARNING'}, f"レポートを書き出せません: {exc}")
+
+    succeeded = sum(1 for _, status, _ in results if status == "ok")
+    unchanged = sum(1 for _, status, _ in results if status == "unchanged")
+    blocked = sum(1 for _, status, _ in results if status == "blocked")
+    failed = len(results) - succeeded - unchanged - blocked
+    for name, status, detail in results:
+        if status not in {"ok", "unchanged", "blocked"}:
+            operator.report({'WARNING'}, f"{name}: {detail}")
+    operator.report(
+        {'INFO'},
+        f"{label}: {succeeded}件成功, {unchanged}件変更なし, {blocked}件予算超過, "
+        f"{failed}件失敗 ({report_path})",
+    )
+    yume_trace.flush_and_report(operator)
+    return failed
+
+
+def run_batch_worker(job_path):
+    """並列出力ワーカーの入口 (blender --background の --python-expr から呼ばれる)
+
+    ジョブの items を1件ずつ出力し、結果をステータスファイルに追記する。
+    マニフェストと予算レポートはシャードごとに作業フォルダへ書き出し、親が統合する。
+    """
+    with open(job_path, encoding="utf-8") as job_file:
+        job = json.load(job_file)
+    if not hasattr(bpy.types.Scene, "empty_parent_export_settings"):
+        register()
+    if yume_trace.is_enabled():
+        # 環境変数を引き継いだワーカー同士で同じファイルに書かないようシャードごとに分ける
+        trace_base, trace_ext = os.path.splitext(os.environ.get("YUME_TRACE", "trace.json"))
+        yume_trace.enable(f"{trace_base}.{job['shard']}{trace_ext}")
+
+    context = bpy.context
+    settings = context.scene.empty_parent_export_settings
+    status_path = job["status_path"]
+    work_dir = os.path.dirname(job_path)
+    collection = bpy.data.collections.get(job["collection"])
+    if collection is None:
+        for name in job["items"]:
+            yume_jobs.append_status(status_path, name, "failed", "ソースコレクションが見つかりません")
+        return
+
+    name_index = _build_batch_name_index(collection)
+    manifest = _load_manifest(job["export_dir"]) if job["use_incremental"] else None
+    exporter = _make_exporter(context, settings, manifest)
+    budget_report = _make_budget_report(settings)
+    with exporter:
+        for name in job["items"]:
+            results = []
+            _export_batch(
+                exporter, [name], name_index, job["export_dir"], job["batch_mode"], results,
+                budget_report,
+            )
+            yume_jobs.append_status(status_path, *results[0])
+
+    if manifest is not None:
+        with open(os.path.join(work_dir, f"manifest_{job['shard']}.json"), "w", encoding="utf-8") as manifest_file:
+            json.dump(manifest, manifest_file)
+    if budget_report is not None:
+        budget_report.write(work_dir, f"budget_{job['shard']}")
+    yume_trace.flush()
+
+
+def _merge_worker_outputs(jobs, results, manifest, budget_report, extension=".fbx"):
+    """ワーカーが書き出したマニフェストと予算レポートを親のものへ統合"""
+    written = {bpy.path.ensure_ext(name, extension) for name, status, _ in results if status == "ok"}
+    for job in jobs:
+        work_dir = os.path.dirname(job["status_path"])
+        if manifest is not None:
+            try:
+                with open(os.path.join(work_dir, f"manifest_{job['shard']}.json"), encoding="utf-8") as manifest_file:
+                    shard_manifest = json.load(manifest_file)
+            except (OSError, ValueError):
+                shard_manifest = {}
+            manifest.update({key: entry for key, entry in shard_manifest.items() if key in written})
+        if budget_report is not None:
+            try:
+                with open(os.path.join(work_dir, f"budget_{job['shard']}.json"), encoding="utf-8") as budget_file:
+                    budget_report.rows.extend(json.load(budget_file)["items"])
+            except (OSError, ValueError, KeyError):
+                pass
+
+
+def _watch_catalog(csv_path, column_name):
+    """監視用: CSVの {ファイル名: 行の内容}。読み込めなければ None"""
+    catalog = yume_catalog.load_catalog(csv_path) if csv_path else None
+    if catalog is None:
+        return None
+    names = catalog.column(column_name, _CSV_FALLBACK_COLUMN)
+    if names is None:
+        return None
+    return {name: tuple(catalog.rows[row_index]) for name, row_index in zip(names.values, names.row_indices)}
+
+
+def _watch_item_for_object(collection_name, object_name):
+    """更新されたオブジェクトが属する一括出力の項目名 (ルートの基本名)"""
+    collection = bpy.data.collections.get(collection_name)
+    obj = bpy.data.objects.get(object_name)
+    if collection is None or obj is None:
+        return None
+    while obj.parent is not None and collection in obj.parent.users_collection:
+        obj = obj.parent
+    if obj.type == 'CAMERA' or collection not in obj.users_collection:
+        return None
+    return _object_base_name(obj.name)
+
+
+def _watch_item_objects(settings, name):
+    collection = settings.batch_collection
+    if collection is None:
+        return None
+    return _build_batch_name_index(collection).get(name)
+
+
+def _watch_export_fbx(context, name):
+    settings = context.scene.empty_parent_export_settings
+    if settings.batch_collection is None:
+        return "failed", "ソースコレクションがありません"
+    export_dir = bpy.path.abspath(settings.export_dir)
+    os.makedirs(export_dir, exist_ok=True)
+    manifest = _load_manifest(export_dir) if settings.use_incremental else None
+    exporter = _make_exporter(context, settings, manifest)
+    budget_report = _make_budget_report(settings)
+    name_index = _build_batch_name_index(settings.batch_collection)
+    results = []
+    with exporter:
+        _export_batch(exporter, [name], name_index, export_dir, settings.batch_mode, results, budget_report)
+    _, status, detail = results[0]
+    if manifest is not None:
+        try:
+            _save_manifest(export_dir, manifest)
+        except OSError as exc:
+            detail = f"{detail} (マニフェストを保存できません: {exc})"
+    return status, detail
+
+
+def _watch_render(context, name):
+    objects = _watch_item_objects(context.scene.empty_parent_export_settings, name)
+    if not objects:
+        return "missing", "対応するオブジェクトがありません"
+    with yume_state.Snapshot(context) as snapshot:
+        snapshot.deselect_all(context.selected_objects)
+        for obj in objects:
+            snapshot.select(obj, True)
+        snapshot.set_active(objects[0])
+        finished = 'FINISHED' in bpy.ops.empty_camera.render_selected()
+    return ("ok" if finished else "failed"), ""
+
+
+def _watch_export_vox(context, name):
+    settings = context.scene.empty_parent_export_settings
+    objects = _watch_item_objects(settings, name)
+    meshes = [obj for obj in objects or () if obj.type == 'MESH']
+    if not meshes:
+        return "missing", "対応するメッシュがありません"
+    vox_dir = bpy.path.abspath(settings.watch_vox_dir)
+    os.makedirs(vox_dir, exist_ok=True)
+    filepath = os.path.join(vox_dir, f"{name}.vox")
+    with yume_state.Snapshot(context) as snapshot:
+        snapshot.set_active(meshes[0])
+        finished = 'FINISHED' in bpy.ops.export_scene.vox(
+            filepath=filepath, voxel_size=settings.watch_voxel_size,
+        )
+    return ("ok" if finished else "failed"), filepath
 
 
 class EmptyParentExportSettings(PropertyGroup):
+    export_format: bpy.props.EnumProperty(
+        name="出力形式",
+        items=(
+            ('FBX', "FBX", "export_scene.fbx で書き出します"),
+            ('GLB', "GLB", "静的メッシュをバイナリglTFで書き出します (同じメッシュデータは共有、アーマチュア等は空のノード)"),
+        ),
+        default='FBX',
+    )
     export_dir: StringProperty(
         name="出力フォルダ",
         description="FBXを書き出すフォルダを指定します",
@@ -86,21 +1367,171 @@ class EmptyParentExportSettings(PropertyGroup):
     )
     csv_path: StringProperty(
         name="CSVファイル",
-        description="F列の2行目以降をファイル名候補として読み込みます",
+        description="ファイル名列の2行目以降をファイル名候補として読み込みます",
         subtype='FILE_PATH',
         update=_on_csv_path_updated,
     )
+    csv_column: StringProperty(
+        name="CSV列名",
+        description="ファイル名として使う列のヘッダー名 (見つからない場合はF列)",
+        default="3DModel",
+        update=_on_csv_path_updated,
+    )
     csv_index: bpy.props.IntProperty(
         name="CSVインデックス",
         default=0,
         min=0,
         options={'HIDDEN'},
     )
+    use_staged_export: bpy.props.BoolProperty(
+        name="シーンを変更せずに出力",
+        description=(
+            "一時コレクションで出力し、選択状態を変更せず、作成したEmptyや親子付けも出力後に元に戻します。"
+            "オフの場合は従来どおりEmptyと親子付けをシーンに残します"
+        ),
+        default=True,
+    )
+    use_mesh_optimization: bpy.props.BoolProperty(
+        name="メッシュ最適化",
+        description="出力用の一時コピーで頂点結合・三角化・不要なUV/スロット削除・三角形並べ替えを行います",
+        default=False,
+    )
+    weld_distance: bpy.props.FloatProperty(
+        name="結合距離",
+        description="この距離以内の頂点を結合します (0で結合しない)",
+        default=0.0001,
+        min=0.0,
+        soft_max=0.01,
+        precision=5,
+        subtype='DISTANCE',
+    )
+    reorder_triangles: bpy.props.BoolProperty(
+        name="三角形並べ替え",
+        description="頂点キャッシュの効率が上がるよう三角形と頂点を並べ替えます (Tipsify)",
+        default=True,
+    )
+    use_child_merge: bpy.props.BoolProperty(
+        name="子メッシュを結合",
+        description="親選択エクスポートで静的な子メッシュをマテリアルごとに1つへ結合します (シーンは変更しません)",
+        default=False,
+    )
+    use_material_atlas: bpy.props.BoolProperty(
+        name="マテリアルをアトラス化",
+        description="単色・単一テクスチャのマテリアルをアトラス画像1枚と1つのマテリアルにまとめます",
+        default=False,
+    )
+    atlas_cell_size: bpy.props.IntProperty(
+        name="アトラスのセルサイズ",
+        description="アトラス内で1マテリアルに割り当てるピクセル数 (一辺)",
+        default=128,
+        min=4,
+        max=2048,
+    )
+    use_lods: bpy.props.BoolProperty(
+        name="LOD生成",
+        description="間引いたメッシュを _LOD0, _LOD1... として同じ親の下に出力し、UnityでLODGroupを自動作成させます",
+        default=False,
+    )
+    lod_ratios: StringProperty(
+        name="LOD比率",
+        description="各LODのポリゴン比率をカンマ区切りで指定します (先頭がLOD0)",
+        default="1.0, 0.5, 0.25",
+    )
+    use_budget_check: bpy.props.BoolProperty(
+        name="予算チェック",
+        description="出力前に三角形数・頂点数・マテリアル数・テクスチャメモリを見積もり、カテゴリ別の予算と照合します",
+        default=False,
+    )
+    budget_csv_path: StringProperty(
+        name="カテゴリCSV",
+        description="Category列を引くCSV (Item.csv)。空の場合はCSVファイルを使います",
+        subtype='FILE_PATH',
+    )
+    budget_table: StringProperty(
+        name="予算テーブル",
+        description=(
+            "カテゴリ:三角形:頂点:マテリアル:テクスチャMB:ボクセル をカンマ区切りで指定します "
+            "(* は上限なし、カテゴリ * は既定値)"
+        ),
+        default="Plant:3000:4000:2:4:*, *:10000:12000:4:16:*",
+    )
+    block_over_budget: bpy.props.BoolProperty(
+        name="予算超過は出力しない",
+        description="予算を超えたアセットの出力を中止します (オフの場合は警告のみ)",
+        default=False,
+    )
+    worker_count: bpy.props.IntProperty(
+        name="ワーカー数",
+        description="並列出力で起動するBlenderの数 (0でCPUコア数)",
+        default=0,
+        min=0,
+        soft_max=32,
+    )
+    worker_retries: bpy.props.IntProperty(
+        name="再試行回数",
+        description="失敗した項目を別のワーカーで出力し直す回数",
+        default=1,
+        min=0,
+        max=5,
+    )
+    use_incremental: bpy.props.BoolProperty(
+        name="差分出力",
+        description="内容ハッシュを出力フォルダのマニフェストに記録し、変更がなければ書き込みを省略します",
+        default=False,
+    )
     file_name: StringProperty(
         name="ファイル名",
         description="拡張子を除いたファイル名",
         default="export",
     )
+    batch_collection: PointerProperty(
+        name="ソースコレクション",
+        type=bpy.types.Collection,
+        description="一括出力で名前を照合するオブジェクトのコレクション",
+    )
+    batch_mode: bpy.props.EnumProperty(
+        name="一括出力モード",
+        items=(
+            ('EMPTY_PARENT', "空を親にする", "同名のオブジェクトをまとめて空の子にして出力"),
+            ('PARENT_CHILDREN', "親+子", "同名の親オブジェクトと子孫を、子の位置をリセットして出力"),
+        ),
+        default='EMPTY_PARENT',
+    )
+    use_watch_fbx: bpy.props.BoolProperty(
+        name="FBX/GLB",
+        description="監視モードで変更された項目を出力形式に従って出力し直します",
+        default=True,
+    )
+    use_watch_render: bpy.props.BoolProperty(
+        name="レンダリング",
+        description="監視モードで変更された項目を Render Selected でレンダリングし直します (UnityMatome2 が必要)",
+        default=False,
+    )
+    use_watch_vox: bpy.props.BoolProperty(
+        name="VOX",
+        description="監視モードで変更された項目をVOXに出力し直します (MagicaVoxel アドオンが必要)",
+        default=False,
+    )
+    watch_vox_dir: StringProperty(
+        name="VOX出力フォルダ",
+        description="監視モードでVOXを書き出すフォルダ",
+        subtype='DIR_PATH',
+    )
+    watch_voxel_size: bpy.props.FloatProperty(
+        name="ボクセルサイズ",
+        description="監視モードのVOX出力で1ボクセルあたりのサイズ",
+        default=0.1,
+        min=0.0001,
+        soft_max=10.0,
+        subtype='DISTANCE',
+    )
+    watch_delay: bpy.props.FloatProperty(
+        name="待ち時間 (秒)",
+        description="最後の変更からこの時間だけ待ってから出力します (続けて編集しても出力は1回)",
+        default=1.0,
+        min=0.0,
+        soft_max=10.0,
+    )
 
 
 class OBJECT_OT_empty_parent_fbx_export(Operator):
@@ -123,75 +1554,45 @@ class OBJECT_OT_empty_parent_fbx_export(Operator):
             return {'CANCELLED'}
 
         export_dir = bpy.path.abspath(settings.export_dir)
+        extension, format_label = _EXPORT_FORMATS[settings.export_format]
         filepath = bpy.path.ensure_ext(
             os.path.join(export_dir, settings.file_name),
-            ".fbx",
+            extension,
         )
 
-        previous_active = context.view_layer.objects.active
-        previous_selection = [obj for obj in context.selected_objects]
-
-        empty = bpy.data.objects.new(
-            name=settings.file_name,
-            object_data=None,
-        )
-        # 1. Empty生成直後に回転を設定
-        empty.rotation_euler = (math.radians(90.0), 0.0, 0.0)
-        # 2. Emptyをシーンに追加
-        context.collection.objects.link(empty)
-
-        # 3. 必要ならビューを更新して依存関係を反映
-        context.view_layer.update()
-
-        # 4. 親子付けとトランスフォーム維持
-        for obj in selected:
-            obj.parent = empty
-            obj.matrix_parent_inverse = empty.matrix_world.inverted()
-
-        # 5. 選択状態とアクティブをEmpty+子に揃える
-        for obj in context.selected_objects:
-            obj.select_set(False)
-
-        empty.select_set(True)
-        for obj in selected:
-            obj.select_set(True)
-        context.view_layer.objects.active = empty
+        manifest = _load_manifest(export_dir) if settings.use_incremental else None
+        try:
+            exporter = _make_exporter(context, settings, manifest)
+            budget_report = _make_budget_report(settings)
+        except ValueError as exc:
+            self.report({'WARNING'}, str(exc))
+            return {'CANCELLED'}
+        allowed = _preflight(context, budget_report, settings.file_name, selected)
+        _write_budget_report(self, budget_report, export_dir)
+        if not allowed:
+            self.report({'WARNING'}, "予算を超えているため出力を中止しました。")
+            return {'CANCELLED'}
+        # 終了時に位置・選択 (一時出力では親子付けも) を元に戻す
+        with exporter:
+            written = exporter.export_with_empty_parent(selected, settings.file_name, filepath)
+        if manifest is not None and written:
+            try:
+                _save_manifest(export_dir, manifest)
+            except OSError as exc:
+                self.report({'WARNING'}, f"マニフェストを保存できません: {exc}")
 
-        # 6. 元の位置を保存して0,0,0に設定
-        original_locations = {obj: obj.location.copy() for obj in selected}
-        for obj in selected:
-            obj.location = (0.0, 0.0, 0.0)
+        yume_trace.flush_and_report(self)
 
-        try:
-            bpy.ops.export_scene.fbx(
-                filepath=filepath,
-                use_selection=True,
-                apply_unit_scale=True,
-                apply_scale_options='FBX_SCALE_ALL',
-                object_types={'EMPTY', 'MESH', 'ARMATURE', 'OTHER'},
-            )
-        finally:
-            # 7. 位置を元に戻す
-            for obj, location in original_locations.items():
-                if obj and obj.name in context.view_layer.objects:
-                    obj.location = location
-
-        # 8. 選択状態を復元
-        for obj in context.selected_objects:
-            obj.select_set(False)
-        for obj in previous_selection:
-            if obj and obj.name in context.view_layer.objects:
-                obj.select_set(True)
-        if previous_active and previous_active.name in context.view_layer.objects:
-            context.view_layer.objects.active = previous_active
-
-        # 9. CSVインデックスを次に進める
-        names = _load_csv_names(settings.csv_path)
-        if names and _sync_index_from_file_name(settings, names):
-            settings.csv_index = min(len(names) - 1, settings.csv_index + 1)
-            settings.file_name = names[settings.csv_index]
-
-        self.report({'INFO'}, f"FBXを出力しました: {filepath}")
+        # CSVインデックスを次に進める
+        _advance_csv_index(settings)
+
+        if not written:
+            self.report({'INFO'}, f"変更がないため出力を省略しました: {filepath}")
+            return {'FINISHED'}
+        optimization = _describe_optimization(exporter)
+        if optimization:
+            self.report({'INFO'}, f"メッシュ最適化: {optimization}")
+        self.report({'INFO'}, f"{format_label}を出力しました: {filepath}")
         return {'FINISHED'}
 
 
@@ -221,9 +1622,10 @@ class OBJECT_OT_parent_children_fbx_export(Operator):
             return {'CANCELLED'}
 
         export_dir = bpy.path.abspath(settings.export_dir)
+        extension, format_label = _EXPORT_FORMATS[settings.export_format]
         filepath = bpy.path.ensure_ext(
             os.path.join(export_dir, settings.file_name),
-            ".fbx",
+            extension,
         )
 
         # すべての子オブジェクトを取得
@@ -233,55 +1635,254 @@ class OBJECT_OT_parent_children_fbx_export(Operator):
             self.report({'WARNING'}, "選択された親に子オブジェクトがありません。")
             return {'CANCELLED'}
 
-        previous_active = context.view_layer.objects.active
-        previous_selection = [obj for obj in context.selected_objects]
+        manifest = _load_manifest(export_dir) if settings.use_incremental else None
+        try:
+            exporter = _make_exporter(context, settings, manifest)
+            budget_report = _make_budget_report(settings)
+        except ValueError as exc:
+            self.report({'WARNING'}, str(exc))
+            return {'CANCELLED'}
+        allowed = _preflight(context, budget_report, settings.file_name, [parent_obj, *all_children])
+        _write_budget_report(self, budget_report, export_dir)
+        if not allowed:
+            self.report({'WARNING'}, "予算を超えているため出力を中止しました。")
+            return {'CANCELLED'}
+        # 終了時に子オブジェクトの位置と選択状態を元に戻す
+        with exporter:
+            written = exporter.export_parent_with_children(parent_obj, all_children, filepath)
+        if manifest is not None and written:
+            try:
+                _save_manifest(export_dir, manifest)
+            except OSError as exc:
+                self.report({'WARNING'}, f"マニフェストを保存できません: {exc}")
+
+        yume_trace.flush_and_report(self)
+
+        # CSVインデックスを次に進める
+        _advance_csv_index(settings)
+
+        if not written:
+            self.report({'INFO'}, f"変更がないため出力を省略しました: {filepath}")
+            return {'FINISHED'}
+        optimization = _describe_optimization(exporter)
+        if optimization:
+            self.report({'INFO'}, f"メッシュ最適化: {optimization}")
+        self.report({'INFO'}, f"{format_label}を出力しました (子{len(all_children)}個の位置をリセット): {filepath}")
+        return {'FINISHED'}
+
+
+class OBJECT_OT_empty_parent_fbx_batch_export(Operator):
+    bl_idname = "object.empty_parent_fbx_batch_export"
+    bl_label = "CSV/コレクションを一括FBX出力"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        settings = context.scene.empty_parent_export_settings
+        if not settings.export_dir:
+            self.report({'WARNING'}, "出力フォルダを指定してください。")
+            return {'CANCELLED'}
+        collection = settings.batch_collection
+        if not collection:
+            self.report({'WARNING'}, "ソースコレクションを指定してください。")
+            return {'CANCELLED'}
+
+        export_dir = bpy.path.abspath(settings.export_dir)
+        try:
+            os.makedirs(export_dir, exist_ok=True)
+        except OSError as exc:
+            self.report({'WARNING'}, f"出力フォルダを作成できません: {exc}")
+            return {'CANCELLED'}
+
+        name_index = _build_batch_name_index(collection)
+        names = _batch_names(settings, name_index)
+        if not names:
+            if settings.csv_path:
+                self.report({'WARNING'}, "CSVからファイル名を読み込めませんでした。")
+            else:
+                self.report({'WARNING'}, "出力対象がありません。")
+            return {'CANCELLED'}
+
+        manifest = _load_manifest(export_dir) if settings.use_incremental else None
+        try:
+            exporter = _make_exporter(context, settings, manifest)
+            budget_report = _make_budget_report(settings)
+        except ValueError as exc:
+            self.report({'WARNING'}, str(exc))
+            return {'CANCELLED'}
+        results = []
+
+        # シーン状態の復元はバッチ全体で1回だけ行う
+        try:
+            with exporter:
+                _export_batch(
+                    exporter, names, name_index, export_dir, settings.batch_mode, results,
+                    budget_report,
+                )
+        finally:
+            _write_budget_report(self, budget_report, export_dir)
+            if manifest is not None:
+                try:
+                    _save_manifest(export_dir, manifest)
+                except OSError as exc:
+                    self.report({'WARNING'}, f"マニフェストを保存できません: {exc}")
+
+        _finish_batch(self, results, export_dir, "一括FBX出力")
+        return {'FINISHED'}
+
+
+class OBJECT_OT_empty_parent_fbx_parallel_export(Operator):
+    bl_idname = "object.empty_parent_fbx_parallel_export"
+    bl_label = "並列ワーカーで一括FBX出力"
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        settings = context.scene.empty_parent_export_settings
+        if not settings.export_dir:
+            self.report({'WARNING'}, "出力フォルダを指定してください。")
+            return {'CANCELLED'}
+        collection = settings.batch_collection
+        if not collection:
+            self.report({'WARNING'}, "ソースコレクションを指定してください。")
+            return {'CANCELLED'}
 
-        # 子オブジェクトの元の位置を保存
-        original_locations = {obj: obj.location.copy() for obj in all_children}
+        export_dir = bpy.path.abspath(settings.export_dir)
+        try:
+            os.makedirs(export_dir, exist_ok=True)
+        except OSError as exc:
+            self.report({'WARNING'}, f"出力フォルダを作成できません: {exc}")
+            return {'CANCELLED'}
 
-        # 子オブジェクトの位置を0,0,0に設定
-        for obj in all_children:
-            obj.location = (0.0, 0.0, 0.0)
+        names = _batch_names(settings, _build_batch_name_index(collection))
+        if not names:
+            if settings.csv_path:
+                self.report({'WARNING'}, "CSVからファイル名を読み込めませんでした。")
+            else:
+                self.report({'WARNING'}, "出力対象がありません。")
+            return {'CANCELLED'}
 
-        # 選択を親+すべての子に設定
-        for obj in context.selected_objects:
-            obj.select_set(False)
+        # ワーカーと同じ設定で検証だけ先に行う
+        try:
+            _make_exporter(context, settings)
+            budget_report = _make_budget_report(settings)
+        except ValueError as exc:
+            self.report({'WARNING'}, str(exc))
+            return {'CANCELLED'}
 
-        parent_obj.select_set(True)
-        for obj in all_children:
-            obj.select_set(True)
-        context.view_layer.objects.active = parent_obj
+        # ワーカーは保存済みのファイルを読むので、現在の状態をコピー保存する
+        # (相対パスが変わらないよう元ファイルと同じフォルダに置く)
+        work_dir = tempfile.mkdtemp(prefix="fbx_parallel_")
+        snapshot_dir = os.path.dirname(bpy.data.filepath) or work_dir
+        snapshot_path = os.path.join(snapshot_dir, f".fbx_parallel_{os.getpid()}.blend")
+        try:
+            bpy.ops.wm.save_as_mainfile(filepath=snapshot_path, copy=True, check_existing=False)
+        except RuntimeError as exc:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            self.report({'WARNING'}, f"ワーカー用のファイルを保存できません: {exc}")
+            return {'CANCELLED'}
 
+        job_base = {
+            "collection": collection.name,
+            "export_dir": export_dir,
+            "batch_mode": settings.batch_mode,
+            "use_incremental": settings.use_incremental,
+        }
+        window_manager = context.window_manager
+        window_manager.progress_begin(0, len(names))
         try:
-            bpy.ops.export_scene.fbx(
-                filepath=filepath,
-                use_selection=True,
-                apply_unit_scale=True,
-                apply_scale_options='FBX_SCALE_ALL',
-                object_types={'EMPTY', 'MESH', 'ARMATURE', 'OTHER'},
+            results, jobs = yume_jobs.run_sharded(
+                bpy.app.binary_path,
+                snapshot_path,
+                _ADDON_DIR,
+                os.path.splitext(os.path.basename(__file__))[0],
+                "run_batch_worker",
+                job_base,
+                names,
+                work_dir,
+                worker_count=settings.worker_count or None,
+                retries=settings.worker_retries,
+                progress=lambda done, total: window_manager.progress_update(done),
             )
+        except OSError as exc:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            self.report({'WARNING'}, f"ワーカーを起動できません: {exc}")
+            return {'CANCELLED'}
         finally:
-            # 子オブジェクトの位置を元に戻す
-            for obj, location in original_locations.items():
-                if obj and obj.name in context.view_layer.objects:
-                    obj.location = location
-
-        # 選択状態を復元
-        for obj in context.selected_objects:
-            obj.select_set(False)
-        for obj in previous_selection:
-            if obj and obj.name in context.view_layer.objects:
-                obj.select_set(True)
-        if previous_active and previous_active.name in context.view_layer.objects:
-            context.view_layer.objects.active = previous_active
+            window_manager.progress_end()
+            try:
+                os.remove(snapshot_path)
+            except OSError:
+                pass
+
+        manifest = _load_manifest(export_dir) if settings.use_incremental else None
+        _merge_worker_outputs(
+            jobs, results, manifest, budget_report, _EXPORT_FORMATS[settings.export_format][0],
+        )
+        if manifest is not None:
+            try:
+                _save_manifest(export_dir, manifest)
+            except OSError as exc:
+                self.report({'WARNING'}, f"マニフェストを保存できません: {exc}")
+        _write_budget_report(self, budget_report, export_dir)
+
+        failed = _finish_batch(self, results, export_dir, "並列FBX出力")
+        if failed:
+            # 失敗の調査用にワーカーのログを残す
+            self.report({'WARNING'}, f"ワーカーのログ: {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        return {'FINISHED'}
 
-        # CSVインデックスを次に進める
-        names = _load_csv_names(settings.csv_path)
-        if names and _sync_index_from_file_name(settings, names):
-            settings.csv_index = min(len(names) - 1, settings.csv_index + 1)
-            settings.file_name = names[settings.csv_index]
 
-        self.report({'INFO'}, f"FBXを出力しました (子{len(all_children)}個の位置をリセット): {filepath}")
+class OBJECT_OT_empty_parent_watch(Operator):
+    bl_idname = "object.empty_parent_watch"
+    bl_label = "監視モードの開始/停止"
+
+    def execute(self, context):
+        if yume_watch.active() is not None:
+            yume_watch.stop()
+            self.report({'INFO'}, "監視を停止しました。")
+            return {'FINISHED'}
+
+        settings = context.scene.empty_parent_export_settings
+        collection = settings.batch_collection
+        if not collection:
+            self.report({'WARNING'}, "ソースコレクションを指定してください。")
+            return {'CANCELLED'}
+        runners = {}
+        if settings.use_watch_fbx:
+            if not settings.export_dir:
+                self.report({'WARNING'}, "出力フォルダを指定してください。")
+                return {'CANCELLED'}
+            runners["fbx"] = lambda name: _watch_export_fbx(bpy.context, name)
+        if settings.use_watch_render:
+            if hasattr(bpy.types, "EMPTY_CAMERA_OT_render_selected"):
+                runners["render"] = lambda name: _watch_render(bpy.context, name)
+            else:
+                self.report({'WARNING'}, "レンダリングのアドオンが登録されていないため監視しません。")
+        if settings.use_watch_vox:
+            if not settings.watch_vox_dir:
+                self.report({'WARNING'}, "VOX出力フォルダを指定してください。")
+                return {'CANCELLED'}
+            if hasattr(bpy.types, "EXPORT_OT_vox"):
+                runners["vox"] = lambda name: _watch_export_vox(bpy.context, name)
+            else:
+                self.report({'WARNING'}, "VOXのアドオンが登録されていないため監視しません。")
+        if not runners:
+            self.report({'WARNING'}, "監視して出力する対象がありません。")
+            return {'CANCELLED'}
+
+        # Undoでデータが作り直されても使えるよう、コレクションは名前で引く
+        csv_path = bpy.path.abspath(settings.csv_path) if settings.csv_path else ""
+        column_name = settings.csv_column.strip()
+        collection_name = collection.name
+        yume_watch.start(yume_watch.Watcher(
+            csv_path,
+            lambda: _watch_catalog(csv_path, column_name),
+            lambda object_name: _watch_item_for_object(collection_name, object_name),
+            runners,
+            settings.watch_delay,
+        ))
+        self.report({'INFO'}, f"監視を開始しました: {', '.join(runners)}")
         return {'FINISHED'}
 
 
@@ -291,7 +1892,7 @@ class OBJECT_OT_empty_parent_csv_prev(Operator):
 
     def execute(self, context):
         settings = context.scene.empty_parent_export_settings
-        names = _load_csv_names(settings.csv_path)
+        names = _load_csv_names(settings)
         if not names:
             self.report({'WARNING'}, "CSVからファイル名を読み込めませんでした。")
             return {'CANCELLED'}
@@ -307,7 +1908,7 @@ class OBJECT_OT_empty_parent_csv_next(Operator):
 
     def execute(self, context):
         settings = context.scene.empty_parent_export_settings
-        names = _load_csv_names(settings.csv_path)
+        names = _load_csv_names(settings)
         if not names:
             self.report({'WARNING'}, "CSVからファイル名を読み込めませんでした。")
             return {'CANCELLED'}
@@ -328,11 +1929,29 @@ class VIEW3D_PT_empty_parent_fbx_export(Panel):
         settings = context.scene.empty_parent_export_settings
 
         layout.prop(settings, "export_dir")
+        layout.prop(settings, "export_format")
         layout.prop(settings, "csv_path")
+        layout.prop(settings, "csv_column")
         row = layout.row(align=True)
         row.operator(OBJECT_OT_empty_parent_csv_prev.bl_idname, text="Prev")
         row.operator(OBJECT_OT_empty_parent_csv_next.bl_idname, text="Next")
         layout.prop(settings, "file_name")
+        layout.prop(settings, "use_staged_export")
+        layout.prop(settings, "use_incremental")
+        layout.prop(settings, "use_lods")
+        if settings.use_lods:
+            layout.prop(settings, "lod_ratios")
+        layout.prop(settings, "use_mesh_optimization")
+        if settings.use_mesh_optimization:
+            col = layout.column(align=True)
+            col.prop(settings, "weld_distance")
+            col.prop(settings, "reorder_triangles")
+        layout.prop(settings, "use_budget_check")
+        if settings.use_budget_check:
+            col = layout.column(align=True)
+            col.prop(settings, "budget_csv_path")
+            col.prop(settings, "budget_table")
+            col.prop(settings, "block_over_budget")
 
         layout.separator()
         layout.label(text="通常エクスポート:")
@@ -340,13 +1959,50 @@ class VIEW3D_PT_empty_parent_fbx_export(Panel):
 
         layout.separator()
         layout.label(text="親選択エクスポート:")
+        layout.prop(settings, "use_child_merge")
+        if settings.use_child_merge:
+            col = layout.column(align=True)
+            col.prop(settings, "use_material_atlas")
+            if settings.use_material_atlas:
+                col.prop(settings, "atlas_cell_size")
         layout.operator(OBJECT_OT_parent_children_fbx_export.bl_idname)
 
+        layout.separator()
+        layout.label(text="一括エクスポート:")
+        layout.prop(settings, "batch_collection")
+        layout.prop(settings, "batch_mode")
+        layout.operator(OBJECT_OT_empty_parent_fbx_batch_export.bl_idname)
+        row = layout.row(align=True)
+        row.prop(settings, "worker_count")
+        row.prop(settings, "worker_retries")
+        layout.operator(OBJECT_OT_empty_parent_fbx_parallel_export.bl_idname)
+
+        layout.separator()
+        layout.label(text="監視モード:")
+        row = layout.row(align=True)
+        row.prop(settings, "use_watch_fbx", toggle=True)
+        row.prop(settings, "use_watch_render", toggle=True)
+        row.prop(settings, "use_watch_vox", toggle=True)
+        if settings.use_watch_vox:
+            col = layout.column(align=True)
+            col.prop(settings, "watch_vox_dir")
+            col.prop(settings, "watch_voxel_size")
+        layout.prop(settings, "watch_delay")
+        watcher = yume_watch.active()
+        if watcher is None:
+            layout.operator(OBJECT_OT_empty_parent_watch.bl_idname, text="監視を開始", icon='PLAY')
+        else:
+            layout.operator(OBJECT_OT_empty_parent_watch.bl_idname, text="監視を停止", icon='PAUSE')
+            layout.label(text=watcher.status_text())
+
 
 classes = (
     EmptyParentExportSettings,
     OBJECT_OT_empty_parent_fbx_export,
     OBJECT_OT_parent_children_fbx_export,
+    OBJECT_OT_empty_parent_fbx_batch_export,
+    OBJECT_OT_empty_parent_fbx_parallel_export,
+    OBJECT_OT_empty_parent_watch,
     OBJECT_OT_empty_parent_csv_prev,
     OBJECT_OT_empty_parent_csv_next,
     VIEW3D_PT_empty_parent_fbx_export,
@@ -357,9 +2013,12 @@ def register():
     for cls in classes:
         bpy.utils.register_class(cls)
     bpy.types.Scene.empty_parent_export_settings = PointerProperty(type=EmptyParentExportSettings)
+    yume_geometry_cache.install()
 
 
 def unregister():
+    yume_watch.stop()
+    yume_geometry_cache.uninstall()
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
     del bpy.types.Scene.empty_parent_export_settings
@@ -367,3 +2026,7 @@ def unregister():
 
 if __name__ == "__main__":
     register()
+    # blender -b file.blend --python <このファイル> -- --job job.json でヘッドレス実行
+    if "--" in sys.argv:
+        import yume_cli
+        sys.exit(yume_cli.main())
@@ -0,0 +1,272 @@
+"""アドオンの処理時間を計測するベンチマーク
+
+    blender -b --factory-startup --python yume_benchmark.py -- \
+        --objects 50 --depth 2 --faces 400 --output bench.json --baseline baseline.json
+
+パラメータから合成シーン (コレクション内のオブジェクト数, 階層の深さ, メッシュの面数,
+メッシュデータの共有/個別) を作り、Move & Adjust, Batch Render (Workbench の極小解像度),
+2種類のFBX出力, カタログ全体の一括出力 (FBX と GLB), CSVの前へ/次へ を計測してJSONに書き出す。
+--baseline を指定すると中央値を比較し、しきい値を超えて遅くなった項目があれば終了コード 1。
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import bpy
+import bmesh
+
+_ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+if _ADDON_DIR not in sys.path:
+    sys.path.append(_ADDON_DIR)
+import yume_cli  # noqa: E402
+
+COLLECTION_NAME = "BenchmarkItems"
+
+EXIT_OK = 0
+EXIT_REGRESSION = 1
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(prog="blender -b --python yume_benchmark.py --")
+    parser.add_argument("--objects", type=int, default=20, help="コレクション内のルートオブジェクト数")
+    parser.add_argument("--depth", type=int, default=1, help="各ルートの子階層の深さ")
+    parser.add_argument("--faces", type=int, default=400, help="1メッシュあたりの面数 (目安)")
+    parser.add_argument("--shared", action="store_true", help="全オブジェクトで1つのメッシュデータを共有する")
+    parser.add_argument("--repeats", type=int, default=5, help="各計測の繰り返し回数")
+    parser.add_argument("--output", default="benchmark.json", help="結果のJSON")
+    parser.add_argument("--baseline", help="比較する過去の結果のJSON")
+    parser.add_argument("--threshold", type=float, default=0.10, help="遅くなったと判定する割合")
+    parser.add_argument("--work-dir", help="出力ファイルの作業フォルダ (省略時は一時フォルダ)")
+    return parser.parse_args(argv)
+
+
+# =========================================================
+# Scene generation
+# =========================================================
+def _clear_scene():
+    for obj in list(bpy.data.objects):
+        bpy.data.objects.remove(obj)
+    for mesh in list(bpy.data.meshes):
+        bpy.data.meshes.remove(mesh)
+
+
+def _make_grid_mesh(name, faces):
+    segments = max(1, math.ceil(math.sqrt(faces)))
+    mesh = bpy.data.meshes.new(name)
+    bm = bmesh.new()
+    bmesh.ops.create_grid(bm, x_segments=segments, y_segments=segments, size=0.5)
+    bm.to_mesh(mesh)
+    bm.free()
+    return mesh
+
+
+def _build_scene(args):
+    """合成シーンを作り、(Empty, カメラ, コレクション, ルートオブジェクト) を返す"""
+    _clear_scene()
+    scene = bpy.context.scene
+    collection = bpy.data.collections.new(COLLECTION_NAME)
+    scene.collection.children.link(collection)
+
+    shared_mesh = _make_grid_mesh("bench_shared", args.faces) if args.shared else None
+
+    def new_mesh_object(name, parent, offset):
+        mesh = shared_mesh or _make_grid_mesh(name, args.faces)
+        obj = bpy.data.objects.new(name, mesh)
+        collection.objects.link(obj)
+        obj.parent = parent
+        obj.location = offset
+        return obj
+
+    roots = []
+    for index in range(args.objects):
+        root = new_mesh_object(f"bench_{index:04d}_model", None, (index * 2.0, 0.0, 0.0))
+        parent = root
+        for level in range(args.depth):
+            parent = new_mesh_object(f"bench_{index:04d}_child{level}", parent, (0.0, 0.0, 0.5))
+        roots.append(root)
+
+    empty = bpy.data.objects.new("BenchEmpty", None)
+    scene.collection.objects.link(empty)
+    camera_data = bpy.data.cameras.new("BenchCamera")
+    camera_data.type = 'ORTHO'
+    camera = bpy.data.objects.new("BenchCamera", camera_data)
+    scene.collection.objects.link(camera)
+    camera.parent = empty
+    camera.location = (0.0, -10.0, 0.0)
+    camera.rotation_euler = (math.radians(90.0), 0.0, 0.0)
+    scene.camera = camera
+
+    # レンダリングは描画コストを最小にしてアドオン側の処理を主に測る
+    scene.render.engine = 'BLENDER_WORKBENCH'
+    scene.render.resolution_x = 32
+    scene.render.resolution_y = 32
+    scene.render.resolution_percentage = 100
+    return empty, camera, collection, roots
+
+
+def _write_catalog(path, roots):
+    with open(path, "w", newline="", encoding="utf-8") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(["ItemID", "NameID", "Cozy", "Nature", "Category", "3DModel", "2DImage"])
+        for root in roots:
+            base = root.name.replace("_model", "")
+            writer.writerow([f"item_{base}", f"name_{base}", 0, 0, "Bench", root.name, f"{base}_image"])
+
+
+# =========================================================
+# Measurement
+# =========================================================
+def _select_only(objects):
+    view_layer = bpy.context.view_layer
+    for obj in view_layer.objects:
+        obj.select_set(False)
+    for obj in objects:
+        obj.select_set(True)
+    view_layer.objects.active = objects[0]
+
+
+def _measure(name, repeats, action, setup=None):
+    """setup (計測外) → action を repeats 回実行し、所要時間の統計を返す"""
+    timings = []
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        result = action()
+        timings.append(time.perf_counter() - start)
+        if result is not None and 'FINISHED' not in result:
+            raise RuntimeError(f"{name}: オペレーターが {result} を返しました")
+    return {
+        "runs": len(timings),
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "max": max(timings),
+    }
+
+
+def _run_benchmarks(args, work_dir):
+    for key in ("fbx", "render"):
+        yume_cli.ensure_addon(key)
+    empty, camera, collection, roots = _build_scene(args)
+    scene = bpy.context.scene
+
+    props = scene.empty_camera_props
+    props.empty_object = empty
+    props.camera_object = camera
+    props.target_collection = collection
+    props.output_directory = os.path.join(work_dir, "renders")
+
+    catalog_path = os.path.join(work_dir, "catalog.csv")
+    _write_catalog(catalog_path, roots)
+    settings = scene.empty_parent_export_settings
+    settings.export_dir = os.path.join(work_dir, "fbx")
+    os.makedirs(settings.export_dir, exist_ok=True)
+    settings.csv_path = catalog_path
+
+    results = {}
+    results["move_and_adjust"] = _measure(
+        "move_and_adjust", args.repeats, bpy.ops.empty_camera.move_and_adjust,
+        setup=lambda: _select_only(roots),
+    )
+    # 一括レンダリングは1回で全アイテムを処理するので回数を抑える
+    results["batch_render"] = _measure(
+        "batch_render", max(1, args.repeats // 2), bpy.ops.empty_camera.batch_render,
+    )
+    results["empty_parent_fbx_export"] = _measure(
+        "empty_parent_fbx_export", args.repeats, bpy.ops.object.empty_parent_fbx_export,
+        setup=lambda: _select_only(roots[:1]),
+    )
+    if args.depth > 0:
+        results["parent_children_fbx_export"] = _measure(
+            "parent_children_fbx_export", args.repeats, bpy.ops.object.parent_children_fbx_export,
+            setup=lambda: _select_only(roots[:1]),
+        )
+
+    # カタログ全体の一括出力を形式ごとに比較する (一時出力なのでシーンは繰り返しても変わらない)
+    settings.batch_collection = collection
+    settings.use_staged_export = True
+    for file_format in ('FBX', 'GLB'):
+        settings.export_format = file_format
+        name = f"batch_{file_format.lower()}_export"
+        results[name] = _measure(name, args.repeats, bpy.ops.object.empty_parent_fbx_batch_export)
+    settings.export_format = 'FBX'
+    settings.use_staged_export = False
+
+    def navigate():
+        for _ in range(len(roots)):
+            bpy.ops.object.empty_parent_csv_next()
+        for _ in range(len(roots)):
+            bpy.ops.object.empty_parent_csv_prev()
+
+    results["csv_navigation"] = _measure("csv_navigation", args.repeats, navigate)
+    return results
+
+
+def _compare(results, baseline, threshold):
+    """基準と中央値を比較し、(表示行, 遅くなった項目) を返す"""
+    lines = []
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            lines.append(f"{name:32s} {current['median'] * 1000:10.2f} ms   (基準なし)")
+            continue
+        ratio = current["median"] / previous["median"] if previous["median"] else float('inf')
+        marker = ""
+        if ratio > 1.0 + threshold:
+            marker = "  << 遅くなりました"
+            regressions.append(name)
+        lines.append(
+            f"{name:32s} {current['median'] * 1000:10.2f} ms   "
+            f"基準 {previous['median'] * 1000:10.2f} ms   {ratio:6.2f}x{marker}"
+        )
+    return lines, regressions
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    args = _parse_args(argv)
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="yume_bench_")
+    os.makedirs(work_dir, exist_ok=True)
+
+    results = _run_benchmarks(args, work_dir)
+    report = {
+        "blender": bpy.app.version_string,
+        "params": {
+            "objects": args.objects,
+            "depth": args.depth,
+            "faces": args.faces,
+            "shared": args.shared,
+            "repeats": args.repeats,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as output_file:
+        json.dump(report, output_file, indent=2)
+    print(f"ベンチマーク結果: {args.output}")
+
+    if not args.baseline:
+        for name, current in results.items():
+            print(f"{name:32s} {current['median'] * 1000:10.2f} ms")
+        return EXIT_OK
+
+    with open(args.baseline, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)
+    if baseline.get("params") != report["params"]:
+        print("警告: 基準と計測条件が異なります", baseline.get("params"))
+    lines, regressions = _compare(results, baseline, args.threshold)
+    print("\n".join(lines))
+    return EXIT_REGRESSION if regressions else EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
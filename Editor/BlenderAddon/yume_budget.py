@@ -0,0 +1,171 @@
+"""出力前の負荷見積もりとカテゴリ別予算チェック
+
+FBX出力とVOX出力から使う共有モジュール。ジオメトリは yume_geometry_cache 経由で
+foreach_get により一括取得する。予算は Item.csv の Category 列で引く。
+"""
+
+import csv
+import json
+import os
+
+import numpy as np
+
+import yume_geometry_cache
+
+# 予算テーブルの列: カテゴリ:三角形:頂点:マテリアル:テクスチャMB:ボクセル
+BUDGET_FIELDS = ("triangles", "vertices", "materials", "texture_mb", "voxels")
+
+# レポートの列
+REPORT_FIELDS = (
+    "name", "category", "status",
+    "triangles", "vertices", "materials", "texture_mb", "voxels",
+    "size_x", "size_y", "size_z", "violations",
+)
+
+DEFAULT_CATEGORY = "*"
+
+
+def parse_budget_table(spec):
+    """予算テーブルを {カテゴリ: {項目: 上限}} に変換 (* は上限なし / 既定カテゴリ)"""
+
+    budgets = {}
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        parts = [part.strip() for part in entry.split(":")]
+        if len(parts) != len(BUDGET_FIELDS) + 1 or not parts[0]:
+            raise ValueError(f"予算テーブルの行が不正です: {entry}")
+        limits = {}
+        for field, text in zip(BUDGET_FIELDS, parts[1:]):
+            if text == "*":
+                continue
+            try:
+                limits[field] = float(text)
+            except ValueError:
+                raise ValueError(f"予算テーブルの値が数値ではありません: {entry}") from None
+            if limits[field] < 0:
+                raise ValueError(f"予算テーブルの値が範囲外です: {entry}")
+        budgets[parts[0]] = limits
+    if not budgets:
+        raise ValueError("予算テーブルが空です")
+    return budgets
+
+
+def category_for(catalog, model_name):
+    """3DModel 列が model_name の行の Category。見つからなければ既定カテゴリ"""
+
+    if catalog is None:
+        return DEFAULT_CATEGORY
+    return catalog.lookup("3DModel", model_name, "Category") or DEFAULT_CATEGORY
+
+
+def _texture_bytes(image):
+    """非圧縮RGBA8+ミップマップ換算のテクスチャメモリ"""
+    width, height = image.size
+    return width * height * 4 * 4 // 3
+
+
+def collect_mesh_stats(objects, depsgraph):
+    """評価後メッシュの三角形数・頂点数・マテリアル数・テクスチャメモリ・ワールド範囲を集計"""
+
+    triangles = 0
+    vertices = 0
+    materials = set()
+    images = set()
+    minimum = None
+    maximum = None
+
+    for obj in objects:
+        if obj.type != 'MESH':
+            continue
+        triangles += yume_geometry_cache.triangle_count(obj, depsgraph)
+        vertices += len(yume_geometry_cache.vertex_positions(obj, depsgraph))
+        bounds = yume_geometry_cache.world_vertex_bounds(obj, depsgraph)
+        if bounds is not None:
+            low, high = bounds
+            minimum = low if minimum is None else np.minimum(minimum, low)
+            maximum = high if maximum is None else np.maximum(maximum, high)
+
+        for slot in obj.material_slots:
+            material = slot.material
+            if material is None:
+                continue
+            materials.add(material)
+            if material.use_nodes and material.node_tree:
+                for node in material.node_tree.nodes:
+                    image = getattr(node, "image", None)
+                    if node.type == 'TEX_IMAGE' and image is not None:
+                        images.add(image)
+
+    size = (0.0, 0.0, 0.0) if minimum is None else tuple(float(v) for v in maximum - minimum)
+    return {
+        "triangles": triangles,
+        "vertices": vertices,
+        "materials": len(materials),
+        "texture_mb": round(sum(_texture_bytes(image) for image in images) / (1024 * 1024), 3),
+        "voxels": 0,
+        "size": size,
+    }
+
+
+def check(stats, budgets, category):
+    """予算超過の項目を文字列のリストで返す (カテゴリがなければ * の予算を使う)"""
+
+    limits = budgets.get(category)
+    if limits is None:
+        limits = budgets.get(DEFAULT_CATEGORY, {})
+    return [
+        f"{field} {stats[field]:g} > {limit:g}"
+        for field, limit in limits.items()
+        if stats.get(field, 0) > limit
+    ]
+
+
+class BudgetReport:
+    """出力対象ごとの見積もりと判定をためてCSV/JSONに書き出す"""
+
+    def __init__(self, budgets, catalog=None, block=False):
+        self.budgets = budgets
+        self.catalog = catalog
+        self.block = block
+        self.rows = []
+
+    def evaluate(self, name, stats):
+        """判定を記録し、出力してよければ True を返す"""
+
+        category = category_for(self.catalog, name)
+        violations = check(stats, self.budgets, category)
+        if not violations:
+            status = "ok"
+        elif self.block:
+            status = "blocked"
+        else:
+            status = "over_budget"
+        size_x, size_y, size_z = stats.get("size", (0.0, 0.0, 0.0))
+        self.rows.append({
+            "name": name,
+            "category": category,
+            "status": status,
+            **{field: stats.get(field, 0) for field in BUDGET_FIELDS},
+            "size_x": round(size_x, 4),
+            "size_y": round(size_y, 4),
+            "size_z": round(size_z, 4),
+            "violations": "; ".join(violations),
+        })
+        return status != "blocked"
+
+    def over_budget(self):
+        return [row for row in self.rows if row["status"] != "ok"]
+
+    def write(self, output_dir, base_name):
+        """<base_name>.csv と <base_name>.json を書き出して CSV のパスを返す"""
+
+        csv_path = os.path.join(output_dir, f"{base_name}.csv")
+        with open(csv_path, "w", newline="", encoding="utf-8") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.rows)
+        with open(os.path.join(output_dir, f"{base_name}.json"), "w", encoding="utf-8") as json_file:
+            json.dump({"budgets": self.budgets, "items": self.rows}, json_file, ensure_ascii=False, indent=2)
+        return csv_path
@@ -0,0 +1,145 @@
+"""Data/*.csv を一度だけ解析して共有するカタログ
+
+各アドオン (FBX出力の命名, レンダリングの命名, VOX一括出力) から使う共有モジュール。
+bpy に依存しないため、バックグラウンドのワーカーやCLIからも読み込める。
+CSVは パス+更新時刻+サイズ をキーにキャッシュし、変更がなければ再読込しない。
+"""
+
+import csv
+import os
+
+import yume_trace
+
+
+class CatalogColumn:
+    """1列分の値 (空欄を除く) と 値→位置 / 位置→行 の索引"""
+
+    def __init__(self, name, values, row_indices):
+        self.name = name
+        self.values = values
+        self.row_indices = row_indices
+        self._positions = {}
+        for position, value in enumerate(values):
+            self._positions.setdefault(value, position)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, position):
+        return self.values[position]
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def position(self, value):
+        """値の位置 (最初の出現)。見つからなければ None"""
+        return self._positions.get(value)
+
+    def row_index(self, value):
+        """値を持つデータ行の番号。見つからなければ None"""
+        position = self._positions.get(value)
+        if position is None:
+            return None
+        return self.row_indices[position]
+
+
+class CsvCatalog:
+    """ヘッダー名で列を引けるCSV。列の索引は初回アクセス時に作成して保持する"""
+
+    def __init__(self, path, header, rows):
+        self.path = path
+        self.header = [name.strip() for name in header]
+        self.rows = rows
+        self._header_index = {}
+        for index, name in enumerate(self.header):
+            if name:
+                self._header_index.setdefault(name, index)
+        self._columns = {}
+
+    def column_index(self, name):
+        return self._header_index.get(name)
+
+    def column(self, name, fallback_index=None):
+        """ヘッダー名で列を取得。ヘッダーにない場合は fallback_index の列を使う"""
+
+        index = self.column_index(name)
+        if index is None:
+            index = fallback_index
+        if index is None:
+            return None
+
+        column = self._columns.get(index)
+        if column is None:
+            values = []
+            row_indices = []
+            for row_index, row in enumerate(self.rows):
+                if len(row) > index:
+                    value = row[index].strip()
+                    if value:
+                        values.append(value)
+                        row_indices.append(row_index)
+            column = CatalogColumn(name, values, row_indices)
+            self._columns[index] = column
+        return column
+
+    def value(self, row_index, name):
+        """指定行のヘッダー名の列の値。列や値がなければ None"""
+
+        index = self.column_index(name)
+        if index is None or not 0 <= row_index < len(self.rows):
+            return None
+        row = self.rows[row_index]
+        if len(row) <= index:
+            return None
+        return row[index].strip() or None
+
+    def lookup(self, key_column, key, column):
+        """key_column が key の行から column の値を取得"""
+
+        keys = self.column(key_column)
+        if keys is None:
+            return None
+        row_index = keys.row_index(key)
+        if row_index is None:
+            return None
+        return self.value(row_index, column)
+
+
+_cache = {}
+
+
+def load_catalog(path):
+    """CSVを読み込んでカタログを返す。読み込めない場合は None
+
+    同じファイルが変更されていなければキャッシュ済みのカタログを返す。
+    """
+
+    if not path:
+        return None
+    path = os.path.abspath(path)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        _cache.pop(path, None)
+        return None
+
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    try:
+        with yume_trace.span("csv.parse", path=os.path.basename(path)):
+            with open(path, newline="", encoding="utf-8-sig") as csv_file:
+                rows = list(csv.reader(csv_file))
+    except (OSError, UnicodeDecodeError):
+        return None
+
+    header = rows[0] if rows else []
+    catalog = CsvCatalog(path, header, rows[1:])
+    _cache[path] = (key, catalog)
+    return catalog
+
+
+def clear_cache():
+    _cache.clear()
@@ -0,0 +1,303 @@
+"""ジョブファイルでFBX出力・一括レンダリング・VOX出力を実行するコマンドライン層
+
+    blender -b file.blend --python empty_parent_fbx_exporter.py -- --job job.json
+    blender -b file.blend --python yume_cli.py -- --job job.json
+
+どのアドオンから起動しても、ジョブが使うアドオンは同じフォルダから読み込んで登録する。
+ジョブファイルの例:
+
+    {
+      "stop_on_error": false,
+      "steps": [
+        {"type": "fbx_batch", "collection": "Items", "export_dir": "//FBX",
+         "mode": "EMPTY_PARENT", "parallel": false, "settings": {"use_incremental": true}},
+        {"type": "fbx", "mode": "PARENT_CHILDREN", "objects": ["Chair"],
+         "export_dir": "//FBX", "file_name": "chair_model"},
+        {"type": "render_batch", "collection": "Items", "output_dir": "//Icons",
+         "empty": "Empty", "camera": "Camera", "settings": {"scale_multiplier": 1.1}},
+        {"type": "vox", "object": "Rock", "filepath": "//Vox/rock.vox", "voxel_size": 0.1,
+         "palette_path": "//Vox/project_palette.hex"}
+      ]
+    }
+
+settings には各アドオンのプロパティ名をそのまま書ける (オブジェクト/コレクションは名前)。
+進捗は "YUME_PROGRESS {json}" の行で標準出力に出す。"trace" に出力パスを書くと計測を有効にする。
+終了コード: 0 = すべて成功, 1 = 失敗した手順/項目あり, 2 = 引数やジョブファイルが不正。
+"""
+
+import argparse
+import csv
+import importlib.util
+import json
+import os
+import sys
+
+import bpy
+
+import yume_trace
+
+PROGRESS_PREFIX = "YUME_PROGRESS"
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_INVALID = 2
+
+_ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 手順の種類 -> (アドオンのファイル, 登録済みか判定するクラス名)
+_ADDONS = {
+    "fbx": ("empty_parent_fbx_exporter.py", "OBJECT_OT_empty_parent_fbx_export"),
+    "render": ("UnityMatome2.py", "EMPTY_CAMERA_OT_batch_render"),
+    "vox": ("blender-magicavoxel.py", "EXPORT_OT_vox"),
+}
+
+# 一括処理で成功扱いにする状態 (メッシュのないオブジェクトのスキップは失敗にしない)
+_OK_STATUSES = {"ok", "unchanged", "skipped"}
+
+
+class JobError(Exception):
+    """ジョブファイルの内容が不正"""
+
+
+def _emit(event, **fields):
+    print(f"{PROGRESS_PREFIX} {json.dumps({'event': event, **fields}, ensure_ascii=False)}", flush=True)
+
+
+def ensure_addon(key):
+    """アドオンが未登録なら同じフォルダから読み込んで登録する"""
+    file_name, marker = _ADDONS[key]
+    if hasattr(bpy.types, marker):
+        return
+    module_name = os.path.splitext(file_name)[0].replace("-", "_")
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(_ADDON_DIR, file_name))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    module.register()
+
+
+def _lookup(collection, name, kind):
+    item = collection.get(name) if name else None
+    if item is None:
+        raise JobError(f"{kind}が見つかりません: {name}")
+    return item
+
+
+def _apply_settings(settings, overrides):
+    """プロパティ名 -> 値 を設定する。ポインタは名前からデータを引く"""
+    for key, value in overrides.items():
+        prop = settings.bl_rna.properties.get(key)
+        if prop is None or prop.is_readonly:
+            raise JobError(f"不明な設定です: {key}")
+        if prop.type == 'POINTER':
+            if prop.fixed_type.identifier == 'Collection':
+                value = _lookup(bpy.data.collections, value, "コレクション")
+            else:
+                value = _lookup(bpy.data.objects, value, "オブジェクト")
+        try:
+            setattr(settings, key, value)
+        except (TypeError, ValueError) as exc:
+            raise JobError(f"設定 {key} の値が不正です: {exc}") from None
+
+
+def _call(operator, **kwargs):
+    """オペレーターを実行して FINISHED なら True (エラー報告の例外も失敗として扱う)"""
+    try:
+        return 'FINISHED' in operator(**kwargs)
+    except TypeError as exc:
+        raise JobError(f"オプションが不正です: {exc}") from None
+    except RuntimeError as exc:
+        print(exc, file=sys.stderr)
+        return False
+
+
+def _read_csv_report(path):
+    try:
+        with open(path, newline="", encoding="utf-8") as report_file:
+            return list(csv.DictReader(report_file))
+    except OSError:
+        return []
+
+
+def _remove_stale(path):
+    """前回のレポートを結果と取り違えないよう削除"""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _emit_items(step_index, items):
+    """項目ごとの結果を出力し、失敗数を返す"""
+    failed = 0
+    for name, status, detail in items:
+        if status not in _OK_STATUSES:
+            failed += 1
+        _emit("item", step=step_index, name=name, status=status, detail=detail)
+    return failed
+
+
+def _select_only(context, objects):
+    for obj in context.view_layer.objects:
+        obj.select_set(False)
+    for obj in objects:
+        obj.select_set(True)
+    context.view_layer.objects.active = objects[0]
+
+
+def _run_fbx(context, step_index, step):
+    ensure_addon("fbx")
+    settings = context.scene.empty_parent_export_settings
+    names = step.get("objects") or []
+    if not names:
+        raise JobError("objects が指定されていません")
+    objects = [_lookup(bpy.data.objects, name, "オブジェクト") for name in names]
+    _apply_settings(settings, step.get("settings", {}))
+    if "export_dir" in step:
+        settings.export_dir = step["export_dir"]
+    settings.file_name = step.get("file_name") or names[0]
+
+    _select_only(context, objects)
+    if step.get("mode", "EMPTY_PARENT") == "PARENT_CHILDREN":
+        finished = _call(bpy.ops.object.parent_children_fbx_export)
+    else:
+        finished = _call(bpy.ops.object.empty_parent_fbx_export)
+    return _emit_items(step_index, [(settings.file_name, "ok" if finished else "failed", "")])
+
+
+def _run_fbx_batch(context, step_index, step):
+    ensure_addon("fbx")
+    settings = context.scene.empty_parent_export_settings
+    overrides = dict(step.get("settings", {}))
+    for key, setting in (("collection", "batch_collection"), ("export_dir", "export_dir"),
+                         ("mode", "batch_mode"), ("csv_path", "csv_path")):
+        if key in step:
+            overrides[setting] = step[key]
+    _apply_settings(settings, overrides)
+
+    report_path = os.path.join(bpy.path.abspath(settings.export_dir), "fbx_batch_report.csv")
+    _remove_stale(report_path)
+    if step.get("parallel"):
+        finished = _call(bpy.ops.object.empty_parent_fbx_parallel_export)
+    else:
+        finished = _call(bpy.ops.object.empty_parent_fbx_batch_export)
+    if not finished:
+        return 1
+    rows = _read_csv_report(report_path)
+    return _emit_items(step_index, [(row["name"], row["status"], row["detail"]) for row in rows])
+
+
+def _run_render_batch(context, step_index, step):
+    ensure_addon("render")
+    props = context.scene.empty_camera_props
+    overrides = dict(step.get("settings", {}))
+    for key, setting in (("collection", "target_collection"), ("output_dir", "output_directory"),
+                         ("empty", "empty_object"), ("camera", "camera_object")):
+        if key in step:
+            overrides[setting] = step[key]
+    # 項目ごとの結果はタイミングレポートから読む
+    overrides["write_timing_report"] = True
+    _apply_settings(props, overrides)
+
+    report_path = os.path.join(bpy.path.abspath(props.output_directory), "render_timing.json")
+    _remove_stale(report_path)
+    if not _call(bpy.ops.empty_camera.batch_render):
+        return 1
+    try:
+        with open(report_path, encoding="utf-8") as report_file:
+            records = json.load(report_file)["items"]
+    except (OSError, ValueError, KeyError):
+        records = []
+    return _emit_items(
+        step_index,
+        [(record["name"], record["status"], ";".join(record["outputs"])) for record in records],
+    )
+
+
+def _run_vox(context, step_index, step):
+    ensure_addon("vox")
+    obj = _lookup(bpy.data.objects, step.get("object"), "オブジェクト")
+    if not step.get("filepath"):
+        raise JobError("filepath が指定されていません")
+    filepath = bpy.path.abspath(step["filepath"])
+    os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+    options = {
+        key: value for key, value in step.items()
+        if key not in {"type", "object", "filepath"}
+    }
+
+    _select_only(context, [obj])
+    finished = _call(bpy.ops.export_scene.vox, filepath=filepath, **options)
+    return _emit_items(step_index, [(obj.name, "ok" if finished else "failed", filepath)])
+
+
+_STEP_RUNNERS = {
+    "fbx": _run_fbx,
+    "fbx_batch": _run_fbx_batch,
+    "render_batch": _run_render_batch,
+    "vox": _run_vox,
+}
+
+
+def run_job(job):
+    """ジョブを実行して終了コードを返す"""
+    steps = job.get("steps")
+    if not isinstance(steps, list) or not steps:
+        raise JobError("steps が空です")
+    for step in steps:
+        if step.get("type") not in _STEP_RUNNERS:
+            raise JobError(f"不明な手順です: {step.get('type')}")
+
+    if job.get("trace"):
+        yume_trace.enable(bpy.path.abspath(job["trace"]))
+    context = bpy.context
+    stop_on_error = job.get("stop_on_error", False)
+    failed_steps = 0
+    _emit("job_start", steps=len(steps), blend=bpy.data.filepath)
+    for index, step in enumerate(steps):
+        _emit("step_start", step=index, type=step["type"])
+        try:
+            failed_items = _STEP_RUNNERS[step["type"]](context, index, step)
+        except (JobError, OSError) as exc:
+            _emit("step_end", step=index, status="error", detail=str(exc))
+            failed_steps += 1
+        else:
+            status = "failed" if failed_items else "ok"
+            _emit("step_end", step=index, status=status, failed_items=failed_items)
+            failed_steps += bool(failed_items)
+        if failed_steps and stop_on_error:
+            break
+    trace_path = yume_trace.flush()
+    _emit(
+        "job_end", status="failed" if failed_steps else "ok", failed_steps=failed_steps,
+        trace=trace_path,
+    )
+    return EXIT_FAILED if failed_steps else EXIT_OK
+
+
+def main(argv=None):
+    """'--' 以降の引数を受け取ってジョブを実行し、終了コードを返す"""
+    if argv is None:
+        argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(prog="blender -b file.blend --python <addon> --")
+    parser.add_argument("--job", required=True, help="ジョブファイル (JSON)")
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit:
+        return EXIT_INVALID
+
+    try:
+        with open(args.job, encoding="utf-8") as job_file:
+            job = json.load(job_file)
+    except (OSError, ValueError) as exc:
+        _emit("job_end", status="error", detail=f"ジョブファイルを読み込めません: {exc}")
+        return EXIT_INVALID
+    try:
+        return run_job(job)
+    except JobError as exc:
+        _emit("job_end", status="error", detail=str(exc))
+        return EXIT_INVALID
+
+
+if __name__ == "__main__":
+    sys.exit(main())
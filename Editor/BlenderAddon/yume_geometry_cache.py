@@ -0,0 +1,272 @@
+"""評価済みジオメトリのセッションキャッシュ
+
+3つのアドオンで共有し、変更のないオブジェクトを何度も評価しないようにする。
+オブジェクト名ごとに、ローカル空間の結果 (頂点配列・三角形数・バウンディングボックス・
+ジオメトリのハッシュなど) と、ワールド空間の結果 (ワールドAABB・ボクセル化の結果など) を持つ。
+
+- depsgraph_update_post でジオメトリが更新されたオブジェクト/データの結果をすべて破棄し、
+  トランスフォームだけが更新された場合はワールド空間の結果のみ破棄する。
+- 取得時にもメッシュデータの差し替えとワールド行列の変化を確認する (ハンドラの取りこぼし対策)。
+- 合計サイズの見積もりが上限を超えたら、最も長く使われていないオブジェクトから捨てる。
+"""
+
+import collections
+
+import bpy
+import numpy as np
+
+import yume_trace
+
+DEFAULT_CAPACITY = 256 * 1024 * 1024
+
+# 1エントリあたりの管理用サイズの見積もり
+_ENTRY_OVERHEAD = 512
+
+
+def _estimate_size(value):
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (bytes, str)):
+        return len(value) + 48
+    if isinstance(value, dict):
+        return 64 + len(value) * 160
+    if isinstance(value, (tuple, list)):
+        return 56 + sum(_estimate_size(item) for item in value)
+    return 32
+
+
+class _Entry:
+    __slots__ = ("data_name", "matrix", "local", "world", "sizes", "nbytes")
+
+    def __init__(self, data_name):
+        self.data_name = data_name
+        self.matrix = None
+        self.local = {}
+        self.world = {}
+        self.sizes = {}
+        self.nbytes = _ENTRY_OVERHEAD
+
+
+class GeometryCache:
+    """オブジェクト名 -> 計算結果 のLRUキャッシュ"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _drop(self, name):
+        entry = self._entries.pop(name, None)
+        if entry is not None:
+            self.nbytes -= entry.nbytes
+
+    def _drop_world(self, entry):
+        for key in entry.world:
+            size = entry.sizes.pop((True, key))
+            entry.nbytes -= size
+            self.nbytes -= size
+        entry.world.clear()
+
+    def _entry(self, obj):
+        name = obj.name
+        data_name = obj.data.name if obj.data is not None else None
+        entry = self._entries.get(name)
+        if entry is not None and entry.data_name != data_name:
+            # メッシュデータが差し替えられた
+            self._drop(name)
+            entry = None
+        if entry is None:
+            entry = _Entry(data_name)
+            self._entries[name] = entry
+            self.nbytes += entry.nbytes
+        else:
+            self._entries.move_to_end(name)
+
+        matrix = tuple(map(tuple, obj.matrix_world))
+        if entry.matrix != matrix:
+            self._drop_world(entry)
+            entry.matrix = matrix
+        return entry
+
+    def get(self, obj, depsgraph, key, compute, world=False):
+        """key の結果を返す。なければ compute(obj, depsgraph) で求めて保持する
+
+        world=True はワールド行列に依存する結果 (オブジェクトの移動で破棄される)。
+        返した値は共有されるので、呼び出し側で変更しないこと。
+        """
+        entry = self._entry(obj)
+        store = entry.world if world else entry.local
+        if key in store:
+            self.hits += 1
+            return store[key]
+
+        self.misses += 1
+        value = compute(obj, depsgraph)
+        size = _estimate_size(value)
+        store[key] = value
+        entry.sizes[(world, key)] = size
+        entry.nbytes += size
+        self.nbytes += size
+        self._evict()
+        return value
+
+    def _evict(self):
+        # 直前に使ったエントリは残す
+        while self.nbytes > self.capacity and len(self._entries) > 1:
+            name = next(iter(self._entries))
+            self._drop(name)
+
+    def invalidate(self, name):
+        self._drop(name)
+
+    def invalidate_world(self, name):
+        entry = self._entries.get(name)
+        if entry is not None:
+            self._drop_world(entry)
+            entry.matrix = None
+
+    def invalidate_data(self, data_name):
+        """データ (メッシュなど) を使う全オブジェクトの結果を破棄"""
+        for name in [name for name, entry in self._entries.items() if entry.data_name == data_name]:
+            self._drop(name)
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+
+    def stats(self):
+        return {
+            "objects": len(self._entries),
+            "bytes": self.nbytes,
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+session = GeometryCache()
+
+
+def get(obj, depsgraph, key, compute, world=False):
+    return session.get(obj, depsgraph, key, compute, world)
+
+
+# =========================================================
+# 共通の計算結果
+# =========================================================
+def _compute_bound_box(obj, depsgraph):
+    bound_box = getattr(obj.evaluated_get(depsgraph), "bound_box", None)
+    if not bound_box:
+        return None
+    return np.array([tuple(corner) for corner in bound_box], dtype=np.float64)
+
+
+def _compute_mesh_arrays(obj, depsgraph):
+    """評価済みメッシュのローカル頂点座標 (N, 3) と三角形数"""
+    eval_obj = obj.evaluated_get(depsgraph)
+    with yume_trace.span("to_mesh", object=obj.name):
+        mesh = eval_obj.to_mesh()
+    if mesh is None:
+        return np.empty((0, 3), dtype=np.float32), 0
+    try:
+        co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", co)
+        loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+        mesh.polygons.foreach_get("loop_total", loop_totals)
+        triangles = int(np.maximum(loop_totals - 2, 0).sum())
+    finally:
+        eval_obj.to_mesh_clear()
+    return co.reshape(-1, 3), triangles
+
+
+def _compute_world_bounds(obj, depsgraph):
+    corners = bound_box(obj, depsgraph)
+    if corners is None:
+        return None
+    matrix = np.array(obj.evaluated_get(depsgraph).matrix_world, dtype=np.float64)
+    world = corners @ matrix[:3, :3].T + matrix[:3, 3]
+    return world.min(axis=0), world.max(axis=0)
+
+
+def _compute_world_vertex_bounds(obj, depsgraph):
+    co = vertex_positions(obj, depsgraph)
+    if not len(co):
+        return None
+    matrix = np.array(obj.evaluated_get(depsgraph).matrix_world, dtype=np.float32)
+    world = co @ matrix[:3, :3].T + matrix[:3, 3]
+    return world.min(axis=0), world.max(axis=0)
+
+
+def bound_box(obj, depsgraph):
+    """評価済みオブジェクトのローカル bound_box の8頂点 (8, 3)。なければ None"""
+    return session.get(obj, depsgraph, "bound_box", _compute_bound_box)
+
+
+def world_bounds(obj, depsgraph):
+    """bound_box をワールド変換したAABB (min, max)。なければ None"""
+    return session.get(obj, depsgraph, "world_bounds", _compute_world_bounds, world=True)
+
+
+def vertex_positions(obj, depsgraph):
+    """評価済みメッシュのローカル頂点座標 (N, 3)"""
+    return session.get(obj, depsgraph, "mesh_arrays", _compute_mesh_arrays)[0]
+
+
+def triangle_count(obj, depsgraph):
+    return session.get(obj, depsgraph, "mesh_arrays", _compute_mesh_arrays)[1]
+
+
+def world_vertex_bounds(obj, depsgraph):
+    """評価済み頂点のワールドAABB (min, max)。頂点がなければ None"""
+    return session.get(obj, depsgraph, "world_vertex_bounds", _compute_world_vertex_bounds, world=True)
+
+
+# =========================================================
+# Invalidation
+# =========================================================
+@bpy.app.handlers.persistent
+def _on_depsgraph_update(scene, depsgraph):
+    for update in depsgraph.updates:
+        id_data = update.id
+        if isinstance(id_data, bpy.types.Object):
+            if update.is_updated_geometry:
+                session.invalidate(id_data.name)
+            elif update.is_updated_transform:
+                session.invalidate_world(id_data.name)
+        elif update.is_updated_geometry:
+            # メッシュ/カーブなどのデータ自体の更新
+            session.invalidate_data(id_data.name)
+
+
+@bpy.app.handlers.persistent
+def _on_load(*args):
+    session.clear()
+
+
+_users = [0]
+
+
+def install():
+    """ハンドラを登録する (各アドオンの register から呼ぶ。複数回呼んでもよい)"""
+    _users[0] += 1
+    if _on_depsgraph_update not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(_on_depsgraph_update)
+    if _on_load not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(_on_load)
+
+
+def uninstall():
+    """最後の利用者が外れたらハンドラを外してキャッシュを空にする"""
+    _users[0] = max(0, _users[0] - 1)
+    if _users[0]:
+        return
+    if _on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_on_depsgraph_update)
+    if _on_load in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(_on_load)
+    session.clear()
@@ -0,0 +1,339 @@
+"""静的メッシュをバイナリglTF (GLB) で書き出す
+
+export_scene.fbx の代わりに使う軽量な出力。オブジェクトの階層・トランスフォームと、
+メッシュの位置・法線・UV・インデックス・マテリアル (基本色・金属・粗さ・基本色テクスチャ) のみを扱う。
+メッシュの属性は foreach_get でまとめて numpy 配列に読み、同じメッシュデータを使う
+オブジェクトは1つのメッシュ (= 同じバッファ) を参照する。
+座標は glTF の Y-up に変換し、シーンの単位スケールを位置と移動量に適用する。
+"""
+
+import json
+import struct
+
+import numpy as np
+from mathutils import Matrix
+
+import yume_trace
+
+_GLB_MAGIC = 0x46546C67
+_CHUNK_JSON = 0x4E4F534A
+_CHUNK_BIN = 0x004E4942
+
+_TARGET_ARRAY_BUFFER = 34962
+_TARGET_ELEMENT_ARRAY_BUFFER = 34963
+
+_COMPONENT_TYPES = {
+    np.dtype(np.float32): 5126,
+    np.dtype(np.uint16): 5123,
+    np.dtype(np.uint32): 5125,
+}
+
+# Blender (Z-up) -> glTF (Y-up): (x, y, z) -> (x, z, -y)
+_AXIS_CONVERSION = Matrix((
+    (1.0, 0.0, 0.0, 0.0),
+    (0.0, 0.0, 1.0, 0.0),
+    (0.0, -1.0, 0.0, 0.0),
+    (0.0, 0.0, 0.0, 1.0),
+))
+_AXIS_CONVERSION_INVERSE = _AXIS_CONVERSION.inverted()
+
+
+def _to_y_up(vectors):
+    """(N, 3) の Blender 座標を glTF の座標にする"""
+    converted = vectors[:, (0, 2, 1)]
+    converted[:, 2] *= -1.0
+    return converted
+
+
+def _loop_normals(mesh, loop_count):
+    normals = np.empty(loop_count * 3, dtype=np.float32)
+    if hasattr(mesh, "corner_normals"):
+        # Blender 4.1 以降
+        mesh.corner_normals.foreach_get("vector", normals)
+    else:
+        mesh.calc_normals_split()
+        mesh.loops.foreach_get("normal", normals)
+    return normals.reshape(-1, 3)
+
+
+def _mesh_arrays(mesh):
+    """メッシュを glTF の頂点属性とマテリアル番号ごとの三角形にする
+
+    (位置 (N, 3), 法線 (N, 3), UV (N, 2) または None, 三角形 (T, 3), 三角形のマテリアル番号 (T,))
+    を返す。位置・法線・UVがすべて等しいループは1つの頂点にまとめる。
+    """
+    mesh.calc_loop_triangles()
+    triangle_count = len(mesh.loop_triangles)
+    triangle_loops = np.empty(triangle_count * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("loops", triangle_loops)
+    triangle_materials = np.empty(triangle_count, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("material_index", triangle_materials)
+
+    loop_count = len(mesh.loops)
+    loop_vertices = np.empty(loop_count, dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_vertices)
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+
+    columns = [co.reshape(-1, 3)[loop_vertices], _loop_normals(mesh, loop_count)]
+    uv_layer = mesh.uv_layers.active
+    if uv_layer is not None:
+        uvs = np.empty(loop_count * 2, dtype=np.float32)
+        uv_layer.data.foreach_get("uv", uvs)
+        columns.append(uvs.reshape(-1, 2))
+    attributes = np.concatenate(columns, axis=1)[triangle_loops]
+
+    vertices, inverse = np.unique(attributes, axis=0, return_inverse=True)
+    triangles = inverse.reshape(-1, 3)
+    uvs = vertices[:, 6:8] if uv_layer is not None else None
+    return vertices[:, 0:3], vertices[:, 3:6], uvs, triangles, triangle_materials
+
+
+def _has_live_modifiers(obj):
+    return any(modifier.show_viewport for modifier in obj.modifiers)
+
+
+def _principled_node(material):
+    if not material.use_nodes or not material.node_tree:
+        return None
+    return next(
+        (node for node in material.node_tree.nodes if node.type == 'BSDF_PRINCIPLED'),
+        None,
+    )
+
+
+def _image_data(image):
+    """画像ファイルの中身と MIME タイプ (PNG/JPEG 以外は None)"""
+    if image.packed_file is not None:
+        data = bytes(image.packed_file.data)
+    else:
+        try:
+            with open(image.filepath_from_user(), "rb") as image_file:
+                data = image_file.read()
+        except OSError:
+            return None, None
+    if data.startswith(b"\x89PNG"):
+        return data, "image/png"
+    if data.startswith(b"\xff\xd8"):
+        return data, "image/jpeg"
+    return None, None
+
+
+def _local_matrix(obj, exported):
+    """出力する親からの相対行列 (親を出力しない場合はワールド行列)"""
+    if obj.parent in exported:
+        # matrix_basis は位置・回転・スケールから直接求まるので、ビュー更新前でも正しい
+        return obj.matrix_parent_inverse @ obj.matrix_basis
+    if obj.parent is None:
+        return obj.matrix_basis
+    return obj.matrix_world
+
+
+class _GlbBuilder:
+    """glTF の JSON とバイナリバッファを組み立てる"""
+
+    def __init__(self, unit_scale=1.0):
+        self.unit_scale = unit_scale
+        self.gltf = {
+            "asset": {"version": "2.0", "generator": "yume_glb"},
+            "scene": 0,
+            "scenes": [{"nodes": []}],
+            "nodes": [],
+            "meshes": [],
+            "materials": [],
+            "textures": [],
+            "images": [],
+            "samplers": [],
+            "accessors": [],
+            "bufferViews": [],
+        }
+        self._blobs = []
+        self._offset = 0
+        self._meshes = {}
+        self._materials = {}
+        self._textures = {}
+
+    def _view(self, data, target=None):
+        padding = -self._offset % 4
+        if padding:
+            self._blobs.append(bytes(padding))
+            self._offset += padding
+        view = {"buffer": 0, "byteOffset": self._offset, "byteLength": len(data)}
+        if target is not None:
+            view["target"] = target
+        self._blobs.append(data)
+        self._offset += len(data)
+        self.gltf["bufferViews"].append(view)
+        return len(self.gltf["bufferViews"]) - 1
+
+    def _accessor(self, array, accessor_type, target, bounds=False):
+        array = np.ascontiguousarray(array)
+        accessor = {
+            "bufferView": self._view(array.tobytes(), target),
+            "componentType": _COMPONENT_TYPES[array.dtype],
+            "count": len(array),
+            "type": accessor_type,
+        }
+        if bounds:
+            accessor["min"] = array.min(axis=0).tolist()
+            accessor["max"] = array.max(axis=0).tolist()
+        self.gltf["accessors"].append(accessor)
+        return len(self.gltf["accessors"]) - 1
+
+    def _texture(self, image):
+        if image.name in self._textures:
+            return self._textures[image.name]
+        data, mime_type = _image_data(image)
+        index = None
+        if data is not None:
+            if not self.gltf["samplers"]:
+                self.gltf["samplers"].append({})
+            self.gltf["images"].append({"name": image.name, "bufferView": self._view(data), "mimeType": mime_type})
+            self.gltf["textures"].append({"sampler": 0, "source": len(self.gltf["images"]) - 1})
+            index = len(self.gltf["textures"]) - 1
+        self._textures[image.name] = index
+        return index
+
+    def _material(self, material):
+        if material.name in self._materials:
+            return self._materials[material.name]
+        base_color = list(material.diffuse_color)
+        metallic = material.metallic
+        roughness = material.roughness
+        texture = None
+        bsdf = _principled_node(material)
+        if bsdf is not None:
+            base_input = bsdf.inputs['Base Color']
+            if base_input.is_linked:
+                from_node = base_input.links[0].from_node
+                if from_node.type == 'TEX_IMAGE' and from_node.image is not None:
+                    texture = self._texture(from_node.image)
+                    base_color = [1.0, 1.0, 1.0, 1.0]
+            else:
+                base_color = list(base_input.default_value)
+            if not bsdf.inputs['Metallic'].is_linked:
+                metallic = bsdf.inputs['Metallic'].default_value
+            if not bsdf.inputs['Roughness'].is_linked:
+                roughness = bsdf.inputs['Roughness'].default_value
+
+        pbr = {"baseColorFactor": base_color, "metallicFactor": metallic, "roughnessFactor": roughness}
+        if texture is not None:
+            pbr["baseColorTexture"] = {"index": texture}
+        entry = {"name": material.name, "pbrMetallicRoughness": pbr}
+        if base_color[3] < 1.0:
+            entry["alphaMode"] = 'BLEND'
+        self.gltf["materials"].append(entry)
+        index = len(self.gltf["materials"]) - 1
+        self._materials[material.name] = index
+        return index
+
+    def _add_mesh(self, name, mesh, materials):
+        with yume_trace.span("glb.mesh", mesh=name):
+            positions, normals, uvs, triangles, triangle_materials = _mesh_arrays(mesh)
+        if not len(triangles):
+            return None
+
+        attributes = {
+            "POSITION": self._accessor(
+                _to_y_up(positions) * np.float32(self.unit_scale), "VEC3", _TARGET_ARRAY_BUFFER, bounds=True,
+            ),
+            "NORMAL": self._accessor(_to_y_up(normals), "VEC3", _TARGET_ARRAY_BUFFER),
+        }
+        if uvs is not None:
+            # glTF のテクスチャ座標は上が原点
+            flipped = uvs.copy()
+            flipped[:, 1] = 1.0 - flipped[:, 1]
+            attributes["TEXCOORD_0"] = self._accessor(flipped, "VEC2", _TARGET_ARRAY_BUFFER)
+
+        index_type = np.uint16 if len(positions) <= 0xFFFF else np.uint32
+        primitives = []
+        for slot in np.unique(triangle_materials).tolist():
+            indices = triangles[triangle_materials == slot].reshape(-1).astype(index_type)
+            primitive = {
+                "attributes": attributes,
+                "indices": self._accessor(indices, "SCALAR", _TARGET_ELEMENT_ARRAY_BUFFER),
+            }
+            material = materials[slot] if slot < len(materials) else None
+            if material is not None:
+                primitive["material"] = self._material(material)
+            primitives.append(primitive)
+        self.gltf["meshes"].append({"name": name, "primitives": primitives})
+        return len(self.gltf["meshes"]) - 1
+
+    def mesh_for(self, obj, depsgraph):
+        """オブジェクトの glTF メッシュ番号 (同じメッシュデータ・マテリアルなら共有)"""
+        materials = tuple(slot.material for slot in obj.material_slots)
+        # モディファイアとシェイプキーがなければ評価結果は元データと同じ
+        if _has_live_modifiers(obj) or obj.data.shape_keys is not None:
+            key = (obj, materials)
+        else:
+            key = (obj.data, materials)
+        if key in self._meshes:
+            return self._meshes[key]
+
+        if key[0] is obj:
+            eval_obj = obj.evaluated_get(depsgraph)
+            with yume_trace.span("to_mesh", object=obj.name):
+                mesh = eval_obj.to_mesh()
+            try:
+                index = self._add_mesh(obj.name, mesh, materials) if mesh is not None else None
+            finally:
+                eval_obj.to_mesh_clear()
+        else:
+            index = self._add_mesh(obj.data.name, obj.data, materials)
+        self._meshes[key] = index
+        return index
+
+    def add_objects(self, objects, depsgraph):
+        """objects を階層を保ったノードとして追加する (メッシュ以外は空のノード)"""
+        exported = set(objects)
+        node_indices = {}
+        for obj in objects:
+            matrix = _AXIS_CONVERSION @ _local_matrix(obj, exported) @ _AXIS_CONVERSION_INVERSE
+            translation, rotation, scale = matrix.decompose()
+            node = {
+                "name": obj.name,
+                "translation": list(translation * self.unit_scale),
+                "rotation": [rotation.x, rotation.y, rotation.z, rotation.w],
+                "scale": list(scale),
+            }
+            if obj.type == 'MESH':
+                mesh_index = self.mesh_for(obj, depsgraph)
+                if mesh_index is not None:
+                    node["mesh"] = mesh_index
+            self.gltf["nodes"].append(node)
+            node_indices[obj] = len(self.gltf["nodes"]) - 1
+
+        for obj in objects:
+            if obj.parent in exported:
+                parent_node = self.gltf["nodes"][node_indices[obj.parent]]
+                parent_node.setdefault("children", []).append(node_indices[obj])
+            else:
+                self.gltf["scenes"][0]["nodes"].append(node_indices[obj])
+
+    def to_bytes(self):
+        binary = b"".join(self._blobs)
+        binary += bytes(-len(binary) % 4)
+        # glTF では空の配列を書かない
+        gltf = {key: value for key, value in self.gltf.items() if value != []}
+        if binary:
+            gltf["buffers"] = [{"byteLength": len(binary)}]
+        json_bytes = json.dumps(gltf, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        json_bytes += b" " * (-len(json_bytes) % 4)
+
+        chunks = [struct.pack('<II', len(json_bytes), _CHUNK_JSON), json_bytes]
+        if binary:
+            chunks += [struct.pack('<II', len(binary), _CHUNK_BIN), binary]
+        body = b"".join(chunks)
+        return struct.pack('<III', _GLB_MAGIC, 2, 12 + len(body)) + body
+
+
+def write_glb(filepath, objects, depsgraph, unit_scale=1.0):
+    """objects (親子関係はそのまま) を GLB ファイルに書き出す"""
+    builder = _GlbBuilder(unit_scale)
+    builder.add_objects(objects, depsgraph)
+    with yume_trace.span("glb.write"):
+        data = builder.to_bytes()
+        with open(filepath, "wb") as glb_file:
+            glb_file.write(data)
+    return len(data)
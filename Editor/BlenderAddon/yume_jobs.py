@@ -0,0 +1,127 @@
+"""複数の blender --background ワーカーで出力を分担するジョブランナー
+
+出力リストをシャードに分け、各ワーカーに `--python-expr` でアドオンの入口関数を
+実行させる。ワーカーは1件ごとに結果をJSON Lines のステータスファイルへ追記し、
+親はそれを読んで進捗表示・再試行・レポートの統合を行う。bpy には依存しない。
+"""
+
+import json
+import os
+import subprocess
+import time
+
+# 再試行の対象になる状態 (ステータスが届かなかった項目も再試行する)
+RETRY_STATUSES = {"failed"}
+
+
+def default_worker_count():
+    return max(1, os.cpu_count() or 1)
+
+
+def split_shards(items, count):
+    """items を count 個以下のシャードに分ける (重いものが偏らないよう交互に配る)"""
+    count = max(1, min(count, len(items)))
+    return [items[index::count] for index in range(count) if items[index::count]]
+
+
+def worker_expr(module_dir, module_name, entry, job_path):
+    """ワーカーの --python-expr に渡す式"""
+    return (
+        "import importlib, sys; "
+        f"sys.path.insert(0, {module_dir!r}); "
+        f"importlib.import_module({module_name!r}).{entry}({job_path!r})"
+    )
+
+
+def append_status(status_path, name, status, detail=""):
+    """ワーカー側: 1件の結果をステータスファイルに追記"""
+    with open(status_path, "a", encoding="utf-8") as status_file:
+        status_file.write(json.dumps({"name": name, "status": status, "detail": detail}, ensure_ascii=False))
+        status_file.write("\n")
+
+
+def read_statuses(status_path):
+    """ステータスファイルを {名前: (状態, 詳細)} に変換 (書きかけの行は無視)"""
+    statuses = {}
+    try:
+        with open(status_path, encoding="utf-8") as status_file:
+            for line in status_file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                statuses[entry["name"]] = (entry["status"], entry.get("detail", ""))
+    except OSError:
+        pass
+    return statuses
+
+
+def run_sharded(
+    blender, blend_path, module_dir, module_name, entry, job_base, items, work_dir,
+    worker_count=None, retries=1, progress=None, poll_interval=0.5,
+):
+    """items をワーカーに分担させ、(items 順の [(名前, 状態, 詳細)], 実行したジョブ) を返す
+
+    job_base はすべてのワーカーに渡す共通設定。各ワーカーのジョブには items,
+    status_path, shard が追加される。progress(完了数, 総数) で進捗を通知する。
+    """
+
+    worker_count = worker_count or default_worker_count()
+    results = {}
+    pending = list(items)
+    jobs = []
+
+    for attempt in range(retries + 1):
+        if not pending:
+            break
+        last_attempt = attempt == retries
+        workers = []
+        for index, shard in enumerate(split_shards(pending, worker_count)):
+            shard_id = f"{attempt}_{index}"
+            job = dict(job_base, items=shard, shard=shard_id)
+            job["status_path"] = os.path.join(work_dir, f"status_{shard_id}.jsonl")
+            job_path = os.path.join(work_dir, f"job_{shard_id}.json")
+            with open(job_path, "w", encoding="utf-8") as job_file:
+                json.dump(job, job_file, ensure_ascii=False, indent=2)
+
+            log_path = os.path.join(work_dir, f"worker_{shard_id}.log")
+            with open(log_path, "w", encoding="utf-8") as log_file:
+                process = subprocess.Popen(
+                    [
+                        blender, "--background", blend_path, "--factory-startup",
+                        "--python-expr", worker_expr(module_dir, module_name, entry, job_path),
+                    ],
+                    stdout=log_file,
+                    stderr=subprocess.STDOUT,
+                )
+            workers.append((process, job, log_path))
+            jobs.append(job)
+
+        # 終了を待ちながらステータスファイルから進捗を集計
+        while True:
+            running = any(process.poll() is None for process, _, _ in workers)
+            if progress is not None:
+                done = len(results) + sum(
+                    1
+                    for _, job, _ in workers
+                    for status, _ in read_statuses(job["status_path"]).values()
+                    if last_attempt or status not in RETRY_STATUSES
+                )
+                progress(done, len(items))
+            if not running:
+                break
+            time.sleep(poll_interval)
+
+        pending = []
+        for process, job, log_path in workers:
+            statuses = read_statuses(job["status_path"])
+            for name in job["items"]:
+                status = statuses.get(name)
+                if status is None:
+                    status = ("failed", f"ワーカーが結果を返しませんでした (終了コード {process.returncode}, {log_path})")
+                if status[0] in RETRY_STATUSES and not last_attempt:
+                    pending.append(name)
+                    continue
+                results[name] = status
+
+    return [(name, *results[name]) for name in items if name in results], jobs
@@ -0,0 +1,197 @@
+"""プロジェクト共通のVOXパレットと、色→パレット番号の表のディスクキャッシュ
+
+bpy に依存しない。パレットファイルは次のどちらか:
+
+- .vox: MagicaVoxel のファイルの RGBA チャンク (255色)
+- それ以外: 1行1色の16進数 (RRGGBB または AARRGGBB、先頭の # は省略可、; で始まる行はコメント)
+
+パレット番号 i (1〜255) はファイルの i 番目の色。どのアセットも同じ番号で出力されるので、
+Unity側で番号ごとのマテリアルをまとめられる。
+色→番号の表は各チャンネル上位6ビット (64^3) ごとに最も近い色 (RGBの二乗距離) の番号を持ち、
+パレットの内容のハッシュを名前に含めてパレットファイルの隣に保存する。
+パレットと同じ色は表を使わずに完全一致で引く。
+"""
+
+import hashlib
+import os
+import struct
+
+import numpy as np
+
+import yume_trace
+
+MAX_COLORS = 255
+
+# 表の1チャンネルあたりのビット数
+_LOOKUP_BITS = 6
+_LOOKUP_SHIFT = 8 - _LOOKUP_BITS
+_LOOKUP_SIZE = 1 << _LOOKUP_BITS
+
+# 表を作るときに一度に距離を求めるセルの数
+_BUILD_BATCH = 8192
+
+
+def _read_vox_colors(data):
+    if data[:4] != b'VOX ':
+        raise ValueError("VOXファイルではありません")
+    offset = 8
+    end = len(data)
+    while offset + 12 <= end:
+        chunk_id = data[offset:offset + 4]
+        content_size, children_size = struct.unpack_from('<II', data, offset + 4)
+        offset += 12
+        if chunk_id == b'MAIN':
+            # MAIN の中身は子チャンクなのでそのまま読み進める
+            end = min(end, offset + content_size + children_size)
+            offset += content_size
+            continue
+        if chunk_id == b'RGBA':
+            rgba = np.frombuffer(data, dtype=np.uint8, count=256 * 4, offset=offset).reshape(256, 4)
+            # RGBA の i 番目がパレット番号 i+1 (最後の1色は使われない)
+            return rgba[:MAX_COLORS, :3]
+        offset += content_size + children_size
+    raise ValueError("VOXファイルにパレット (RGBA) がありません")
+
+
+def _read_hex_colors(text):
+    colors = []
+    for line_number, line in enumerate(text.splitlines(), 1):
+        value = line.strip()
+        if not value or value.startswith(";"):
+            continue
+        value = value.lstrip("#")
+        if len(value) == 8:
+            value = value[2:]
+        try:
+            if len(value) != 6:
+                raise ValueError
+            color = int(value, 16)
+        except ValueError:
+            raise ValueError(f"パレットの{line_number}行目が色ではありません: {line.strip()}") from None
+        colors.append(((color >> 16) & 0xFF, (color >> 8) & 0xFF, color & 0xFF))
+    return np.array(colors, dtype=np.uint8).reshape(-1, 3)
+
+
+def read_palette_colors(path):
+    """パレットファイルの色 (N, 3) uint8。形式が不正なら ValueError"""
+    with open(path, "rb") as palette_file:
+        data = palette_file.read()
+    if path.lower().endswith(".vox"):
+        colors = _read_vox_colors(data)
+    else:
+        colors = _read_hex_colors(data.decode("utf-8-sig"))
+    if not len(colors):
+        raise ValueError("パレットに色がありません")
+    if len(colors) > MAX_COLORS:
+        raise ValueError(f"パレットの色が{MAX_COLORS}色を超えています: {len(colors)}色")
+    return colors
+
+
+def build_lookup(colors):
+    """64^3 のセルの中心に最も近いパレット番号 (1〜) の表を作る"""
+    levels = (np.arange(_LOOKUP_SIZE, dtype=np.int32) << _LOOKUP_SHIFT) + (1 << _LOOKUP_SHIFT) // 2
+    cells = np.stack(np.meshgrid(levels, levels, levels, indexing="ij"), axis=-1).reshape(-1, 3)
+    palette = colors.astype(np.int32)
+    lookup = np.empty(len(cells), dtype=np.uint8)
+    for start in range(0, len(cells), _BUILD_BATCH):
+        batch = cells[start:start + _BUILD_BATCH]
+        distance = np.zeros((len(batch), len(palette)), dtype=np.int32)
+        for channel in range(3):
+            distance += (batch[:, channel, None] - palette[None, :, channel]) ** 2
+        # 同じ距離なら番号の小さい色 (rgb_to_palette_index と同じ)
+        lookup[start:start + _BUILD_BATCH] = np.argmin(distance, axis=1) + 1
+    return lookup.reshape(_LOOKUP_SIZE, _LOOKUP_SIZE, _LOOKUP_SIZE)
+
+
+class ProjectPalette:
+    """プロジェクト共通のパレットと色→番号の表"""
+
+    def __init__(self, path, colors, lookup, digest):
+        self.path = path
+        self.colors = colors
+        self.lookup = lookup
+        self.digest = digest
+        self._exact = {}
+        for index, (r, g, b) in enumerate(colors.tolist(), 1):
+            self._exact.setdefault((r << 16) | (g << 8) | b, index)
+
+    def index(self, r, g, b):
+        """RGB のパレット番号 (1〜255)"""
+        exact = self._exact.get((r << 16) | (g << 8) | b)
+        if exact is not None:
+            return exact
+        return int(self.lookup[r >> _LOOKUP_SHIFT, g >> _LOOKUP_SHIFT, b >> _LOOKUP_SHIFT])
+
+    def palette_index(self, r, g, b, palette):
+        """rgb_to_palette_index と同じ呼び出し形式 (palette には何も追加しない)"""
+        return self.index(r, g, b)
+
+    def rgba_colors(self):
+        """VOXの RGBA チャンク用の256色 (パレットにない番号は None)"""
+        colors = [tuple(color) for color in self.colors.tolist()]
+        return colors + [None] * (256 - len(colors))
+
+
+def _lookup_path(path, digest):
+    directory, file_name = os.path.split(path)
+    return os.path.join(directory, f".{file_name}.{digest[:16]}.lut.npy")
+
+
+def _load_lookup(lookup_path, color_count):
+    try:
+        lookup = np.load(lookup_path, allow_pickle=False)
+    except (OSError, ValueError):
+        return None
+    shape = (_LOOKUP_SIZE,) * 3
+    if lookup.shape != shape or lookup.dtype != np.uint8 or not 1 <= lookup.min() <= lookup.max() <= color_count:
+        return None
+    return lookup
+
+
+def _save_lookup(lookup_path, lookup):
+    # 他のプロセスが読みかけのファイルを壊さないよう、一時ファイルから置き換える
+    temp_path = f"{lookup_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "wb") as lookup_file:
+            np.save(lookup_file, lookup, allow_pickle=False)
+        os.replace(temp_path, lookup_path)
+    except OSError:
+        # 書き込めないフォルダでもこのセッションではメモリ上の表を使う
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+
+_cache = {}
+
+
+def load_palette(path):
+    """パレットを読み込む。表はディスクのキャッシュから読むか、なければ作って保存する
+
+    同じファイルが変更されていなければメモリ上のものを返す。
+    読めない場合は OSError、形式が不正な場合は ValueError。
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    colors = read_palette_colors(path)
+    digest = hashlib.sha1(colors.tobytes()).hexdigest()
+    lookup_path = _lookup_path(path, digest)
+    lookup = _load_lookup(lookup_path, len(colors))
+    if lookup is None:
+        with yume_trace.span("palette.lookup", colors=len(colors)):
+            lookup = build_lookup(colors)
+        _save_lookup(lookup_path, lookup)
+
+    palette = ProjectPalette(path, colors, lookup, digest)
+    _cache[path] = (key, palette)
+    return palette
+
+
+def clear_cache():
+    _cache.clear()
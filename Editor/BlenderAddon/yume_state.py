@@ -0,0 +1,90 @@
+"""処理中に変更したシーン状態だけを記録して元に戻すスナップショット
+
+    with yume_state.Snapshot(context) as snapshot:
+        snapshot.set(obj, "hide_render", True)
+        snapshot.select(obj, True)
+        snapshot.set_active(obj)
+        ...
+
+set/select/set_active を通して変更した項目だけを最初の値で記録し、終了時 (例外時も含む)
+に逆順で戻す。ビューレイヤーやコレクションの全オブジェクトを走査しないので、
+オブジェクト数の多いシーンでも復元のコストは変更した数にしか比例しない。
+"""
+
+_UNSET = object()
+
+# 削除されたデータ・ビューレイヤーから外れたオブジェクトは戻せないので無視する
+_STALE_ERRORS = (ReferenceError, RuntimeError, ValueError)
+
+
+def _copied(value):
+    # Vector/Euler/Matrix などは元データを参照しているのでコピーして持つ
+    copy = getattr(value, "copy", None)
+    return copy() if copy is not None else value
+
+
+class Snapshot:
+    """変更したプロパティ・選択状態・アクティブオブジェクトを記録して復元する"""
+
+    def __init__(self, context):
+        self.view_layer = context.view_layer
+        self._values = {}
+        self._selection = {}
+        self._active = _UNSET
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.restore()
+        return False
+
+    def save(self, owner, attr):
+        """owner.attr の現在値を記録する (記録済みなら何もしない)"""
+        key = (owner, attr)
+        if key not in self._values:
+            self._values[key] = _copied(getattr(owner, attr))
+
+    def set(self, owner, attr, value):
+        """元の値を記録してから owner.attr を変更する"""
+        self.save(owner, attr)
+        setattr(owner, attr, value)
+
+    def select(self, obj, state):
+        """元の選択状態を記録してから選択を変更する"""
+        if obj not in self._selection:
+            self._selection[obj] = obj.select_get(view_layer=self.view_layer)
+        obj.select_set(state, view_layer=self.view_layer)
+
+    def deselect_all(self, objects):
+        """選択中のオブジェクト (context.selected_objects など) だけを選択解除する"""
+        for obj in objects:
+            self.select(obj, False)
+
+    def set_active(self, obj):
+        """元のアクティブオブジェクトを記録してから変更する"""
+        objects = self.view_layer.objects
+        if self._active is _UNSET:
+            self._active = objects.active
+        objects.active = obj
+
+    def restore(self):
+        """記録した値を逆順で戻し、記録を空にする"""
+        for (owner, attr), value in reversed(list(self._values.items())):
+            try:
+                setattr(owner, attr, value)
+            except _STALE_ERRORS:
+                pass
+        for obj, state in self._selection.items():
+            try:
+                obj.select_set(state, view_layer=self.view_layer)
+            except _STALE_ERRORS:
+                pass
+        if self._active is not _UNSET:
+            try:
+                self.view_layer.objects.active = self._active
+            except _STALE_ERRORS:
+                self.view_layer.objects.active = None
+        self._values.clear()
+        self._selection.clear()
+        self._active = _UNSET
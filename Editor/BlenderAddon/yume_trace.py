@@ -0,0 +1,201 @@
+"""処理区間の計測 (Chrome trace_event 形式)
+
+    with yume_trace.span("render", item=name):
+        ...
+
+    @yume_trace.traced("csv.parse")
+    def load(...):
+        ...
+
+無効時は span() が共有のダミーを返すだけなので、計測コードを残したままでも負荷はほぼない。
+環境変数 YUME_TRACE に出力パスを指定するか enable(path) で有効にし、flush() で
+trace JSON (chrome://tracing や Perfetto で開ける) と区間ごとの集計 (.summary.json) を書き出す
+(書き出した区間は破棄され、次の flush() はそれ以降の分だけを書く)。
+オペレーターからは flush_and_report(self) で書き出して結果を報告できる。
+bpy には依存しない。
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+
+# イベントをためすぎないための上限 (超えた分は集計のみ行う)
+MAX_EVENTS = 500000
+
+_state = {"path": None, "epoch": 0.0}
+_events = []
+_totals = {}
+_lock = threading.Lock()
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        _record(self.name, self.start, end, self.args)
+        return False
+
+
+def _record(name, start, end, args):
+    duration = end - start
+    with _lock:
+        total = _totals.get(name)
+        if total is None:
+            _totals[name] = [1, duration, duration]
+        else:
+            total[0] += 1
+            total[1] += duration
+            total[2] = max(total[2], duration)
+        if len(_events) < MAX_EVENTS:
+            _events.append({
+                "name": name,
+                "ph": "X",
+                "ts": (start - _state["epoch"]) * 1e6,
+                "dur": duration * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": args,
+            })
+
+
+def enable(path):
+    """計測を有効にする。path は flush() で書き出す trace JSON のパス"""
+    with _lock:
+        if _state["path"] is None:
+            _state["epoch"] = time.perf_counter()
+        _state["path"] = path
+
+
+def disable():
+    _state["path"] = None
+
+
+def is_enabled():
+    return _state["path"] is not None
+
+
+def reset():
+    with _lock:
+        _events.clear()
+        _totals.clear()
+
+
+def span(name, **args):
+    """区間を計測するコンテキストマネージャ (無効時は何もしない)"""
+    if _state["path"] is None:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+
+def traced(name=None):
+    """関数全体を1区間として計測するデコレータ"""
+
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _state["path"] is None:
+                return func(*args, **kwargs)
+            with _Span(span_name, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _summary_rows(totals):
+    rows = [
+        {"name": name, "count": count, "total": total, "mean": total / count, "max": longest}
+        for name, (count, total, longest) in totals.items()
+    ]
+    rows.sort(key=lambda row: row["total"], reverse=True)
+    return rows
+
+
+def summary():
+    """区間名ごとの 回数・合計・平均・最大 (秒) を合計の長い順で返す"""
+    with _lock:
+        totals = {name: tuple(total) for name, total in _totals.items()}
+    return _summary_rows(totals)
+
+
+def _discard_flushed(event_count, totals):
+    """書き出した分の区間と集計を取り除く (書き出し中に記録された分は残す)"""
+    with _lock:
+        del _events[:event_count]
+        for name, (count, total, _) in totals.items():
+            current = _totals.get(name)
+            if current is None:
+                continue
+            if current[0] <= count:
+                del _totals[name]
+            else:
+                current[0] -= count
+                current[1] -= total
+
+
+def flush():
+    """有効なら trace JSON と集計を書き出して trace のパスを返す
+
+    書き出した区間は破棄するので、次の flush() はそれ以降の区間だけを書き出す
+    (対話的なセッションでも起動時からの区間がたまり続けない)。
+    """
+    path = _state["path"]
+    if path is None:
+        return None
+    with _lock:
+        events = list(_events)
+        totals = {name: tuple(total) for name, total in _totals.items()}
+    with open(path, "w", encoding="utf-8") as trace_file:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file)
+    with open(f"{os.path.splitext(path)[0]}.summary.json", "w", encoding="utf-8") as summary_file:
+        json.dump(_summary_rows(totals), summary_file, indent=2)
+    _discard_flushed(len(events), totals)
+    return path
+
+
+def flush_and_report(operator, written="トレースを書き出しました", failed="トレースを書き出せません"):
+    """flush() してオペレーターに結果を報告する (書き出せなければ警告)
+
+    written/failed はアドオンのUIの言語に合わせた見出し (後ろに ": パス" / ": エラー" が付く)。
+    """
+    try:
+        trace_path = flush()
+    except OSError as exc:
+        operator.report({'WARNING'}, f"{failed}: {exc}")
+        return
+    if trace_path:
+        operator.report({'INFO'}, f"{written}: {trace_path}")
+
+
+if os.environ.get("YUME_TRACE"):
+    enable(os.environ["YUME_TRACE"])
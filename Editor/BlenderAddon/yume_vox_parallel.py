@@ -0,0 +1,150 @@
+"""VOX出力のタイル処理 (パレット適用・XYZIの書き出し) をプロセスプールで並列に行う
+
+bpy に依存しないので、ワーカープロセスは Blender を読み込まずにこのモジュールだけを import する。
+ボクセルのローカル座標と色は multiprocessing.shared_memory で渡し、各ワーカーは担当する
+256^3 タイルの範囲だけを読む。パレットの番号付けは出現順に依存するので親プロセスで行い、
+結果は export_vox の逐次処理と同じチャンク順・同じバイト列になる。
+"""
+
+import concurrent.futures
+import contextlib
+import multiprocessing
+import os
+import struct
+import sys
+import types
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import yume_trace
+
+TILE_SIZE = 256
+
+
+def default_worker_count():
+    return max(1, min(8, (os.cpu_count() or 2) - 1))
+
+
+def _pack_colors(colors):
+    """(N, 3) の RGB を 0xRRGGBB の uint32 にする"""
+    colors = colors.astype(np.uint32)
+    return (colors[:, 0] << 16) | (colors[:, 1] << 8) | colors[:, 2]
+
+
+def _serialize_tile(local, packed, distinct, lookup):
+    """1タイル分の SIZE と XYZI の内容を作る"""
+    xyzi = np.empty((len(local), 4), dtype=np.uint8)
+    xyzi[:, :3] = local
+    xyzi[:, 3] = lookup[np.searchsorted(distinct, packed)]
+    size_x, size_y, size_z = (int(value) + 1 for value in local.max(axis=0))
+    size_content = struct.pack('<III', size_x, size_y, size_z)
+    xyzi_content = struct.pack('<I', len(xyzi)) + xyzi.tobytes()
+    return size_content, xyzi_content
+
+
+def _serialize_shared_tile(local_name, color_name, count, start, stop, distinct, lookup):
+    """ワーカープロセスで実行: 共有メモリの [start, stop) のタイルを処理する"""
+    local_memory = shared_memory.SharedMemory(name=local_name)
+    color_memory = shared_memory.SharedMemory(name=color_name)
+    try:
+        local = np.ndarray((count, 3), dtype=np.uint8, buffer=local_memory.buf)
+        packed = np.ndarray((count,), dtype=np.uint32, buffer=color_memory.buf)
+        result = _serialize_tile(local[start:stop], packed[start:stop], distinct, lookup)
+        # 共有メモリを閉じる前にビューを手放す
+        del local, packed
+        return result
+    finally:
+        local_memory.close()
+        color_memory.close()
+
+
+@contextlib.contextmanager
+def _without_main_module():
+    """ワーカーの起動中は親の __main__ (bpy を import するスクリプトなど) を子で再実行させない"""
+    main_module = sys.modules.get("__main__")
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = main_module
+
+
+def _share(array):
+    memory = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf)[...] = array
+    return memory
+
+
+def _serialize_parallel(local, packed, ranges, distinct, lookup, workers):
+    local_memory = _share(local)
+    color_memory = _share(packed)
+    try:
+        # Blender本体を複製しないよう spawn で起動する
+        context = multiprocessing.get_context("spawn")
+        with concurrent.futures.ProcessPoolExecutor(workers, mp_context=context) as executor:
+            # spawn ではワーカーは submit のたびに必要な数だけ起動される
+            with _without_main_module():
+                futures = [
+                    executor.submit(
+                        _serialize_shared_tile, local_memory.name, color_memory.name,
+                        len(local), start, stop, distinct, lookup,
+                    )
+                    for start, stop in ranges
+                ]
+            # 提出順 (= タイル順) に受け取る
+            return [future.result() for future in futures]
+    finally:
+        local_memory.close()
+        local_memory.unlink()
+        color_memory.close()
+        color_memory.unlink()
+
+
+def build_models(voxels, palette_index, workers=None):
+    """{座標: (r, g, b)} をタイルごとのモデルにする
+
+    palette_index(r, g, b, palette) は export_vox と同じ色の割り当て関数。
+    (palette, [(SIZEの内容, XYZIの内容), ...], モデルのオフセット, 並列で処理したか) を返す。
+    プロセスを起動できない環境では同じ処理を逐次で行う。
+    """
+    positions = np.array(list(voxels.keys()), dtype=np.int64).reshape(-1, 3)
+    colors = np.array(list(voxels.values()), dtype=np.int64).reshape(-1, 3)
+    minimum = positions.min(axis=0)
+    tiles = (positions - minimum) // TILE_SIZE
+
+    # タイル順 (x, y, z の昇順) に並べ、タイル内は元の順序を保つ (lexsort は安定)
+    order = np.lexsort((tiles[:, 2], tiles[:, 1], tiles[:, 0]))
+    tiles = tiles[order]
+    local = (positions[order] - minimum - tiles * TILE_SIZE).astype(np.uint8)
+    packed = _pack_colors(colors[order])
+
+    starts = np.flatnonzero(np.any(tiles[1:] != tiles[:-1], axis=1)) + 1
+    bounds = [0, *starts.tolist(), len(order)]
+    ranges = list(zip(bounds[:-1], bounds[1:]))
+    offsets = [tuple(int(value) * TILE_SIZE for value in tiles[start]) for start, _ in ranges]
+
+    # パレットは逐次処理と同じく出現順に色を割り当てる (色の種類の数だけ呼ぶ)
+    palette = {}
+    with yume_trace.span("vox.palette", chunks=len(ranges)):
+        distinct, first_seen = np.unique(packed, return_index=True)
+        lookup = np.empty(len(distinct), dtype=np.uint8)
+        for index in np.argsort(first_seen, kind="stable"):
+            color = int(distinct[index])
+            lookup[index] = palette_index(color >> 16, (color >> 8) & 0xFF, color & 0xFF, palette)
+
+    workers = default_worker_count() if workers is None else workers
+    if workers > 1 and len(ranges) > 1:
+        with yume_trace.span("vox.tiles.parallel", tiles=len(ranges), workers=workers):
+            try:
+                models = _serialize_parallel(local, packed, ranges, distinct, lookup, workers)
+                return palette, models, offsets, True
+            except (BrokenProcessPool, OSError):
+                pass
+    with yume_trace.span("vox.tiles", tiles=len(ranges)):
+        models = [
+            _serialize_tile(local[start:stop], packed[start:stop], distinct, lookup)
+            for start, stop in ranges
+        ]
+    return palette, models, offsets, False
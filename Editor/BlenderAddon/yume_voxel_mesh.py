@@ -0,0 +1,104 @@
+"""ボクセル集合を貪欲法 (greedy meshing) で少ない四角形のメッシュにする
+
+bpy に依存しない。各軸・各向きについて外側に露出した面を色IDのマスクとして求め、
+スライスごとに同じ色の連続区間を行方向にまとめてから、同じ区間が続く行を1枚の四角形に統合する。
+どちらの段階も numpy の一括処理で、Python のループは軸と向きの6回だけ。
+"""
+
+import numpy as np
+
+
+def _voxel_arrays(voxels):
+    """{座標: (r, g, b)} を (座標の最小値, 色IDのグリッド, 色の表) にする (色ID 0 は空)"""
+    positions = np.array(list(voxels.keys()), dtype=np.int64).reshape(-1, 3)
+    colors = np.array(list(voxels.values()), dtype=np.int64).reshape(-1, 3)
+    minimum = positions.min(axis=0)
+    extent = positions.max(axis=0) - minimum + 1
+
+    packed = (colors[:, 0] << 16) | (colors[:, 1] << 8) | colors[:, 2]
+    distinct, color_ids = np.unique(packed, return_inverse=True)
+    table = np.stack(((distinct >> 16) & 0xFF, (distinct >> 8) & 0xFF, distinct & 0xFF), axis=1)
+
+    dtype = np.uint16 if len(distinct) < 0xFFFF else np.int32
+    grid = np.zeros(tuple(extent), dtype=dtype)
+    local = positions - minimum
+    grid[local[:, 0], local[:, 1], local[:, 2]] = color_ids.reshape(-1) + 1
+    return minimum, grid, table.astype(np.uint8)
+
+
+def _exposed_faces(grid, forward):
+    """軸0方向の隣が空のセルの色ID (それ以外は0)"""
+    neighbor = np.zeros_like(grid)
+    if forward:
+        neighbor[:-1] = grid[1:]
+    else:
+        neighbor[1:] = grid[:-1]
+    return np.where((grid != 0) & (neighbor == 0), grid, 0)
+
+
+def _rectangles(mask):
+    """(スライス, U, V) の色IDマスクを四角形 (s, u0, u1, v0, v1, 色ID) の配列にまとめる"""
+    slices, rows, columns = mask.shape
+    flat = mask.reshape(-1, columns)
+    filled = flat != 0
+    edge = np.ones((flat.shape[0], 1), dtype=bool)
+    starts = filled & np.concatenate((edge, flat[:, 1:] != flat[:, :-1]), axis=1)
+    ends = filled & np.concatenate((flat[:, :-1] != flat[:, 1:], edge), axis=1)
+    # 行優先で列挙されるので、開始と終了は同じ順で対応する
+    run_rows, v0 = np.nonzero(starts)
+    _, v1 = np.nonzero(ends)
+    v1 = v1 + 1
+    color = flat[run_rows, v0]
+    s, u = np.divmod(run_rows, rows)
+
+    # 同じスライス・同じ区間・同じ色で行が連続するものを1つの四角形にする
+    order = np.lexsort((u, color, v1, v0, s))
+    s, u, v0, v1, color = s[order], u[order], v0[order], v1[order], color[order]
+    continues = (
+        (s[1:] == s[:-1]) & (v0[1:] == v0[:-1]) & (v1[1:] == v1[:-1])
+        & (color[1:] == color[:-1]) & (u[1:] == u[:-1] + 1)
+    )
+    first = np.flatnonzero(np.concatenate(([True], ~continues)))
+    last = np.concatenate((first[1:] - 1, [len(u) - 1]))
+    return np.stack((s[first], u[first], u[last] + 1, v0[first], v1[first], color[first]), axis=1)
+
+
+def greedy_mesh(voxels):
+    """ボクセルを統合した四角形のメッシュにする
+
+    (頂点座標 (N, 3) ボクセル単位, 四角形の頂点番号 (Q, 4), 四角形の色 (Q, 3) uint8,
+    統合前の面の数) を返す。頂点座標はボクセル中心が整数座標になる位置で、面は外向き。
+    """
+    minimum, grid, table = _voxel_arrays(voxels)
+    corners = []
+    quad_colors = []
+    face_count = 0
+    for axis in range(3):
+        u_axis = (axis + 1) % 3
+        v_axis = (axis + 2) % 3
+        oriented = np.transpose(grid, (axis, u_axis, v_axis))
+        for forward in (True, False):
+            mask = _exposed_faces(oriented, forward)
+            face_count += int(np.count_nonzero(mask))
+            rects = _rectangles(mask)
+            if not len(rects):
+                continue
+            plane = rects[:, 0] + (1 if forward else 0)
+            u0, u1, v0, v1 = rects[:, 1], rects[:, 2], rects[:, 3], rects[:, 4]
+            # (axis, u, v) は右手系の順なので、u→v の順に回ると +axis 向きの面になる
+            if forward:
+                uv = ((u0, v0), (u1, v0), (u1, v1), (u0, v1))
+            else:
+                uv = ((u0, v0), (u0, v1), (u1, v1), (u1, v0))
+            quad = np.empty((len(rects), 4, 3), dtype=np.int64)
+            for corner, (u, v) in enumerate(uv):
+                quad[:, corner, axis] = plane
+                quad[:, corner, u_axis] = u
+                quad[:, corner, v_axis] = v
+            corners.append(quad)
+            quad_colors.append(table[rects[:, 5] - 1])
+
+    corners = np.concatenate(corners).reshape(-1, 3)
+    vertices, indices = np.unique(corners, axis=0, return_inverse=True)
+    positions = vertices + minimum - 0.5
+    return positions, indices.reshape(-1, 4), np.concatenate(quad_colors), face_count
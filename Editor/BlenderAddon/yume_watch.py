@@ -0,0 +1,200 @@
+"""カタログCSVとオブジェクトの変更を監視し、影響する項目だけを出力し直す
+
+bpy.app.timers で短い間隔の tick を回す。
+
+- CSV は tick ごとに更新時刻とサイズだけを確認し、変わったときだけ読み直して
+  内容が変わった行の項目を積む。
+- depsgraph_update_post ではジオメトリ/トランスフォームが更新されたオブジェクト名を
+  集めるだけにし、項目への対応付けは tick で時間の上限内に行う。
+- 項目は (種類, 名前) ごとに1件にまとめ、最後の変更から delay 秒たってから出力する
+  (連続した編集は期限が延びるだけで、出力は1回)。
+- 1回の tick で出力するのは1項目だけで、出力中に起きた更新は監視の対象にしない。
+
+bpy は複数スレッドから使えないので、出力自体はメインスレッドで行う。
+"""
+
+import collections
+import os
+import time
+
+import bpy
+
+import yume_trace
+
+TICK_INTERVAL = 0.2
+
+# 1回の tick で変更の対応付けに使う時間の上限 (秒)
+TICK_BUDGET = 0.003
+
+_LOG_SIZE = 20
+
+
+class DebounceQueue:
+    """キーごとに期限を持つキュー。同じキーを積み直すと期限を延ばして1件にまとめる"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self._due = {}
+
+    def __len__(self):
+        return len(self._due)
+
+    def push(self, key, now):
+        # 遅延は一定なので、積み直したキーを末尾に回せば辞書の順序が期限順になる
+        self._due.pop(key, None)
+        self._due[key] = now + self.delay
+
+    def pop_due(self, now):
+        """期限を過ぎた最も古いキーを取り出す。なければ None"""
+        for key, due in self._due.items():
+            if due > now:
+                return None
+            del self._due[key]
+            return key
+        return None
+
+
+class Watcher:
+    """CSVとオブジェクトの変更から出力し直す項目を決めて、1件ずつ runner を呼ぶ
+
+    read_catalog() は {項目名: 行の内容} (CSVがなければ None)、
+    item_for_object(オブジェクト名) は項目名か None、
+    runners は {種類: runner(項目名) -> (状態, 詳細)}。
+    """
+
+    def __init__(self, csv_path, read_catalog, item_for_object, runners, delay):
+        self.csv_path = csv_path
+        self.read_catalog = read_catalog
+        self.item_for_object = item_for_object
+        self.runners = runners
+        self.queue = DebounceQueue(delay)
+        self.changed_objects = set()
+        self.suspended = False
+        self.log = collections.deque(maxlen=_LOG_SIZE)
+        self._csv_stamp = self._stat_csv()
+        self._catalog = read_catalog() or {}
+
+    def _stat_csv(self):
+        if not self.csv_path:
+            return None
+        try:
+            stat = os.stat(self.csv_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _queue_item(self, name, now):
+        for kind in self.runners:
+            self.queue.push((kind, name), now)
+
+    def _poll_csv(self, now):
+        stamp = self._stat_csv()
+        if stamp == self._csv_stamp:
+            return
+        self._csv_stamp = stamp
+        with yume_trace.span("watch.csv"):
+            catalog = self.read_catalog() or {}
+        for name, row in catalog.items():
+            if self._catalog.get(name) != row:
+                self._queue_item(name, now)
+        self._catalog = catalog
+
+    def _collect_objects(self, now, deadline):
+        while self.changed_objects and time.perf_counter() < deadline:
+            name = self.item_for_object(self.changed_objects.pop())
+            if name is not None:
+                self._queue_item(name, now)
+
+    def _run(self, key):
+        kind, name = key
+        self.suspended = True
+        try:
+            with yume_trace.span("watch.export", kind=kind, item=name):
+                try:
+                    status, detail = self.runners[kind](name)
+                except (RuntimeError, OSError, ValueError) as exc:
+                    status, detail = "failed", str(exc)
+                # 出力中に変更して戻した状態の更新をここで評価させ、監視に拾わせない
+                bpy.context.view_layer.update()
+        finally:
+            self.suspended = False
+        self.log.append((kind, name, status, detail))
+
+    def tick(self):
+        now = time.monotonic()
+        self._poll_csv(now)
+        self._collect_objects(now, time.perf_counter() + TICK_BUDGET)
+        key = self.queue.pop_due(now)
+        if key is not None:
+            self._run(key)
+        return TICK_INTERVAL
+
+    def status_text(self):
+        pending = len(self.queue) + len(self.changed_objects)
+        if not self.log:
+            return f"待機中: {pending}件"
+        kind, name, status, _ = self.log[-1]
+        return f"待機中: {pending}件 / 前回: {kind} {name} ({status})"
+
+
+_watcher = None
+
+
+def _on_depsgraph_update(scene, depsgraph):
+    if _watcher is None or _watcher.suspended:
+        return
+    for update in depsgraph.updates:
+        if not isinstance(update.id, bpy.types.Object):
+            continue
+        if update.is_updated_geometry or update.is_updated_transform:
+            _watcher.changed_objects.add(update.id.name)
+
+
+def _tick():
+    global _watcher
+    if _watcher is None:
+        return None
+    try:
+        return _watcher.tick()
+    except Exception:
+        # 例外でタイマーが外れた後もパネルが監視中と表示し続けないよう、監視を終了扱いにする
+        # (タイマーは Blender が外し、トレースバックはコンソールに出る)
+        _watcher = None
+        raise
+
+
+@bpy.app.handlers.persistent
+def _on_load_pre(*_args):
+    # 別のファイルを開いたら監視をやめる (古いシーンの設定を使い続けない)
+    # ハンドラの一覧は呼び出し中なので、ここでは外さない
+    global _watcher
+    _watcher = None
+    if bpy.app.timers.is_registered(_tick):
+        bpy.app.timers.unregister(_tick)
+
+
+def active():
+    return _watcher
+
+
+def start(watcher):
+    """監視を開始する (実行中の監視は置き換える)"""
+    global _watcher
+    stop()
+    _watcher = watcher
+    if _on_depsgraph_update not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(_on_depsgraph_update)
+    if _on_load_pre not in bpy.app.handlers.load_pre:
+        bpy.app.handlers.load_pre.append(_on_load_pre)
+    bpy.app.timers.register(_tick, first_interval=TICK_INTERVAL)
+
+
+def stop():
+    global _watcher
+    _watcher = None
+    if bpy.app.timers.is_registered(_tick):
+        bpy.app.timers.unregister(_tick)
+    if _on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_on_depsgraph_update)
+    if _on_load_pre in bpy.app.handlers.load_pre:
+        bpy.app.handlers.load_pre.remove(_on_load_pre)